@@ -0,0 +1,100 @@
+import json
+
+import maya.OpenMaya as OpenMaya
+
+import FBXAttrBatch
+
+""" AnimLayer state snapshots for FBXAnimationExporter
+
+    move to maya scripts folder, next to FBXAnimationExporter.py
+
+    The animLayers attribute of an export node records which layers were muted or soloed
+    for its clip. The state of every layer is read in one pass over the animLayer nodes and
+    stored as compact json:
+
+    {"v": 1, "fields": ["mute", "solo", "weight", "override", "lock"],
+     "layers": {"BaseAnimation": [false, false, 1.0, false, false], ...}}
+
+    Restoring reads the current state the same way and only sets the attributes of layers
+    that differ, all in one attribute batch, so going from clip to clip in a batch export
+    only touches what the clips do differently.
+
+    The old "layer, mute=True, solo=False;" strings are still read.
+    """
+
+VERSION = 1
+
+FIELDS = ["mute", "solo", "weight", "override", "lock"]
+BOOL_FIELDS = ["mute", "solo", "override", "lock"]
+
+
+def captureLayers():
+    """ Return {layer name: [mute, solo, weight, override, lock]} of every animLayer, in one pass """
+    layers = {}
+    nodeFn = OpenMaya.MFnDependencyNode()
+    nodeIterator = OpenMaya.MItDependencyNodes(OpenMaya.MFn.kAnimLayer)
+
+    while not nodeIterator.isDone():
+        nodeFn.setObject(nodeIterator.thisNode())
+        layers[nodeFn.name()] = [nodeFn.findPlug(curField).asBool() if curField in BOOL_FIELDS
+                                 else nodeFn.findPlug(curField).asDouble() for curField in FIELDS]
+        nodeIterator.next()
+
+    return layers
+
+
+def encode(layers):
+    return json.dumps({"v": VERSION, "fields": FIELDS, "layers": layers}, separators=(",", ":"), sort_keys=True)
+
+
+def decode(text):
+    """ Return {layer name: {field: value}} of an animLayers attribute value, json or the old string """
+    if not text:
+        return {}
+
+    if text.lstrip().startswith("{"):
+        data = json.loads(text)
+        return dict((name, dict(zip(data["fields"], values))) for name, values in data["layers"].items())
+
+    # old format "layer, mute=True, solo=False;", only mute and solo
+    layers = {}
+    for curEntry in text.split(";"):
+        fields = [curField.strip() for curField in curEntry.split(",")]
+        if not fields[0]:
+            continue
+        layers[fields[0]] = dict((curField.partition("=")[0], curField.partition("=")[2] == "True")
+                                 for curField in fields[1:])
+    return layers
+
+
+def restoreLayers(layers, batch=None):
+    """ Set the stored state back on the animLayers, return the number of attributes changed
+
+        Procedure: compare with the current state and queue only the fields that differ
+            on one attribute batch, layers that are not in the scene anymore are skipped,
+            as are fields driven by a connection (a keyed weight)
+
+        Presumption: layers is what decode returns
+    """
+    current = captureLayers()
+    batch = batch or FBXAttrBatch.AttrBatch()
+    changes = 0
+
+    for name, stored in layers.items():
+        if name not in current:
+            continue
+        currentValues = dict(zip(FIELDS, current[name]))
+
+        for curField, curValue in stored.items():
+            if curField not in currentValues or currentValues[curField] == curValue:
+                continue
+
+            plug = FBXAttrBatch.getPlug(name + "." + curField)
+            if plug.isDestination():
+                continue
+            batch.setAttr(plug, bool(curValue) if curField in BOOL_FIELDS else float(curValue))
+            changes += 1
+
+    if changes:
+        batch.doIt()
+    return changes
@@ -0,0 +1,208 @@
+import maya.OpenMaya as OpenMaya
+import sys
+import time
+
+""" Batched attribute operations for FBXAnimationExporter
+
+    move to maya scripts folder, next to FBXAnimationExporter.py
+
+    Every cmds.setAttr / cmds.connectAttr goes through the command engine and the undo queue.
+    AttrBatch collects lock, connect, disconnect and set operations and applies them with a
+    single MDGModifier.doIt. Locks are plug flags with no modifier operation, they are set
+    straight on the plugs in the same pass.
+
+    The modifier is not on the Maya undo queue, undoIt on the batch reverts it instead. So the
+    batch is for the export time edits (the export skeleton), the edits a user makes from the
+    window stay on cmds and Ctrl+Z.
+
+    batch = FBXAttrBatch.AttrBatch()
+    batch.unlock("joint1.translateX")
+    batch.connect("joint1.translate", "joint2.translate")
+    batch.doIt()
+    print(batch.summary())
+
+    Count the cmds calls of the old unlock and connect path against a batch, in a new scene:
+    mayapy FBXAttrBatch.py [joints]
+    """
+
+
+def getPlug(attr):
+    """ Return the MPlug of a "node.attribute" string, MPlugs are returned as they are """
+    if isinstance(attr, OpenMaya.MPlug):
+        return attr
+
+    selection = OpenMaya.MSelectionList()
+    selection.add(attr)
+    plug = OpenMaya.MPlug()
+    selection.getPlug(0, plug)
+    return plug
+
+
+class AttrBatch(object):
+    """ Queue of attribute operations applied in one go
+
+        Procedure: each call queues the operation on the modifier (or the lock list),
+            doIt applies them all, undoIt reverts them all.
+            commandCount counts the cmds calls the same work would have taken
+
+        Presumption: attributes are "node.attribute" strings or MPlugs, and exist
+    """
+
+    def __init__(self, modifier=None):
+        self.modifier = modifier or OpenMaya.MDGModifier()
+        self.commandCount = 0
+        self.doItCount = 0
+        self._locks = []
+        self._appliedLocks = []
+
+    #############################
+    #
+    #    Queue
+    #
+    #############################
+
+    def lock(self, attr, locked=True):
+        self._locks.append((getPlug(attr), locked))
+        self.commandCount += 1
+
+    def unlock(self, attr):
+        self.lock(attr, False)
+
+    def connect(self, sourceAttr, destAttr, force=False):
+        """ Queue a connection, force breaks the connection the destination already has """
+        destPlug = getPlug(destAttr)
+
+        if force:
+            self._disconnectSources(destPlug)
+        self.modifier.connect(getPlug(sourceAttr), destPlug)
+        self.commandCount += 1
+
+    def disconnect(self, sourceAttr, destAttr):
+        self.modifier.disconnect(getPlug(sourceAttr), getPlug(destAttr))
+        self.commandCount += 1
+
+    def _disconnectSources(self, destPlug):
+        sources = OpenMaya.MPlugArray()
+        destPlug.connectedTo(sources, True, False)
+        for i in range(sources.length()):
+            self.modifier.disconnect(sources[i], destPlug)
+
+    def setAttr(self, attr, value):
+        """ Queue a new value, the plug value type follows the python type of the value """
+        plug = getPlug(attr)
+
+        if isinstance(value, bool):
+            self.modifier.newPlugValueBool(plug, value)
+        elif isinstance(value, int):
+            self.modifier.newPlugValueInt(plug, value)
+        elif isinstance(value, float):
+            self.modifier.newPlugValueDouble(plug, value)
+        else:
+            self.modifier.newPlugValueString(plug, value)
+        self.commandCount += 1
+
+    #############################
+    #
+    #    Apply
+    #
+    #############################
+
+    def doIt(self):
+        """ Apply every queued operation, locks first so locked destinations can be connected and set """
+        for curPlug, curLocked in self._locks:
+            self._appliedLocks.append((curPlug, curPlug.isLocked()))
+            curPlug.setLocked(curLocked)
+        self._locks = []
+
+        self.modifier.doIt()
+        self.doItCount += 1
+
+    def undoIt(self):
+        self.modifier.undoIt()
+
+        for curPlug, curLocked in reversed(self._appliedLocks):
+            curPlug.setLocked(curLocked)
+        self._appliedLocks = []
+
+    def summary(self):
+        return "attribute batch: %d commands replaced by %d doIt" % (self.commandCount, self.doItCount)
+
+
+#############################
+#
+#    Benchmark
+#
+#############################
+
+class CommandCounter(object):
+    """ maya.cmds passing every call on and counting them """
+
+    def __init__(self, cmds):
+        self._cmds = cmds
+        self.count = 0
+
+    def __getattr__(self, name):
+        function = getattr(self._cmds, name)
+
+        def counted(*args, **kwargs):
+            self.count += 1
+            return function(*args, **kwargs)
+        return counted
+
+
+def _jointChain(cmds, prefix, joints):
+    """ Return the full paths of a new chain of joints, root first """
+    cmds.select(clear=True)
+    chain = []
+    for i in range(joints):
+        chain.append(cmds.ls(cmds.joint(name="%s%d" % (prefix, i), position=(i, 0, 0)), long=True)[0])
+    return chain
+
+
+def benchmarkCommandCount(joints=250):
+    """ Unlock and connect a joint chain the old way and with a batch, print and return the counts
+
+        Procedure: the old way is what copyAndConnectSkeleton did, one cmds.setAttr per
+            channel unlock and one cmds.connectAttr per channel, every call counted. The batch
+            queues the same operations and applies them with one doIt, no cmds call
+
+        Presumption: run inside Maya or with mayapy FBXAttrBatch.py, the scene is replaced
+    """
+    import maya.cmds as cmds
+
+    cmds.file(new=True, force=True)
+    source = _jointChain(cmds, "attrBatchSource", joints)
+    channels = [curTransform + curAxis for curTransform in ("translate", "rotate", "scale") for curAxis in "XYZ"]
+
+    target = _jointChain(cmds, "attrBatchOld", joints)
+    counter = CommandCounter(cmds)
+    startTime = time.time()
+    for curSource, curTarget in zip(source, target):
+        for curChannel in channels:
+            counter.setAttr(curTarget + "." + curChannel, lock=False)
+        for curChannel in channels:
+            counter.connectAttr(curSource + "." + curChannel, curTarget + "." + curChannel)
+    oldSeconds = time.time() - startTime
+
+    target = _jointChain(cmds, "attrBatchNew", joints)
+    batch = AttrBatch()
+    startTime = time.time()
+    for curSource, curTarget in zip(source, target):
+        for curChannel in channels:
+            batch.unlock(curTarget + "." + curChannel)
+        for curChannel in channels:
+            batch.connect(curSource + "." + curChannel, curTarget + "." + curChannel)
+    batch.doIt()
+    batchSeconds = time.time() - startTime
+
+    print("%d joints, old: %d cmds calls in %.3fs" % (joints, counter.count, oldSeconds))
+    print("%d joints, batch: 0 cmds calls, %d operations in %d doIt in %.3fs" % (joints, batch.commandCount,
+                                                                                batch.doItCount, batchSeconds))
+    return counter.count, batch.doItCount
+
+
+if __name__ == "__main__":
+    import maya.standalone
+
+    maya.standalone.initialize()
+    benchmarkCommandCount(int(sys.argv[1]) if len(sys.argv) > 1 else 250)
@@ -0,0 +1,678 @@
+import fnmatch
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import types
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+""" Batch export queue for FBXAnimationExporter
+
+    move to maya scripts folder, next to FBXAnimationExporter.py
+
+    Every character of the current scene becomes a job. Jobs are handed to a pool of
+    headless mayapy processes, each one opens the scene once and exports all the
+    export nodes of its character.
+
+    A scene job (createSceneJob) lets the worker find the characters and export nodes itself,
+    it reports them in a plan line before exporting, see FBXFarmExport for the command line.
+
+    load the script:
+    import FBXBatchExport
+    reload(FBXBatchExport)
+    FBXBatchExport.exportSceneInBackground(workers=4)
+
+    check the scheduler and the worker outside of Maya, with a stub maya.cmds:
+    python FBXBatchExport.py --check
+    """
+
+WORKER_TAG = "FBXBATCH:"
+
+# seconds to wait for the output of a killed worker, and between two checks of the interrupt
+KILL_TIMEOUT = 10.0
+POLL_TIMEOUT = 1.0
+
+
+#############################
+#
+#    Job procs
+#
+#############################
+
+def buildExportJobs(characterName="", force=False):
+    """ Build the job list for the current scene
+
+        Procedure: get the namespaces of all the references (or use the given one)
+            find the origin of each namespace with returnOrigin
+            collect the export nodes connected to it with returnFBXExportNodes
+            keep only the nodes with the export flag on, one job per character
+            force re-exports the clips the export manifest considers up to date
+
+        Presumption: scene is saved to disk, single-layered referencing
+    """
+    import maya.cmds as cmds
+    import FBXAnimationExporter as FBX
+
+    sceneFile = cmds.file(query=True, sceneName=True)
+    workspace = cmds.workspace(query=True, rootDirectory=True)
+
+    characters = []
+
+    if characterName:
+        characters.append(characterName)
+    else:
+        for curRef in cmds.file(query=True, reference=True):
+            if not cmds.file(curRef, query=True, deferReference=True):
+                characters.append(cmds.file(curRef, query=True, namespace=True))
+
+    jobs = []
+
+    for curCharacter in characters:
+        origin = FBX.returnOrigin(curCharacter)
+        if origin == "Error":
+            continue
+
+        exportNodes = []
+        for curExportNode in FBX.returnFBXExportNodes(origin) or []:
+            if cmds.getAttr(curExportNode + ".export"):
+                exportNodes.append(curExportNode)
+
+        if exportNodes:
+            jobs.append(createExportJob(sceneFile, workspace, curCharacter, exportNodes, force))
+
+    return jobs
+
+
+def createExportJob(sceneFile, workspace, namespace, exportNodes, force=False):
+    """ Return a job dictionary, the unit of work of a worker process """
+    return {"scene": sceneFile,
+            "workspace": workspace,
+            "namespace": namespace,
+            "exportNodes": list(exportNodes),
+            "force": force}
+
+
+def createSceneJob(sceneFile, workspace, namespaces=None, nodeFilters=None, force=False):
+    """ Return a job exporting the clips of a scene the worker finds itself
+
+        Procedure: namespaces and nodeFilters are fnmatch patterns, empty means all,
+            exportNodes stays None until the worker reports its plan
+    """
+    return {"scene": sceneFile,
+            "workspace": workspace,
+            "namespace": "",
+            "namespaces": list(namespaces or []),
+            "nodeFilters": list(nodeFilters or []),
+            "exportNodes": None,
+            "force": force}
+
+
+def matchesAny(name, patterns):
+    """ Return True if the name matches one of the fnmatch patterns, or there are none """
+    return not patterns or any(fnmatch.fnmatchcase(name, curPattern) for curPattern in patterns)
+
+
+def countClips(jobs):
+    """ Return the number of export nodes in the given jobs, scene jobs count once planned """
+    return sum([len(curJob["exportNodes"] or []) for curJob in jobs])
+
+
+#############################
+#
+#    Progress procs
+#
+#############################
+
+class ExportProgress(object):
+    """ Keep track of the finished clips and estimate the remaining time
+
+        The ETA uses the throughput seen so far (clips per second over the whole pool),
+        so it already takes into account how many workers run at the same time.
+    """
+
+    def __init__(self, totalClips):
+        self.totalClips = totalClips
+        self.doneClips = 0
+        self.failedClips = 0
+        self.startTime = time.time()
+
+    def clipFinished(self, status):
+        self.doneClips += 1
+        if status == "failed":
+            self.failedClips += 1
+
+    def elapsed(self):
+        return time.time() - self.startTime
+
+    def eta(self):
+        """ Return the estimated remaining seconds, None until a clip has finished """
+        if not self.doneClips:
+            return None
+        return self.elapsed() / self.doneClips * (self.totalClips - self.doneClips)
+
+    def report(self):
+        eta = self.eta()
+        etaStr = "--:--" if eta is None else formatSeconds(eta)
+        return "%d/%d clips, %d failed, elapsed %s, ETA %s" % (self.doneClips, self.totalClips, self.failedClips,
+                                                               formatSeconds(self.elapsed()), etaStr)
+
+
+def formatSeconds(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return "%d:%02d:%02d" % (hours, minutes, seconds)
+    return "%02d:%02d" % (minutes, seconds)
+
+
+def printReporter(progress, message):
+    print("FBX Batch Export: " + progress.report() + " | " + message)
+
+
+#############################
+#
+#    Scheduler
+#
+#############################
+
+def findMayapy():
+    """ Return the path of the mayapy executable of the running Maya
+
+        Procedure: use MAYA_LOCATION if it is set, else look next to the running executable
+    """
+    exe = "mayapy.exe" if sys.platform.startswith("win") else "mayapy"
+    mayaLocation = os.environ.get("MAYA_LOCATION")
+
+    if mayaLocation:
+        return os.path.join(mayaLocation, "bin", exe)
+    return os.path.join(os.path.dirname(sys.executable), exe)
+
+
+def launchMayapyWorker(jobFile, mayapy=None):
+    """ Start a headless worker process for the given job file
+
+        Procedure: run this module with --worker under mayapy,
+            add this folder to the python and mel paths so the exporter is found
+    """
+    scriptDir = os.path.dirname(os.path.abspath(__file__))
+
+    env = dict(os.environ)
+    for curVar in ("PYTHONPATH", "MAYA_SCRIPT_PATH"):
+        env[curVar] = os.pathsep.join([scriptDir] + [p for p in [env.get(curVar)] if p])
+
+    command = [mayapy or findMayapy(), os.path.join(scriptDir, "FBXBatchExport.py"), "--worker", jobFile]
+    return subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, env=env,
+                            universal_newlines=True)
+
+
+class ExportQueue(object):
+    """ Run export jobs on a pool of worker processes
+
+        Procedure: keep up to `workers` processes running, one per job,
+            read the result lines they print and update the progress,
+            start the next job as soon as a process exits
+
+        Presumption: launcher(jobFile) returns a Popen-like object with a text stdout
+    """
+
+    def __init__(self, jobs, workers=2, launcher=None, reporter=printReporter):
+        self.jobs = list(jobs)
+        self.workers = max(1, workers)
+        self.launcher = launcher or launchMayapyWorker
+        self.reporter = reporter
+        self.progress = ExportProgress(countClips(self.jobs))
+        self.results = []
+        self.cancelled = False
+        self._messages = queue.Queue()
+
+    def cancel(self):
+        self.cancelled = True
+
+    def _readOutput(self, index, process):
+        for line in iter(process.stdout.readline, ""):
+            self._messages.put((index, line))
+        process.stdout.close()
+        self._messages.put((index, None))
+
+    def _startJob(self, index, tempDir):
+        jobFile = os.path.join(tempDir, "job%04d.json" % index)
+        with open(jobFile, "w") as f:
+            json.dump(self.jobs[index], f)
+
+        process = self.launcher(jobFile)
+        reader = threading.Thread(target=self._readOutput, args=(index, process))
+        reader.daemon = True
+        reader.start()
+        return process
+
+    def _handleLine(self, index, line, reported):
+        if not line.startswith(WORKER_TAG):
+            return
+
+        result = json.loads(line[len(WORKER_TAG):])
+        job = self.jobs[index]
+
+        if "plan" in result:
+            # a scene job found its clips, they count from now on
+            job["plan"] = [tuple(curClip) for curClip in result["plan"]]
+            self.progress.totalClips += len(job["plan"])
+            return
+
+        result.setdefault("namespace", job["namespace"])
+        result["scene"] = job["scene"]
+        self.results.append(result)
+        reported.add((result["namespace"], result["exportNode"]))
+
+        self.progress.clipFinished(result["status"])
+        if self.reporter:
+            self.reporter(self.progress, "%s %s (%.2fs)" % (result["exportNode"], result["status"], result["time"]))
+
+    def jobClips(self, index):
+        """ Return the (namespace, export node) of a job, None for a scene job that has no plan yet """
+        job = self.jobs[index]
+        if job["exportNodes"] is not None:
+            return [(job["namespace"], curExportNode) for curExportNode in job["exportNodes"]]
+        return job.get("plan")
+
+    def _recordCancelled(self, index, reported=()):
+        """ Record every clip of a job that was not reported as cancelled """
+        for curNamespace, curExportNode in self.jobClips(index) or [("", "")]:
+            if (curNamespace, curExportNode) not in reported:
+                self.results.append({"namespace": curNamespace, "exportNode": curExportNode,
+                                     "scene": self.jobs[index]["scene"], "status": "cancelled", "time": 0.0,
+                                     "error": ""})
+
+    def _handleExit(self, index, process, reported):
+        """ Record a failure for every clip a crashed worker did not report, cancelled if it was killed """
+        returnCode = process.wait()
+        if self.cancelled:
+            self._recordCancelled(index, reported)
+            return
+
+        error = "worker exited with code %s" % returnCode
+        clips = self.jobClips(index)
+
+        if clips is None:
+            # the worker died before finding the clips of its scene
+            clips = [("", "")]
+            self.progress.totalClips += 1
+
+        for curNamespace, curExportNode in clips:
+            if (curNamespace, curExportNode) not in reported:
+                self.results.append({"namespace": curNamespace, "exportNode": curExportNode,
+                                     "scene": self.jobs[index]["scene"], "status": "failed", "time": 0.0,
+                                     "error": error})
+                self.progress.clipFinished("failed")
+                if self.reporter:
+                    self.reporter(self.progress, (curExportNode or self.jobs[index]["scene"]) + " failed (worker exited)")
+
+    def run(self):
+        """ Run all the jobs and return the list of per clip results
+
+            On KeyboardInterrupt the workers are killed, the clips they and the pending jobs
+            did not report are recorded as cancelled in results, then the interrupt is raised again
+        """
+        tempDir = tempfile.mkdtemp(prefix="FBXBatchExport")
+        pending = list(range(len(self.jobs)))
+        running = {}
+        reported = {}
+
+        try:
+            self._runPool(pending, running, reported, tempDir)
+        finally:
+            shutil.rmtree(tempDir, ignore_errors=True)
+
+        return self.results
+
+    def _killWorkers(self, pending, running, reported):
+        """ Cancel the pending jobs, kill the running workers and wait for their output to end """
+        for index in pending:
+            self._recordCancelled(index)
+        del pending[:]
+
+        for curProcess in running.values():
+            if curProcess.poll() is None:
+                curProcess.kill()
+
+        # the lines printed before the kill still count, the exits record the rest as cancelled
+        while running:
+            try:
+                index, line = self._messages.get(timeout=KILL_TIMEOUT)
+            except queue.Empty:
+                break
+            if line is None:
+                self._handleExit(index, running.pop(index), reported[index])
+            else:
+                self._handleLine(index, line, reported[index])
+
+        for index in list(running):
+            running.pop(index).wait()
+            self._recordCancelled(index, reported[index])
+
+    def _runPool(self, pending, running, reported, tempDir):
+        try:
+            while pending or running:
+                while pending and len(running) < self.workers and not self.cancelled:
+                    index = pending.pop(0)
+                    reported[index] = set()
+                    running[index] = self._startJob(index, tempDir)
+
+                if self.cancelled:
+                    self._killWorkers(pending, running, reported)
+                    break
+
+                # a blocking get without timeout does not see Ctrl+C on python 2
+                try:
+                    index, line = self._messages.get(timeout=POLL_TIMEOUT)
+                except queue.Empty:
+                    continue
+                if line is None:
+                    self._handleExit(index, running.pop(index), reported[index])
+                else:
+                    self._handleLine(index, line, reported[index])
+
+        except KeyboardInterrupt:
+            self.cancelled = True
+            self._killWorkers(pending, running, reported)
+            raise
+
+
+#############################
+#
+#    Worker procs
+#
+#############################
+
+def emitLine(data):
+    sys.stdout.write(WORKER_TAG + json.dumps(data) + "\n")
+    sys.stdout.flush()
+
+
+def emitResult(exportNode, status, seconds, error="", **fields):
+    """ Report one clip, fields adds the namespace, the exported file and its size """
+    fields.update({"exportNode": exportNode, "status": status, "time": seconds, "error": error})
+    emitLine(fields)
+
+
+def findSceneClips(namespaces=None, nodeFilters=None):
+    """ Return [(namespace, [export nodes])] of the open scene matching the fnmatch patterns """
+    clips = []
+    for curJob in buildExportJobs():
+        if not matchesAny(curJob["namespace"], namespaces):
+            continue
+        exportNodes = [curNode for curNode in curJob["exportNodes"] if matchesAny(curNode, nodeFilters)]
+        if exportNodes:
+            clips.append((curJob["namespace"], exportNodes))
+    return clips
+
+
+def exportClip(namespace, exportNode, workspace, force, rigCache):
+    """ Export one clip and report it with the file written and its size """
+    import FBXAnimationExporter as FBX
+
+    startTime = time.time()
+    try:
+        report = FBX.exportFBXAnimation(namespace, exportNode, force=force, rigCache=rigCache)
+    except Exception as e:
+        emitResult(exportNode, "failed", time.time() - startTime, str(e), namespace=namespace)
+        return
+
+    seconds = time.time() - startTime
+    exported = report.rebuilt or report.skipped
+    if not exported:
+        emitResult(exportNode, "failed", seconds, "no file exported, check the export name", namespace=namespace)
+        return
+
+    fileName = exported[0][1]
+    path = os.path.join(workspace, fileName)
+    emitResult(exportNode, "skipped" if report.skipped else "ok", seconds, namespace=namespace, file=fileName,
+               size=os.path.getsize(path) if os.path.isfile(path) else 0)
+
+
+def runJob(job):
+    """ Export all the clips of one job in the already initialized Maya session
+
+        Procedure: open the scene once, set the workspace so the export paths resolve
+            run the animation export for each export node and report the result,
+            the export skeleton is built once and shared by all the clips.
+            A scene job first finds its clips and reports them as the plan
+    """
+    import maya.cmds as cmds
+
+    if not cmds.pluginInfo("fbxmaya", query=True, loaded=True):
+        cmds.loadPlugin("fbxmaya")
+
+    cmds.file(job["scene"], open=True, force=True)
+    cmds.workspace(job["workspace"], openWorkspace=True)
+
+    import FBXCurveBake
+    import FBXExportRig
+
+    if job["exportNodes"] is None:
+        clips = findSceneClips(job.get("namespaces"), job.get("nodeFilters"))
+        emitLine({"plan": [[curNamespace, curNode] for curNamespace, exportNodes in clips for curNode in exportNodes]})
+    else:
+        clips = [(job["namespace"], job["exportNodes"])]
+
+    rigCache = FBXExportRig.ExportRigCache() if FBXCurveBake.isAvailable() else False
+    workspace = cmds.workspace(query=True, rootDirectory=True)
+
+    for curNamespace, exportNodes in clips:
+        for curExportNode in exportNodes:
+            exportClip(curNamespace, curExportNode, workspace, job.get("force", False), rigCache)
+
+    if rigCache:
+        rigCache.release()
+
+
+def runWorker(jobFile):
+    """ Entry point of a worker process """
+    import maya.standalone
+    maya.standalone.initialize(name="python")
+
+    with open(jobFile) as f:
+        job = json.load(f)
+
+    try:
+        runJob(job)
+    finally:
+        maya.standalone.uninitialize()
+
+
+#############################
+#
+#    Maya session procs
+#
+#############################
+
+def exportSceneInBackground(workers=2, characterName="", force=False):
+    """ Export every clip of the current scene with a pool of headless workers
+
+        Procedure: build the jobs from the saved scene and run the queue,
+            showing the progress in a progress window that can cancel the export
+
+        Presumption: the scene has been saved, workers read it from disk
+    """
+    import maya.cmds as cmds
+
+    if cmds.file(query=True, modified=True):
+        cmds.warning("Save the scene before a batch export, the workers read it from disk\n")
+        return []
+
+    jobs = buildExportJobs(characterName, force)
+    exportQueue = ExportQueue(jobs, workers)
+    totalClips = exportQueue.progress.totalClips
+
+    cmds.progressWindow(title="FBX Batch Export", progress=0, maxValue=max(1, totalClips), isInterruptable=True,
+                        status=exportQueue.progress.report())
+
+    def reporter(progress, message):
+        printReporter(progress, message)
+        cmds.progressWindow(edit=True, progress=progress.doneClips, status=progress.report())
+        if cmds.progressWindow(query=True, isCancelled=True):
+            exportQueue.cancel()
+
+    exportQueue.reporter = reporter
+
+    try:
+        results = exportQueue.run()
+    finally:
+        cmds.progressWindow(endProgress=True)
+
+    return results
+
+
+#############################
+#
+#    Scheduler check
+#
+#############################
+
+class StubCmds(types.ModuleType):
+    """ maya.cmds for the check: records the commands, answers the queries runJob makes """
+
+    def __init__(self, workspace, callsFile):
+        types.ModuleType.__init__(self, "maya.cmds")
+        self.workspaceDir = workspace
+        self.callsFile = callsFile
+        self.calls = []
+
+    def saveCalls(self):
+        with open(self.callsFile, "w") as f:
+            json.dump(self.calls, f)
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+
+        def command(*args, **kwargs):
+            self.calls.append(name)
+            if name == "workspace" and kwargs.get("query"):
+                return self.workspaceDir
+            if name == "pluginInfo":
+                return False
+            return None
+        return command
+
+
+class StubExportReport(object):
+
+    def __init__(self):
+        self.skipped = []
+        self.rebuilt = []
+
+
+def stubExportFBXAnimation(namespace, exportNode, force=False, rigCache=None):
+    """ Export a clip the way the check expects: "fail" in the name raises, "crash" kills the worker """
+    if "crash" in exportNode:
+        sys.modules["maya.cmds"].saveCalls()
+        os._exit(3)
+    if "fail" in exportNode:
+        raise RuntimeError("stub export of " + exportNode + " failed")
+
+    time.sleep(0.05)
+    report = StubExportReport()
+    fileName = namespace + "_" + exportNode + ".fbx"
+    with open(os.path.join(sys.modules["maya.cmds"].workspaceDir, fileName), "w") as f:
+        f.write(exportNode)
+    report.rebuilt.append((exportNode, fileName))
+    return report
+
+
+def runStubWorker(jobFile):
+    """ Run a job with runJob in a process where maya.cmds and the exporter are stubs
+
+        Procedure: the commands runJob called are written to the job "callsFile"
+    """
+    with open(jobFile) as f:
+        job = json.load(f)
+
+    cmds = StubCmds(job["workspace"], job["callsFile"])
+    maya = types.ModuleType("maya")
+    maya.cmds = cmds
+    sys.modules.update({"maya": maya, "maya.cmds": cmds})
+
+    exporter = types.ModuleType("FBXAnimationExporter")
+    exporter.exportFBXAnimation = stubExportFBXAnimation
+    curveBake = types.ModuleType("FBXCurveBake")
+    curveBake.isAvailable = lambda: False
+    sys.modules.update({"FBXAnimationExporter": exporter, "FBXCurveBake": curveBake,
+                        "FBXExportRig": types.ModuleType("FBXExportRig")})
+
+    try:
+        runJob(job)
+    finally:
+        cmds.saveCalls()
+
+
+def launchStubWorker(jobFile):
+    return subprocess.Popen([sys.executable, os.path.abspath(__file__), "--stub-worker", jobFile],
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
+
+
+def checkScheduler(jobCount=6, clips=3, workers=3):
+    """ Run the queue on stub workers and check the results, return True if they are right
+
+        Procedure: jobCount character jobs of clips clips each, one clip of the second job
+            raises, the third job crashes on its second clip. Checks every clip is reported
+            once with the right status and file size, runJob opened the scene and loaded fbxmaya
+            once per job, and the workers ran at the same time
+    """
+    tempDir = tempfile.mkdtemp(prefix="FBXBatchExportCheck")
+    jobs = []
+
+    for i in range(jobCount):
+        exportNodes = ["clip%d" % j for j in range(clips)]
+        if i == 1:
+            exportNodes[0] = "fail_clip"
+        if i == 2:
+            exportNodes[1] = "crash_clip"
+        job = createExportJob(os.path.join(tempDir, "scene.mb"), tempDir + "/", "char%d" % i, exportNodes)
+        job["callsFile"] = os.path.join(tempDir, "calls%d.json" % i)
+        jobs.append(job)
+
+    startTime = time.time()
+    results = ExportQueue(jobs, workers, launchStubWorker, reporter=None).run()
+    seconds = time.time() - startTime
+
+    statuses = dict((curStatus, [curResult["status"] for curResult in results].count(curStatus))
+                    for curStatus in ("ok", "failed"))
+    reportedClips = sorted((curResult["namespace"], curResult["exportNode"]) for curResult in results)
+    expectedClips = sorted((curJob["namespace"], curNode) for curJob in jobs for curNode in curJob["exportNodes"])
+    calls = []
+    for curJob in jobs:
+        with open(curJob["callsFile"]) as f:
+            calls.append(json.load(f))
+    serialSeconds = 0.05 * statuses["ok"]
+
+    # the crashed job loses its second and third clips
+    expected = {"ok": jobCount * clips - 3, "failed": 3}
+    checks = [("statuses %s" % statuses, statuses == expected),
+              ("every clip reported once", reportedClips == expectedClips),
+              ("sizes reported", all(curResult.get("size") for curResult in results if curResult["status"] == "ok")),
+              ("scene opened once per job", all(curCalls.count("file") == 1 for curCalls in calls)),
+              ("fbxmaya loaded once per job", all(curCalls.count("loadPlugin") == 1 for curCalls in calls)),
+              ("%.2fs for %.2fs of clips on %d workers" % (seconds, serialSeconds, workers), seconds < serialSeconds)]
+
+    shutil.rmtree(tempDir, ignore_errors=True)
+
+    for curName, curPassed in checks:
+        print("%s %s" % ("ok    " if curPassed else "FAILED", curName))
+    return all(curPassed for curName, curPassed in checks)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--worker":
+        runWorker(sys.argv[2])
+    elif len(sys.argv) == 3 and sys.argv[1] == "--stub-worker":
+        runStubWorker(sys.argv[2])
+    elif sys.argv[1:] == ["--check"]:
+        sys.exit(0 if checkScheduler() else 1)
@@ -0,0 +1,310 @@
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+""" Curve baking engine for FBXAnimationExporter
+
+    move to maya scripts folder, next to FBXAnimationExporter.py
+
+    Replaces bakeResults plus an animLayer when moving the export skeleton to the origin.
+    The world matrix of the origin is sampled once per frame through a DG context, the
+    root motion is computed for the whole range at once with numpy and the result is written
+    back with one MFnAnimCurve.addKeys per channel.
+
+    The math below only needs numpy, the Maya side is imported when it is used, so the core
+    can be tested against synthetic matrices outside of Maya.
+
+    check the bake of a skeleton connected at compound level, in a new scene:
+    mayapy FBXCurveBake.py
+    """
+
+# rotate order index (as the rotateOrder attribute) -> axis applied first, second, third
+ROTATE_ORDERS = [(0, 1, 2), (1, 2, 0), (2, 0, 1), (0, 2, 1), (1, 0, 2), (2, 1, 0)]
+
+CHANNELS = ["translateX", "translateY", "translateZ", "rotateX", "rotateY", "rotateZ", "scaleX", "scaleY", "scaleZ"]
+
+
+def isAvailable():
+    """ Return True if the engine can be used, it needs numpy """
+    return numpy is not None
+
+
+#############################
+#
+#    Matrix math
+#
+#############################
+
+def rotationMatrices(angles, rotateOrder=0):
+    """ Return the (N, 3, 3) row-vector rotation matrices of (N, 3) euler angles in radians
+
+        Procedure: build one matrix per axis and multiply them in the rotate order,
+            first axis on the left as Maya does for row vectors
+    """
+    angles = numpy.asarray(angles, dtype=numpy.float64)
+    result = numpy.tile(numpy.eye(3), (len(angles), 1, 1))
+
+    for axis in ROTATE_ORDERS[rotateOrder]:
+        c = numpy.cos(angles[:, axis])
+        s = numpy.sin(angles[:, axis])
+        a, b = [i for i in range(3) if i != axis]
+        axisMatrix = numpy.tile(numpy.eye(3), (len(angles), 1, 1))
+        axisMatrix[:, a, a] = c
+        axisMatrix[:, a, b] = s if (b - a) % 3 == 1 else -s
+        axisMatrix[:, b, a] = -axisMatrix[:, a, b]
+        axisMatrix[:, b, b] = c
+        result = numpy.matmul(result, axisMatrix)
+
+    return result
+
+
+def eulerFromRotationMatrices(rotations, rotateOrder=0):
+    """ Return the (N, 3) euler angles in radians of (N, 3, 3) row-vector rotation matrices
+
+        Procedure: transpose to column vectors, where the matrix is R3 * R2 * R1,
+            read the angles with the general euler formulas for the axis permutation,
+            unwrap every axis over time so the curves have no 360 degrees flips
+
+        Presumption: rotations are orthonormal
+    """
+    i, j, k = ROTATE_ORDERS[rotateOrder]
+    parity = 1.0 if (j - i) % 3 == 1 else -1.0
+    columns = numpy.transpose(rotations, (0, 2, 1))
+
+    angles = numpy.zeros((len(rotations), 3))
+    sinMiddle = numpy.clip(-parity * columns[:, k, i], -1.0, 1.0)
+    angles[:, j] = numpy.arcsin(sinMiddle)
+    angles[:, i] = numpy.arctan2(parity * columns[:, k, j], columns[:, k, k])
+    angles[:, k] = numpy.arctan2(parity * columns[:, j, i], columns[:, i, i])
+
+    # gimbal lock: the first and last axis turn around the same line, put it all on the first one
+    locked = numpy.abs(sinMiddle) > 1.0 - 1e-9
+    if numpy.any(locked):
+        angles[locked, k] = 0.0
+        middle = numpy.zeros((numpy.count_nonzero(locked), 3))
+        middle[:, j] = angles[locked, j]
+        first = numpy.matmul(rotationMatrices(middle), columns[locked])
+        a, b = (i + 1) % 3, (i + 2) % 3
+        angles[locked, i] = numpy.arctan2(first[:, b, a], first[:, a, a])
+
+    return numpy.unwrap(angles, axis=0)
+
+
+def decomposeMatrices(matrices, rotateOrder=0, jointOrient=None, rotateAxis=None):
+    """ Split (N, 4, 4) row-vector matrices into translate, rotate (radians) and scale channels
+
+        Procedure: translation is the last row, scale the length of the first three rows,
+            the normalized rows are the rotation. For joints the orient and rotate axis
+            rotations are taken out so the result matches the rotate attribute
+
+        Presumption: no shear, joint orient and rotate axis are (3, 3) row-vector rotations
+    """
+    matrices = numpy.asarray(matrices, dtype=numpy.float64)
+    upper = matrices[:, :3, :3]
+
+    translate = matrices[:, 3, :3].copy()
+    scale = numpy.linalg.norm(upper, axis=2)
+
+    negative = numpy.linalg.det(upper) < 0.0
+    scale[negative, 0] *= -1.0
+
+    rotations = upper / scale[:, :, numpy.newaxis]
+
+    if rotateAxis is not None:
+        rotations = numpy.matmul(numpy.transpose(rotateAxis), rotations)
+    if jointOrient is not None:
+        rotations = numpy.matmul(rotations, numpy.transpose(jointOrient))
+
+    return translate, eulerFromRotationMatrices(rotations, rotateOrder), scale
+
+
+def rootMotion(translate, rotate, zeroOrigin):
+    """ Return the translate and rotate channels of the origin once it is moved to the world origin
+
+        Procedure: zeroOrigin kills the origin animation (every frame at zero),
+            otherwise the animation is shifted so the first frame sits at the origin,
+            the same result the override / additive animLayer used to give
+    """
+    if zeroOrigin:
+        return numpy.zeros_like(translate), numpy.zeros_like(rotate)
+    return translate - translate[0], rotate - rotate[0]
+
+
+def bakeChannels(matrices, zeroOrigin, rotateOrder=0, jointOrient=None, rotateAxis=None):
+    """ Return the (9, N) channel values, in CHANNELS order, of the origin moved to the world origin """
+    translate, rotate, scale = decomposeMatrices(matrices, rotateOrder, jointOrient, rotateAxis)
+    translate, rotate = rootMotion(translate, rotate, zeroOrigin)
+    return numpy.concatenate([translate, rotate, scale], axis=1).T
+
+
+#############################
+#
+#    Maya side
+#
+#############################
+
+def frameRange(startFrame, endFrame):
+    """ Return every whole frame of the range, like bakeResults with the default sampling """
+    return numpy.arange(startFrame, endFrame + 0.5, 1.0)
+
+
+def _mmatrixToArray(matrix):
+    return [[matrix(row, column) for column in range(4)] for row in range(4)]
+
+
+def sampleWorldMatrices(node, frames):
+    """ Return the (N, 4, 4) world matrices of the node at the given frames
+
+        Procedure: evaluate worldMatrix[0] through a DG context per frame,
+            the current time of the scene is never changed
+    """
+    import maya.OpenMaya as OpenMaya
+
+    selection = OpenMaya.MSelectionList()
+    selection.add(node)
+    nodeObj = OpenMaya.MObject()
+    selection.getDependNode(0, nodeObj)
+
+    plug = OpenMaya.MFnDependencyNode(nodeObj).findPlug("worldMatrix").elementByLogicalIndex(0)
+    unit = OpenMaya.MTime.uiUnit()
+
+    matrices = []
+    for curFrame in frames:
+        context = OpenMaya.MDGContext(OpenMaya.MTime(float(curFrame), unit))
+        matrices.append(_mmatrixToArray(OpenMaya.MFnMatrixData(plug.asMObject(context)).matrix()))
+
+    return numpy.array(matrices)
+
+
+def _staticRotation(node, attr, rotateOrder=0):
+    import maya.cmds as cmds
+
+    if not cmds.attributeQuery(attr, node=node, exists=True):
+        return None
+    return rotationMatrices(numpy.radians([cmds.getAttr(node + "." + attr)[0]]), rotateOrder)[0]
+
+
+def writeCurves(node, frames, channels):
+    """ Replace whatever drives the channels of the node with animation curves
+
+        Procedure: break the incoming connections of every channel, and of its translate,
+            rotate or scale compound (the export skeleton is connected at that level), with
+            one modifier, create one curve per channel and add all the keys at once,
+            a channel with a single value only gets one key
+    """
+    import maya.OpenMaya as OpenMaya
+    import maya.OpenMayaAnim as OpenMayaAnim
+
+    selection = OpenMaya.MSelectionList()
+    selection.add(node)
+    nodeObj = OpenMaya.MObject()
+    selection.getDependNode(0, nodeObj)
+    nodeFn = OpenMaya.MFnDependencyNode(nodeObj)
+
+    plugs = [nodeFn.findPlug(curChannel) for curChannel in CHANNELS]
+
+    drivenPlugs = list(plugs)
+    for curPlug in plugs:
+        if curPlug.isChild():
+            parentPlug = curPlug.parent()
+            if all(parentPlug != curDriven for curDriven in drivenPlugs):
+                drivenPlugs.append(parentPlug)
+
+    disconnectModifier = OpenMaya.MDGModifier()
+    for curPlug in drivenPlugs:
+        curPlug.setLocked(False)
+        sources = OpenMaya.MPlugArray()
+        curPlug.connectedTo(sources, True, False)
+        for i in range(sources.length()):
+            disconnectModifier.disconnect(sources[i], curPlug)
+    disconnectModifier.doIt()
+
+    unit = OpenMaya.MTime.uiUnit()
+    allTimes = OpenMaya.MTimeArray()
+    for curFrame in frames:
+        allTimes.append(OpenMaya.MTime(float(curFrame), unit))
+
+    curveTypes = [OpenMayaAnim.MFnAnimCurve.kAnimCurveTL] * 3 + \
+                 [OpenMayaAnim.MFnAnimCurve.kAnimCurveTA] * 3 + \
+                 [OpenMayaAnim.MFnAnimCurve.kAnimCurveTU] * 3
+
+    for curPlug, curType, curValues in zip(plugs, curveTypes, channels):
+        curveFn = OpenMayaAnim.MFnAnimCurve()
+        curveFn.create(curPlug, curType)
+
+        if numpy.all(curValues == curValues[0]):
+            curveFn.addKey(allTimes[0], float(curValues[0]))
+        else:
+            values = OpenMaya.MDoubleArray()
+            for curValue in curValues.tolist():
+                values.append(curValue)
+            curveFn.addKeys(allTimes, values)
+
+
+def bakeToOrigin(node, startFrame, endFrame, zeroOrigin):
+    """ Bake the node moved to the world origin over the frame range, see rootMotion
+
+        Presumption: node is a root (its world matrix is its local matrix)
+    """
+    import maya.cmds as cmds
+
+    rotateOrder = cmds.getAttr(node + ".rotateOrder")
+    frames = frameRange(startFrame, endFrame)
+
+    matrices = sampleWorldMatrices(node, frames)
+    channels = bakeChannels(matrices, zeroOrigin, rotateOrder,
+                            _staticRotation(node, "jointOrient"), _staticRotation(node, "rotateAxis"))
+
+    writeCurves(node, frames, channels)
+
+
+def checkCompoundBake():
+    """ Bake a joint driven at compound level like the export skeleton, return True if it is right
+
+        Procedure: in a new scene a keyed source joint drives a target joint through its
+            translate, rotate and scale compounds, the target is baked to the origin.
+            Checks that the compounds have no input left, every channel is an animation
+            curve and the curves hold the source motion shifted to the origin
+
+        Presumption: run inside Maya or with mayapy FBXCurveBake.py, the scene is replaced
+    """
+    import maya.cmds as cmds
+
+    cmds.file(new=True, force=True)
+    cmds.select(clear=True)
+    source = cmds.joint(name="bakeCheck_source", position=(2.0, 0.0, 3.0))
+    cmds.select(clear=True)
+    target = cmds.joint(name="bakeCheck_target")
+
+    cmds.setKeyframe(source, attribute="translateX", time=1, value=2.0)
+    cmds.setKeyframe(source, attribute="translateX", time=10, value=11.0)
+    cmds.setKeyframe(source, attribute="rotateY", time=1, value=0.0)
+    cmds.setKeyframe(source, attribute="rotateY", time=10, value=90.0)
+    for curAttr in ["translate", "rotate", "scale"]:
+        cmds.connectAttr(source + "." + curAttr, target + "." + curAttr)
+
+    bakeToOrigin(target, 1, 10, False)
+
+    def curveDriven(channel):
+        driver = cmds.connectionInfo(target + "." + channel, sourceFromDestination=True)
+        return bool(driver) and cmds.nodeType(driver.split(".")[0]).startswith("animCurve")
+
+    checks = [("compounds disconnected", not any(cmds.connectionInfo(target + "." + curAttr, sourceFromDestination=True)
+                                                 for curAttr in ["translate", "rotate", "scale"])),
+              ("every channel on a curve", all(curveDriven(curChannel) for curChannel in CHANNELS)),
+              ("translateX shifted to the origin", abs(cmds.getAttr(target + ".translateX", time=10) - 9.0) < 1e-6),
+              ("translateZ shifted to the origin", abs(cmds.getAttr(target + ".translateZ", time=10)) < 1e-6),
+              ("rotateY kept", abs(cmds.getAttr(target + ".rotateY", time=10) - 90.0) < 1e-6)]
+
+    for curName, curPassed in checks:
+        print("%s %s" % ("ok    " if curPassed else "FAILED", curName))
+    return all(curPassed for curName, curPassed in checks)
+
+
+if __name__ == "__main__":
+    import sys
+    import maya.standalone
+
+    maya.standalone.initialize()
+    sys.exit(0 if checkCompoundBake() else 1)
@@ -0,0 +1,243 @@
+import errno
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+import maya.cmds as cmds
+
+""" Incremental export support for FBXAnimationExporter
+
+    move to maya scripts folder, next to FBXAnimationExporter.py
+
+    Every export node gets a fingerprint of everything that ends up in its FBX file.
+    The fingerprints of the last export are kept in a sidecar manifest in the workspace
+    root, next to the exported files. When the fingerprint and the exported file did not
+    change since then, the export node is skipped.
+
+    Batch and farm workers export from the same workspace at the same time, a save takes a
+    lock file, merges the entries this process recorded into the manifest on disk and
+    replaces it through a temporary file, so no update is lost and no reader sees half a file.
+    """
+
+MANIFEST_NAME = "FBXExportManifest.json"
+
+# seconds after which a lock is considered left by a process that died while saving
+LOCK_TIMEOUT = 30.0
+
+EXPORT_NODE_ATTRS = ["exportName", "useSubRange", "startFrame", "endFrame", "moveToOrigin", "zeroOrigin", "animLayers"]
+
+
+
+#############################
+#
+#    Fingerprint procs
+#
+#############################
+
+def hashData(data):
+    """ Return a hex digest of any json serializable data """
+    return hashlib.sha1(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def exportNodeData(exportNode):
+    """ Return the values of the export node attributes that change the exported file """
+    data = {}
+    for curAttr in EXPORT_NODE_ATTRS:
+        if cmds.attributeQuery(curAttr, node=exportNode, exists=True):
+            data[curAttr] = cmds.getAttr(exportNode + "." + curAttr)
+    return data
+
+
+def animationCurveData(nodes, startFrame, endFrame):
+    """ Return the animation curve data that drives the given nodes inside the frame range
+
+        Procedure: list the upstream history of the nodes once and keep the animCurves
+            for each curve, store the keys and tangents inside the range and the evaluated
+            values at both ends, so keys outside the range that change the range are caught
+
+        Presumption: nodes exist
+    """
+    curves = cmds.ls(cmds.listHistory(nodes) or [], type="animCurve") or []
+    timeRange = (startFrame, endFrame)
+
+    data = {}
+    for curCurve in curves:
+        data[curCurve] = [cmds.keyframe(curCurve, query=True, time=timeRange, timeChange=True, valueChange=True),
+                          cmds.keyTangent(curCurve, query=True, time=timeRange, inAngle=True, outAngle=True),
+                          cmds.keyframe(curCurve, query=True, eval=True, time=(startFrame, startFrame)),
+                          cmds.keyframe(curCurve, query=True, eval=True, time=(endFrame, endFrame))]
+    return data
+
+
+def meshData(meshes):
+    """ Return vertex positions of the given meshes, so a model export notices modeling changes """
+    data = {}
+    for curMesh in meshes or []:
+        data[curMesh] = cmds.xform(curMesh + ".vtx[*]", query=True, objectSpace=True, translation=True)
+    return data
+
+
+def skeletonData(origin):
+    """ Return the local matrices of the origin and all the joints below it """
+    joints = (cmds.listRelatives(origin, allDescendents=True, type="joint", fullPath=True) or []) + [origin]
+    return dict([(curJoint, cmds.xform(curJoint, query=True, matrix=True)) for curJoint in joints])
+
+
+def fbxOptionsData(options):
+    """ Return the FBX options of a preset, see FBXOptionPresets.presetOptions """
+    return [list(curOption) for curOption in options]
+
+
+def fingerprintAnimation(exportNode, origin, meshes, startFrame, endFrame, options):
+    """ Return the fingerprint of an animation export
+
+        Procedure: hash the export node settings, the exported meshes, the curves upstream of
+            the skeleton and the meshes in the frame range, and the FBX options
+    """
+    joints = (cmds.listRelatives(origin, allDescendents=True, type="joint") or []) + [origin]
+
+    return hashData({"exportNode": exportNodeData(exportNode),
+                     "range": [startFrame, endFrame],
+                     "meshes": sorted(meshes or []),
+                     "curves": animationCurveData(joints + list(meshes or []), startFrame, endFrame),
+                     "options": fbxOptionsData(options)})
+
+
+def fingerprintCharacter(exportNode, origin, meshes, options):
+    """ Return the fingerprint of a model export: settings, meshes, skeleton and FBX options """
+    return hashData({"exportNode": exportNodeData(exportNode),
+                     "meshes": meshData(meshes),
+                     "skeleton": skeletonData(origin),
+                     "options": fbxOptionsData(options)})
+
+
+#############################
+#
+#    Manifest
+#
+#############################
+
+class ManifestLock(object):
+    """ Lock file next to the manifest, held while a process merges its entries in
+
+        Procedure: the lock is the creation of the file, exclusive on every platform,
+            a lock older than LOCK_TIMEOUT is removed
+    """
+
+    def __init__(self, path):
+        self.path = path + ".lock"
+
+    def __enter__(self):
+        while True:
+            try:
+                os.close(os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return self
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    raise
+
+            try:
+                if time.time() - os.path.getmtime(self.path) > LOCK_TIMEOUT:
+                    os.remove(self.path)
+                    continue
+            except OSError:
+                # released in between
+                continue
+            time.sleep(0.05)
+
+    def __exit__(self, *args):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def writeJsonAtomic(path, data):
+    """ Write the json to a temporary file next to path and rename it over path """
+    handle, tempPath = tempfile.mkstemp(prefix="." + os.path.basename(path), suffix=".tmp",
+                                        dir=os.path.dirname(os.path.abspath(path)))
+    with os.fdopen(handle, "w") as f:
+        json.dump(data, f, indent=4, sort_keys=True)
+
+    try:
+        os.rename(tempPath, path)
+    except OSError:
+        # windows does not rename over an existing file
+        os.remove(path)
+        os.rename(tempPath, path)
+
+
+class ExportManifest(object):
+    """ Fingerprints of the files exported from a workspace
+
+        Procedure: load the manifest from the workspace root if there is one,
+            an entry is up to date when the fingerprint matches and the exported file
+            still has the size and modification time it had right after the export.
+            Save only writes the entries recorded here over the ones on disk, see ManifestLock
+    """
+
+    def __init__(self, workspace):
+        self.path = os.path.join(workspace, MANIFEST_NAME)
+        self.workspace = workspace
+        self.entries = self._load()
+        self.recorded = {}
+
+    def _load(self):
+        if not os.path.isfile(self.path):
+            return {}
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except ValueError:
+            cmds.warning("Ignoring corrupted export manifest " + self.path + "\n")
+            return {}
+
+    def _fileState(self, fileName):
+        path = os.path.join(self.workspace, fileName)
+        if not os.path.isfile(path):
+            return None
+        return [os.path.getsize(path), os.path.getmtime(path)]
+
+    def isUpToDate(self, fileName, fingerprint):
+        entry = self.entries.get(fileName)
+        if not entry or entry["fingerprint"] != fingerprint:
+            return False
+        return entry["file"] == self._fileState(fileName)
+
+    def record(self, fileName, fingerprint, exportNode):
+        self.recorded[fileName] = {"fingerprint": fingerprint,
+                                   "exportNode": exportNode,
+                                   "file": self._fileState(fileName)}
+        self.entries[fileName] = self.recorded[fileName]
+
+    def save(self):
+        """ Merge the recorded entries into the manifest on disk, under the lock """
+        with ManifestLock(self.path):
+            entries = self._load()
+            entries.update(self.recorded)
+            writeJsonAtomic(self.path, entries)
+
+        self.entries = entries
+        self.recorded = {}
+
+
+class ExportReport(object):
+    """ What an export run skipped and what it rebuilt """
+
+    def __init__(self):
+        self.skipped = []
+        self.rebuilt = []
+
+    def skip(self, exportNode, fileName):
+        self.skipped.append((exportNode, fileName))
+
+    def rebuild(self, exportNode, fileName):
+        self.rebuilt.append((exportNode, fileName))
+
+    def summary(self):
+        lines = ["FBX export: %d rebuilt, %d skipped (unchanged)" % (len(self.rebuilt), len(self.skipped))]
+        lines += ["    rebuilt " + node + " -> " + fileName for node, fileName in self.rebuilt]
+        lines += ["    skipped " + node + " -> " + fileName for node, fileName in self.skipped]
+        return "\n".join(lines)
@@ -0,0 +1,175 @@
+import json
+import os
+import time
+
+import maya.cmds as cmds
+import maya.mel as mel
+
+""" Export profiling for FBXAnimationExporter
+
+    move to maya scripts folder, next to FBXAnimationExporter.py
+
+    Records the wall time and the number of maya.cmds calls of every export stage, per
+    character and export node, and writes them as a Chrome trace-event JSON file that can be
+    loaded in chrome://tracing or https://ui.perfetto.dev
+
+    Turn it on with the FBX_EXPORT_PROFILE environment variable set to the trace file path,
+    or from the exporter UI (Edit > Profile Exports). While it is off, stages cost nothing.
+
+    load the script:
+    import FBXExportProfiler
+    FBXExportProfiler.enable("C:/Temp/fbxExportTrace.json")
+    """
+
+ENV_VAR = "FBX_EXPORT_PROFILE"
+
+_profiler = None
+
+
+class _NullStage(object):
+    """ Stage used while profiling is off """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+NULL_STAGE = _NullStage()
+
+
+class _Stage(object):
+    """ One timed block, nested stages show up inside their parent in the trace """
+
+    def __init__(self, profiler, name, args):
+        self.profiler = profiler
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.profiler.depth += 1
+        self.calls = dict(self.profiler.callCounts)
+        self.startTime = time.time()
+        return self
+
+    def __exit__(self, *args):
+        endTime = time.time()
+        profiler = self.profiler
+
+        calls = {}
+        for curCommand, curCount in profiler.callCounts.items():
+            delta = curCount - self.calls.get(curCommand, 0)
+            if delta:
+                calls[curCommand] = delta
+
+        eventArgs = dict(self.args)
+        eventArgs["cmdsCalls"] = sum(calls.values())
+        eventArgs["cmds"] = calls
+
+        profiler.events.append({"name": self.name, "cat": "export", "ph": "X", "pid": os.getpid(), "tid": 0,
+                                "ts": (self.startTime - profiler.startTime) * 1e6,
+                                "dur": (endTime - self.startTime) * 1e6,
+                                "args": eventArgs})
+
+        profiler.depth -= 1
+        if not profiler.depth:
+            profiler.write()
+        return False
+
+
+class ExportProfiler(object):
+    """ Collect the trace events and count the cmds calls
+
+        Procedure: while installed, every function of maya.cmds (and mel.eval) is replaced by a
+            wrapper that counts the calls per command, uninstall puts the originals back.
+            The trace is written every time the outermost stage ends
+    """
+
+    def __init__(self, tracePath):
+        self.tracePath = tracePath
+        self.events = []
+        self.callCounts = {}
+        self.depth = 0
+        self.startTime = time.time()
+        self._originals = {}
+
+    def _wrap(self, module, name, label):
+        original = getattr(module, name)
+        callCounts = self.callCounts
+
+        def wrapper(*args, **kwargs):
+            callCounts[label] = callCounts.get(label, 0) + 1
+            return original(*args, **kwargs)
+
+        self._originals[(module, name)] = original
+        setattr(module, name, wrapper)
+
+    def install(self):
+        for curName in dir(cmds):
+            if not curName.startswith("_") and callable(getattr(cmds, curName)):
+                self._wrap(cmds, curName, curName)
+        self._wrap(mel, "eval", "mel.eval")
+
+    def uninstall(self):
+        for (module, name), original in self._originals.items():
+            setattr(module, name, original)
+        self._originals = {}
+
+    def stage(self, name, args):
+        return _Stage(self, name, args)
+
+    def write(self):
+        with open(self.tracePath, "w") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+
+
+#############################
+#
+#    Module procs
+#
+#############################
+
+def stage(name, **args):
+    """ Return a context manager timing the block under the given name, args go to the trace event """
+    if _profiler is None:
+        return NULL_STAGE
+    return _profiler.stage(name, args)
+
+
+def enable(tracePath):
+    """ Start profiling, the trace is written to tracePath """
+    global _profiler
+
+    disable()
+    _profiler = ExportProfiler(tracePath)
+    _profiler.install()
+
+
+def disable():
+    global _profiler
+
+    if _profiler is not None:
+        _profiler.uninstall()
+        _profiler = None
+
+
+def isEnabled():
+    return _profiler is not None
+
+
+def enableFromEnvironment():
+    """ Start profiling if the environment variable asks for it and it is not running yet """
+    tracePath = os.environ.get(ENV_VAR)
+    if tracePath and _profiler is None:
+        enable(tracePath)
+
+
+def toggleFromUI(enabled):
+    """ Menu callback, the trace goes to the workspace root """
+    if enabled:
+        tracePath = os.path.join(cmds.workspace(query=True, rootDirectory=True), "FBXExportTrace.json")
+        enable(tracePath)
+        print("FBX export profiling on, trace: " + tracePath)
+    else:
+        disable()
@@ -0,0 +1,231 @@
+import time
+
+import maya.cmds as cmds
+import maya.OpenMaya as OpenMaya
+
+import FBXAttrBatch
+
+""" Export skeleton cache for FBXAnimationExporter
+
+    move to maya scripts folder, next to FBXAnimationExporter.py
+
+    copyAndConnectSkeleton duplicates the whole rig, deletes what is not a joint, unlocks and
+    connects every channel with one command each, and clearGarbage deletes it all after every
+    clip. Here the joint-only skeleton is created directly with one MDagModifier, once per
+    character, and kept alive across the clips of that character. Between clips only the root,
+    which transformToOrigin bakes, gets its connections back. The rig of the previous character
+    is deleted before the next one is built, characters sharing a skeleton would otherwise get
+    a renamed root ("Root1") in their FBX.
+    """
+
+TRANSFORM_ATTRS = ["translate", "rotate", "scale"]
+
+STATIC_DOUBLE_ATTRS = ["jointOrientX", "jointOrientY", "jointOrientZ",
+                       "rotateAxisX", "rotateAxisY", "rotateAxisZ"]
+STATIC_INT_ATTRS = ["rotateOrder"]
+STATIC_BOOL_ATTRS = ["segmentScaleCompensate"]
+
+RIG_ATTR = "exportRig"
+
+
+def _shortName(name):
+    """ Return the node name without namespace, as duplicate would name it """
+    return name.rpartition(":")[2]
+
+
+def _getObject(name):
+    selection = OpenMaya.MSelectionList()
+    selection.add(name)
+    obj = OpenMaya.MObject()
+    selection.getDependNode(0, obj)
+    return obj
+
+
+def listSkeleton(origin):
+    """ Return (joint path relative to the origin, joint MObject) for the origin and every joint below it
+
+        Procedure: walk the children depth first and only go down through joints,
+            like the duplicate + delete non-joints of copyAndConnectSkeleton
+
+        Presumption: relative paths use names without namespace
+    """
+    rootObj = _getObject(origin)
+    skeleton = [(_shortName(OpenMaya.MFnDependencyNode(rootObj).name()), rootObj)]
+    stack = [skeleton[0]]
+
+    while stack:
+        path, obj = stack.pop()
+        dagFn = OpenMaya.MFnDagNode(obj)
+        for i in range(dagFn.childCount()):
+            child = dagFn.child(i)
+            if child.hasFn(OpenMaya.MFn.kJoint):
+                entry = (path + "|" + _shortName(OpenMaya.MFnDependencyNode(child).name()), child)
+                skeleton.append(entry)
+                stack.append(entry)
+
+    return skeleton
+
+
+class ExportRig(object):
+    """ Joint-only copy of a skeleton driven by the original joints
+
+        Procedure: create every joint with one MDagModifier, copy the static joint attributes,
+            connect translate, rotate and scale from the original joint with the same relative path
+            and the scale of the parent joint to inverseScale, as parenting a joint does
+
+        Presumption: No joints are children of anything but other joints, no node at world
+            has the name of the root, RuntimeError if Maya had to rename it
+    """
+
+    def __init__(self, origin):
+        self.origin = origin
+        self.joints = {}
+        modifier = OpenMaya.MDagModifier()
+
+        skeleton = listSkeleton(origin)
+        created = {}
+
+        for path, obj in skeleton:
+            parentPath = path.rpartition("|")[0]
+            parentObj = created[parentPath] if parentPath else OpenMaya.MObject.kNullObj
+            created[path] = modifier.createNode("joint", parentObj)
+            modifier.renameNode(created[path], path.rpartition("|")[2])
+        modifier.doIt()
+
+        rootPath = skeleton[0][0]
+        rootName = OpenMaya.MFnDependencyNode(created[rootPath]).name()
+        if rootName != rootPath:
+            modifier.undoIt()
+            raise RuntimeError("Export rig root of " + origin + " was named " + rootName + " instead of " + rootPath +
+                               ", delete the node named " + rootPath + " at world")
+
+        batch = FBXAttrBatch.AttrBatch(modifier)
+
+        for path, obj in skeleton:
+            sourceFn = OpenMaya.MFnDependencyNode(obj)
+            rigFn = OpenMaya.MFnDependencyNode(created[path])
+
+            for curAttr in STATIC_DOUBLE_ATTRS:
+                batch.setAttr(rigFn.findPlug(curAttr), sourceFn.findPlug(curAttr).asDouble())
+            for curAttr in STATIC_INT_ATTRS:
+                batch.setAttr(rigFn.findPlug(curAttr), sourceFn.findPlug(curAttr).asInt())
+            for curAttr in STATIC_BOOL_ATTRS:
+                batch.setAttr(rigFn.findPlug(curAttr), sourceFn.findPlug(curAttr).asBool())
+            for curAttr in TRANSFORM_ATTRS:
+                batch.connect(sourceFn.findPlug(curAttr), rigFn.findPlug(curAttr))
+
+            parentPath = path.rpartition("|")[0]
+            if parentPath:
+                parentFn = OpenMaya.MFnDependencyNode(created[parentPath])
+                batch.connect(parentFn.findPlug("scale"), rigFn.findPlug("inverseScale"))
+
+            self.joints[path] = (OpenMaya.MObjectHandle(obj), OpenMaya.MObjectHandle(created[path]))
+
+        self.rootPath = rootPath
+        rigAttr = OpenMaya.MFnNumericAttribute().create(RIG_ATTR, "xrg", OpenMaya.MFnNumericData.kBoolean, True)
+        modifier.addAttribute(created[self.rootPath], rigAttr)
+        batch.doIt()
+        self.commandSummary = batch.summary()
+
+    def isValid(self):
+        for sourceHandle, rigHandle in self.joints.values():
+            if not sourceHandle.isValid() or not rigHandle.isValid():
+                return False
+        return True
+
+    def root(self):
+        """ Return the full path of the rig root """
+        return OpenMaya.MFnDagNode(self.joints[self.rootPath][1].object()).fullPathName()
+
+    def jointNames(self):
+        """ Return the full paths of all the rig joints, to select them for export """
+        return [OpenMaya.MFnDagNode(rigHandle.object()).fullPathName() for sourceHandle, rigHandle in self.joints.values()]
+
+    def reconnectRoot(self):
+        """ Give the root back its connections to the original origin
+
+            Procedure: delete the curves a bake left on the root channels and
+                connect translate, rotate and scale again, all in one attribute batch
+        """
+        sourceHandle, rigHandle = self.joints[self.rootPath]
+        sourceFn = OpenMaya.MFnDependencyNode(sourceHandle.object())
+        rigFn = OpenMaya.MFnDependencyNode(rigHandle.object())
+        batch = FBXAttrBatch.AttrBatch()
+
+        for curAttr in TRANSFORM_ATTRS:
+            rigPlug = rigFn.findPlug(curAttr)
+            sourcePlug = sourceFn.findPlug(curAttr)
+            if rigPlug.isConnected() and rigPlug.isDestination():
+                continue
+
+            for i in range(rigPlug.numChildren()):
+                sources = OpenMaya.MPlugArray()
+                rigPlug.child(i).connectedTo(sources, True, False)
+                for j in range(sources.length()):
+                    if sources[j].node().hasFn(OpenMaya.MFn.kAnimCurve):
+                        batch.modifier.deleteNode(sources[j].node())
+                    else:
+                        batch.disconnect(sources[j], rigPlug.child(i))
+            batch.connect(sourcePlug, rigPlug)
+
+        batch.doIt()
+
+    def delete(self):
+        if self.joints[self.rootPath][1].isValid():
+            cmds.delete(self.root())
+
+
+class ExportRigCache(object):
+    """ Export rigs per origin, built on first use and reused by the next clips
+
+        Procedure: acquire builds the rig or, if there is a valid one, puts its root back
+            to the original animation. Only the rig of the last origin is kept, the others are
+            deleted first so their roots don't take the name of the new one.
+            The time of each build and reuse is recorded
+    """
+
+    def __init__(self):
+        self.rigs = {}
+        self.timings = []
+
+    def acquire(self, origin):
+        startTime = time.time()
+
+        for curOrigin in list(self.rigs):
+            if curOrigin != origin:
+                self.rigs.pop(curOrigin).delete()
+
+        rig = self.rigs.get(origin)
+
+        if rig and rig.isValid():
+            rig.reconnectRoot()
+            self.timings.append((origin, "reuse", time.time() - startTime))
+        else:
+            if rig:
+                rig.delete()
+            rig = ExportRig(origin)
+            self.rigs[origin] = rig
+            self.timings.append((origin, "build", time.time() - startTime))
+
+        return rig
+
+    def release(self):
+        for curRig in self.rigs.values():
+            curRig.delete()
+        self.rigs = {}
+
+    def summary(self):
+        lines = []
+        for curKind in ("build", "reuse"):
+            times = [seconds for origin, kind, seconds in self.timings if kind == curKind]
+            if times:
+                lines.append("export rig %s: %d in %.3fs (%.4fs each)" % (curKind, len(times), sum(times),
+                                                                           sum(times) / len(times)))
+        return "\n".join(lines)
+
+
+def deleteStaleRigs():
+    """ Delete export rigs left in the scene by an export that did not finish """
+    rigs = cmds.ls("*." + RIG_ATTR, objectsOnly=True)
+    if rigs:
+        cmds.delete(rigs)
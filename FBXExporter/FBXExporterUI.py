@@ -0,0 +1,317 @@
+import maya.cmds as cmds
+import FBXAnimationExporter as FBX
+import FBXExportProfiler
+
+""" Window of FBXAnimationExporter
+
+    move to maya scripts folder, next to FBXAnimationExporter.py
+
+    Only imported when the window is opened, headless exports never load it:
+    import FBXAnimationExporter
+    FBXAnimationExporter.FBXExporter_UI()
+    """
+
+
+####################################################################################
+#
+#      U I       C O D E
+#
+####################################################################################
+
+
+#########################################
+#
+#     Model UI Procs
+#
+#########################################
+
+def FBXExporterUI_PopulateModelRootJointsPanel(ui_winModOriTextScrollList):
+    """ Populate the root joints panel in the model tab
+
+        Procedure: it will search for the origin. if none found, list all joints in the scene
+
+        Presumption: origin is going to be a joint, rigs are not referenced in
+    """
+
+    cmds.textScrollList(ui_winModOriTextScrollList, edit=True, removeAll=True)
+
+    origin = FBX.returnOrigin("")
+
+    if origin != "Error":
+        cmds.textScrollList(ui_winModOriTextScrollList, edit=True, ebg=False, append=origin)
+    else:
+        joints = cmds.ls(type="joint")
+        for curJoint in joints:
+            cmds.textScrollList(ui_winModOriTextScrollList, edit=True, bgc=[1, 0.1, 0.1], append=curJoint)
+
+def FBXExporterUI_PopulateAniamtionActorPanel():
+    pass
+
+######################################
+#
+# Animation UI Procs
+#
+######################################
+
+def FBXExporterUI_PopulateAnimationActorPanel(ui_windowAnimActorsTextScrollList):
+    """ To populate the actor panel in the UI
+        
+        Procedure: get list of all references in the scene
+            for each reference, get the namespace
+            call returnOrigin for each namespace.
+            if not "Error", add namespace to textScrollList
+            
+        Presumption: single-layered referencing, references have namespace
+    """
+    
+    cmds.textScrollList(ui_windowAnimActorsTextScrollList, edit=True, removeAll=True)
+    
+    references = cmds.file(query=True, reference=True)
+    
+    for curRef in references:
+        if not cmds.file(curRef, query=True, deferReference=True):
+            ns = cmds.file(curRef, query=True, namespace=True)
+            origin = FBX.returnOrigin(ns)
+            
+            if origin != "Error":
+                cmds.textScrollList(ui_windowAnimActorsTextScrollList, edit=True, append=ns)              
+
+def FBXExporterUI_UpdateExportNodeFromModelSettings():
+    pass
+
+def FBXExporterUI_UpdateModelExportSettings():
+    pass
+
+def FBXExporterUI_PopulateModelsExportNodesPanel():
+    pass
+
+def FBXExporterUI_PopulateGeomPanel():
+    pass
+
+def FBXExporterUI_ModelExportAllCharacters():
+    pass
+
+def FBXExporterUI_ModelTagForOrigin():
+    pass
+
+def FBXExporterUI_ModelCreateNewExportNode():
+    pass
+
+def FBXExporterUI_ModelAddRemoveMeshes():
+    pass
+
+def FBXExporterUI_BrowseExportFilename(value):
+    pass
+
+def FBXExporterUI_ModelExportAllCharacters():
+    pass
+
+def FBXExporterUI_ModelExportSelectedCharacter():
+    pass
+
+def FBXExporterUI_ModelExportAllCharacters():
+    pass
+
+##########################
+#
+# Help windows
+#
+#########################
+
+def FBXExporter_AnimationHelpWindow():
+    ui_animHelpWindow = "ui_FBXExporter_AnimationHelpWindow"
+    if cmds.window(ui_animHelpWindow, exists=True):
+        cmds.deleteUI(ui_animHelpWindow)
+        
+    cmds.window(ui_animHelpWindow, s=True, width=500, height=500, menuBar=True, title="Help on Animation Export")
+    cmds.paneLayout(configuration='horizontal4')
+    cmds.scrollField(editable=False, wordWrap=True, text="Animation Export: \nAnimation export assumes single-level referencing with proper namesapce.\n\nActors: \nAll referenced characters with a origin joint tagged with the origin attribute will be listed in the Actor's field by their namespace. Please see the modeling help window for how to tage a character's origin with the origin attribute.\n\nExport Nodes:\nThe Export Nodes panel will fill in with export nodes connected to the origin of the selected actor from the Actor's field. Clicking on the New Export Node will create a new node. Each export node represents a seperate animation.\n\nExport:\nThe Export flag means the current export ndoe will be available for export. All nodes wihtout this checked will not be exported.\n\nMove to origin:\nNot yet supported\n\nSub Range:\nTurn this on to enable the sub-range option for the selected node. This will enable the Start Frame and End Frame fields where you can set the range for the specified animation. Otherwise, the animation will use the frame range of the file.\n\nExport File Name:\nClick on the Browse button to browse to where you want the file to go. The path will be project relative.\n\nExport Selected Animation:\nClick this button to export the animation selected in Export Nodes\n\nExport All Animations For Selected Character:\nClick this button to export all animations for the selected actor in the Actors filed. This flag will ignore what is selected in Export Nodes and export from all found nodes for the character\n\nExport All Animations:\nClick this button to export all animations for all characters. All selections will be ignored" )		
+    
+    cmds.showWindow(ui_animHelpWindow)
+
+
+def FBXExporter_ModelHelpWindow():
+    ui_modelHelpWindow = "ui_FBXExporter_ModelHelpWindow"
+    if cmds.window(ui_modelHelpWindow, exists=True):
+        cmds.deleteUI(ui_modelHelpWindow)
+        
+    cmds.window(ui_modelHelpWindow, s=True, width=500, height=500, menuBar=True, title="Help on Model Export")
+    cmds.paneLayout(configuration='horizontal4')
+    cmds.scrollField(editable=False, wordWrap=True, text="Model Export: \nModel exporter assumes one skeleton for export. Referencing for model export is not supported\n\nRoot Joints: \nPanel will list all the joints tagged with the \"origin\" attribute. If no joint is tagged with the attribute, it will list all joints in the scene and turn red. Select the root joint and click the Tag as Origin button.\n\nExport Nodes:\nThe Export Nodes panel will fill in with export nodes connected to the origin of the selected actor from the Actor's field. Clicking on the New Export Node will create a new node. Each export node represents a seperate character export (for example, seperate LOD's).\n\nMeshes:\nThe Meshes panel shows all the geometry associated with the selected export node. This can be used if you have mesh variations skinned to the same rig or LOD's.\n\nExport File Name:\nClick on the Browse button to browse to where you want the file to go. The path will be project relative.\n\nExport Selected Character:\nClick this button to export the character selected in Export Nodes\n\nExport All Characters:\nClick this button to export all character definitions for the skeleton. All selections will be ignored" )
+
+    cmds.showWindow(ui_modelHelpWindow)
+
+
+
+#
+# Main UI
+#
+
+def FBXExporter_UI():
+    #create main window
+    ui_mainWindow = "ui_FBXExporter_window"
+    if cmds.window(ui_mainWindow, exists=True):
+        cmds.deleteUI(ui_mainWindow)
+
+    cmds.window(ui_mainWindow, s=True, width=1000, height=700, menuBar=True, title="FBX Exporter")
+
+    #create menu bar commands
+    ui_windowEditMenu = "ui_FBXExporter_window_editMenu"
+    ui_windowHelpMenu = "ui_FBXExporter_window_helpMenu"
+
+    cmds.menu(ui_windowEditMenu, label="Edit")
+    cmds.menuItem(label="Save Settings", parent=ui_windowEditMenu)
+    cmds.menuItem(label="Reset Settings", parent=ui_windowEditMenu)
+    cmds.menuItem(divider=True, parent=ui_windowEditMenu)
+    cmds.menuItem(label="Batch Export All Animations", command="import FBXBatchExport\nFBXBatchExport.exportSceneInBackground()", parent=ui_windowEditMenu)
+    cmds.menuItem(label="Profile Exports", checkBox=FBXExportProfiler.isEnabled(), command=FBXExportProfiler.toggleFromUI, parent=ui_windowEditMenu)
+
+    cmds.menu(ui_windowHelpMenu, label="Help")
+    cmds.menuItem(label="Help on Animation Export", command = "import FBXExporterUI\nFBXExporterUI.FBXExporter_AnimationHelpWindow()", parent=ui_windowHelpMenu)
+    cmds.menuItem(label="Help on Model Export", command = "import FBXExporterUI\nFBXExporterUI.FBXExporter_ModelHelpWindow()", parent=ui_windowHelpMenu)
+
+    #create main tab layout
+    ui_windowMainForm = "ui_FBXExporter_window_mainForm"
+    ui_windowTabLayout = "ui_FBXExporter_window_tabLayout"
+
+    cmds.formLayout(ui_windowMainForm)
+    cmds.tabLayout(ui_windowTabLayout, innerMarginWidth=5, innerMarginHeight=5)
+    cmds.formLayout(ui_windowMainForm, edit=True, attachForm=[(ui_windowTabLayout, 'top', 0), (ui_windowTabLayout, 'left', 0), (ui_windowTabLayout, 'bottom', 0), (ui_windowTabLayout, 'right', 0)])
+
+    #create animation ui elements
+    ui_windowAnimFrameLayout = "ui_FBXExporter_window_animationFrameLayout"
+    ui_windowAnimFormLayout = "ui_FBXExporter_window_animationFormLayout"
+
+    cmds.frameLayout(ui_windowAnimFrameLayout, collapsable=False, label="", borderVisible=False, parent=ui_windowTabLayout)
+    cmds.formLayout(ui_windowAnimFormLayout, numberOfDivisions=100, parent=ui_windowAnimFrameLayout)
+
+    ui_windowAnimActorsTextScrollList = "ui_FBXExporter_window_animationActorsTextScrollList"
+    ui_windowAnimExportNodesTextScrollList = "ui_FBXExporter_window_animationExportNodesTextScrollList"
+    ui_windowAnimNewExportNodeButton = "ui_FBXExporter_window_animationNewExportNodeButton"
+    ui_windowAnimExportCheckBoxGrp = "ui_FBXExporter_window_animationExportCheckBoxGrp"
+    ui_windowAnimZeroOriginCheckBoxGrp = "ui_FBXExporter_window_animationZeroOriginCheckBoxGrp"
+    ui_windowAnimZeroOriginMotionCheckBoxGrp = "ui_FBXExporter_window_animationZeroOriginMotionCheckBoxGrp"
+    ui_windowAnimSubRangeCheckBoxGrp = "ui_FBXExporter_window_animationSubRangeCheckBoxGrp"
+    ui_windowAnimStartFrameFloatFieldGrp = "ui_FBXExporter_window_animationStartFrameFloatFieldGrp"
+    ui_windowAnimEndFrameFloatFieldGrp = "ui_FBXExporter_window_animationEndFrameFloatFieldGrp"
+    ui_windowAnimExportFileNameTextFieldButtonGrp = "ui_FBXExporter_window_animationExportFileNameTextFieldButtonGrp"
+    ui_windowAnimRecordAnimLayersButton = "ui_FBXExporter_window_animationRecordAnimLayersButton"
+    ui_windowAnimPreviewAnimLayersButton = "ui_FBXExporter_window_animationPreviewAnimLayersButton"
+    ui_windowAnimClearAnimLayersButton = "ui_FBXExporter_window_animationClearAnimLayersButton"
+    ui_windowAnimActorText = "ui_FBXExporter_window_animationActorText"
+    ui_windowAnimExportNodesText = "ui_FBXExporter_window_animationExportNodesText"
+    ui_windowAnimExportSelectedAnimButton = "ui_FBXExporter_window_animationExportSelectedAnimationButton"
+    ui_windowAnimExportAllAnimationsForSelectedChrButton = "ui_FBXExporter_window_animationExportAllAnimationsForSelectedCharacterButton"
+    ui_windowAnimExportAllAnimsButton = "ui_FBXExporter_window_animationExportAllAnimationsButton"
+    
+    cmds.textScrollList(ui_windowAnimActorsTextScrollList, width=250, height=325, numberOfRows=18, allowMultiSelection=False, parent=ui_windowAnimFormLayout)
+    cmds.textScrollList(ui_windowAnimExportNodesTextScrollList, width=250, height=325, numberOfRows=18, allowMultiSelection=False, parent=ui_windowAnimFormLayout)
+    cmds.button(ui_windowAnimNewExportNodeButton, width=250, height=50, label="New Export Node", parent=ui_windowAnimFormLayout)
+    cmds.checkBoxGrp(ui_windowAnimExportCheckBoxGrp, numberOfCheckBoxes=1, label="Export", columnWidth2=[85, 70], enable=False, parent=ui_windowAnimFormLayout)
+    cmds.checkBoxGrp(ui_windowAnimZeroOriginCheckBoxGrp, numberOfCheckBoxes=1, label="Move To Origin", columnWidth2=[85, 70], enable=False, parent=ui_windowAnimFormLayout)
+    cmds.checkBoxGrp(ui_windowAnimZeroOriginMotionCheckBoxGrp, numberOfCheckBoxes=1, label="Zero Motion on Origin", columnWidth2=[120, 70], enable=False, parent=ui_windowAnimFormLayout)
+    cmds.checkBoxGrp(ui_windowAnimSubRangeCheckBoxGrp, numberOfCheckBoxes=1, label="Use Sub Range", columnWidth2=[85, 70], enable=False, parent=ui_windowAnimFormLayout)
+    cmds.floatFieldGrp(ui_windowAnimStartFrameFloatFieldGrp, numberOfFields=1, label="Start Frame", columnWidth2=[75,70], enable=False, value1=0.0, parent=ui_windowAnimFormLayout)
+    cmds.floatFieldGrp(ui_windowAnimEndFrameFloatFieldGrp, numberOfFields=1, label="End Frame", columnWidth2=[75,70], enable=False, value1=1.0, parent=ui_windowAnimFormLayout)
+    cmds.textFieldButtonGrp(ui_windowAnimExportFileNameTextFieldButtonGrp, label="Export File Name", columnWidth3=[100,300,30], enable=False, text="", buttonLabel="Browse", parent=ui_windowAnimFormLayout)
+    cmds.button(ui_windowAnimRecordAnimLayersButton, enable=False,width=150, height=50, label="Record Anim Layers", backgroundColor=[1, .25, .25], parent=ui_windowAnimFormLayout)
+    cmds.button(ui_windowAnimPreviewAnimLayersButton, enable=False, width=250, height=50, label="Preview Anim Layers", parent=ui_windowAnimFormLayout)
+    cmds.button(ui_windowAnimClearAnimLayersButton, enable=False, width=250, height=50, label="Clear Anim Layers", parent=ui_windowAnimFormLayout)
+    cmds.text(ui_windowAnimActorText, label="Actors", parent=ui_windowAnimFormLayout)
+    cmds.text(ui_windowAnimExportNodesText, label="Export Nodes", parent=ui_windowAnimFormLayout)
+    cmds.button(ui_windowAnimExportSelectedAnimButton, width=300, height=50, label="Export Selected Animation", parent=ui_windowAnimFormLayout)
+    cmds.button(ui_windowAnimExportAllAnimationsForSelectedChrButton, width=300, height=50, label="Export All Animation For Selected Character", parent=ui_windowAnimFormLayout)
+    cmds.button(ui_windowAnimExportAllAnimsButton, width=300, height=50, label="Export All Animation", parent=ui_windowAnimFormLayout)
+
+    ui_windowAnimExportNodesPopupMenu = "ui_FBXExporter_window_animationExportNodesPopupMenu"
+
+    cmds.popupMenu(ui_windowAnimExportNodesPopupMenu, button=3, parent=ui_windowAnimExportNodesTextScrollList)
+    cmds.menuItem("ui_FBXExporter_window_animationSelectNodeMenuItem", label="Select", parent=ui_windowAnimExportNodesPopupMenu )
+    cmds.menuItem("ui_FBXExporter_window_animationRenameNodeMenuItem", label="Rename", parent=ui_windowAnimExportNodesPopupMenu )
+    cmds.menuItem("ui_FBXExporter_window_animationDeleteNodeMenuItem", label="Delete", parent=ui_windowAnimExportNodesPopupMenu )
+
+    #crete model ui elements
+    ui_windowModelFrameLayout = "ui_FBXExporter_window_modelFrameLayout"
+    ui_windowModelFormLayout = "ui_FBXExporter_window_modelFormLayout"
+    
+    cmds.frameLayout(ui_windowModelFrameLayout, collapsable=False, label="", borderVisible=False, parent=ui_windowTabLayout)
+    cmds.formLayout(ui_windowModelFormLayout, numberOfDivisions=100, parent=ui_windowModelFrameLayout)
+    
+    ui_winModExpChkBoxGrp = "ui_FBXExporter_window_modelExportCheckBoxGrp"
+    ui_winModOriText = "ui_FBXExporter_window_modelOriginText"
+    ui_winModExpNodesText = "ui_FBXExporter_window_modelExportNodesText"
+    ui_winModMeshText = "ui_FBXExporter_window_modelsMeshesText"
+    ui_winModOriTextScrollList = "ui_FBXExporter_window_modelsOriginTextScrollList"
+    ui_winModExpNodesTextScrollList = "ui_FBXExporter_window_modelsExportNodesTextScrollList"
+    ui_winModGeomTextScrollList = "ui_FBXExporter_window_modelsGeomTextScrollList"
+    ui_winModTagAsOriBtn = "ui_FBXExporter_window_modelTagAsOriginButton"
+    ui_winModNewExpNodeBtn = "ui_FBXExporter_window_modelNewExportNodeButton"
+    ui_winModAddRemoveMeshBtn = "ui_FBXExporter_window_modelAddRemoveMeshesButton"
+    ui_winModExpFileNameTextFieldBtnGrp = "ui_FBXExporter_window_modelExportFileNameTextFieldButtonGrp"
+    ui_winModExpMeshBtn = "ui_FBXExporter_window_modelExportMeshButton"
+    ui_winModExpAllMeshsBtn = "ui_FBXExporter_window_modelExportAllMeshesButton"
+
+    cmds.checkBoxGrp(ui_winModExpChkBoxGrp, numberOfCheckBoxes=1, label="Export", cc="import FBXExporterUI\nFBXExporterUI.FBXExporterUI_UpdateExportNodeFromModelSettings()", columnWidth2=[85,70], enable=False, parent=ui_windowModelFormLayout)
+    cmds.text(ui_winModOriText, label="Root Joints", parent=ui_windowModelFormLayout)
+    cmds.text(ui_winModExpNodesText, label="Export Nodes", parent=ui_windowModelFormLayout)
+    cmds.text(ui_winModMeshText, label="Meshes", parent=ui_windowModelFormLayout)
+    cmds.textScrollList(ui_winModOriTextScrollList, width=175, height=220, numberOfRows=18, allowMultiSelection=False, sc="import FBXExporterUI\nFBXExporterUI.FBXExporterUI_PopulateModelsExportNodesPanel()", parent=ui_windowModelFormLayout)
+    cmds.textScrollList(ui_winModExpNodesTextScrollList, width=175, height=220,  numberOfRows=18, allowMultiSelection=False, sc="import FBXExporterUI\nFBXExporterUI.FBXExporterUI_PopulateGeomPanel()\nFBXExporterUI.FBXExporterUI_UpdateModelExportSettings()", parent=ui_windowModelFormLayout)
+    cmds.textScrollList(ui_winModGeomTextScrollList, width=175, height=220,  numberOfRows=18, allowMultiSelection=True,  parent=ui_windowModelFormLayout)
+    cmds.button(ui_winModTagAsOriBtn, width=175, height=50, label="Tag as Origin", command="import FBXExporterUI\nFBXExporterUI.FBXExporterUI_ModelTagForOrigin()", parent=ui_windowModelFormLayout)
+    cmds.button(ui_winModNewExpNodeBtn, width=175, height=50, label="New Export Node", command="import FBXExporterUI\nFBXExporterUI.FBXExporterUI_ModelCreateNewExportNode()", parent=ui_windowModelFormLayout)
+    cmds.button(ui_winModAddRemoveMeshBtn, width=175, height=50, label="Add / Remove Meshes", command="import FBXExporterUI\nFBXExporterUI.FBXExporterUI_ModelAddRemoveMeshes()", parent=ui_windowModelFormLayout)
+    cmds.textFieldButtonGrp(ui_winModExpFileNameTextFieldBtnGrp, label='Export File Name', bc="import FBXExporterUI\nFBXExporterUI.FBXExporterUI_BrowseExportFilename(2)", cc="import FBXExporterUI\nFBXExporterUI.FBXExporterUI_UpdateExportNodeFromAnimationSettings()", columnWidth3=[100,300,30], enable=False, text='', buttonLabel='Browse', parent=ui_windowModelFormLayout )
+    cmds.button(ui_winModExpMeshBtn, width=250, height=50, label="Export Selected Character", command="import FBXExporterUI\nFBXExporterUI.FBXExporterUI_ModelExportSelectedCharacter()", parent=ui_windowModelFormLayout)
+    cmds.button(ui_winModExpAllMeshsBtn, width=250, height=50, label="Export All Characters", command="import FBXExporterUI\nFBXExporterUI.FBXExporterUI_ModelExportAllCharacters()", parent=ui_windowModelFormLayout)
+
+    ui_windowModelExportNodesPopupMenu = "ui_FBXExporter_window_modelExportNodesPopupMenu"
+
+    cmds.popupMenu(ui_windowModelExportNodesPopupMenu, button=3, parent=ui_winModExpNodesTextScrollList)
+    cmds.menuItem("ui_FBXExporter_window_modelSelectNodeMenuItem", label="Select", parent=ui_windowModelExportNodesPopupMenu )
+    cmds.menuItem("ui_FBXExporter_window_modelRenameNodeMenuItem", label="Rename", parent=ui_windowModelExportNodesPopupMenu )
+    cmds.menuItem("ui_FBXExporter_window_modelDeleteNodeMenuItem", label="Delete", parent=ui_windowModelExportNodesPopupMenu )
+
+    #set up tabs
+    cmds.tabLayout(ui_windowTabLayout, edit=True, tabLabel=((ui_windowAnimFrameLayout, "Animation"),(ui_windowModelFrameLayout, "Model")))
+
+
+    #set up animation form layout
+    cmds.formLayout(ui_windowAnimFormLayout, edit=True, attachForm=[(ui_windowAnimActorText, 'top', 5), (ui_windowAnimActorText, 'left', 5), (ui_windowAnimActorsTextScrollList, 'left', 5), (ui_windowAnimExportNodesText, 'top', 5), (ui_windowAnimExportCheckBoxGrp, 'top', 25), (ui_windowAnimZeroOriginCheckBoxGrp, 'top', 25), (ui_windowAnimZeroOriginMotionCheckBoxGrp, 'top', 25), (ui_windowAnimExportFileNameTextFieldButtonGrp, 'right', 5)])
+    cmds.formLayout(ui_windowAnimFormLayout, edit=True, attachControl=[(ui_windowAnimExportNodesTextScrollList, 'left', 5, ui_windowAnimActorsTextScrollList), (ui_windowAnimExportCheckBoxGrp, 'left', 20, ui_windowAnimExportNodesTextScrollList), (ui_windowAnimZeroOriginCheckBoxGrp, 'left', 5, ui_windowAnimExportCheckBoxGrp), (ui_windowAnimZeroOriginMotionCheckBoxGrp, 'left', 5, ui_windowAnimZeroOriginCheckBoxGrp)])
+    cmds.formLayout(ui_windowAnimFormLayout, edit=True, attachControl=[(ui_windowAnimSubRangeCheckBoxGrp, 'left', 20, ui_windowAnimExportNodesTextScrollList), (ui_windowAnimSubRangeCheckBoxGrp, 'top', 5, ui_windowAnimZeroOriginCheckBoxGrp)])
+    cmds.formLayout(ui_windowAnimFormLayout, edit=True, attachControl=[(ui_windowAnimStartFrameFloatFieldGrp, 'left', 30, ui_windowAnimExportNodesTextScrollList), (ui_windowAnimStartFrameFloatFieldGrp, 'top', 5, ui_windowAnimSubRangeCheckBoxGrp)])
+    cmds.formLayout(ui_windowAnimFormLayout, edit=True, attachControl=[(ui_windowAnimEndFrameFloatFieldGrp, 'left', 1, ui_windowAnimStartFrameFloatFieldGrp), (ui_windowAnimEndFrameFloatFieldGrp, 'top', 5, ui_windowAnimSubRangeCheckBoxGrp)])
+    cmds.formLayout(ui_windowAnimFormLayout, edit=True, attachControl=[(ui_windowAnimExportFileNameTextFieldButtonGrp, 'left', 5, ui_windowAnimExportNodesTextScrollList), (ui_windowAnimExportFileNameTextFieldButtonGrp, 'top', 5, ui_windowAnimStartFrameFloatFieldGrp)])
+    cmds.formLayout(ui_windowAnimFormLayout, edit=True, attachControl=[(ui_windowAnimNewExportNodeButton, 'left', 5, ui_windowAnimActorsTextScrollList), (ui_windowAnimNewExportNodeButton, 'top', 5, ui_windowAnimExportNodesTextScrollList)])
+    cmds.formLayout(ui_windowAnimFormLayout, edit=True, attachControl=[(ui_windowAnimActorsTextScrollList, 'top', 5, ui_windowAnimActorText), (ui_windowAnimExportNodesTextScrollList, 'top', 5, ui_windowAnimExportNodesText), (ui_windowAnimExportNodesText, 'left', 225, ui_windowAnimActorText)])
+    cmds.formLayout(ui_windowAnimFormLayout, edit=True, attachControl=[(ui_windowAnimRecordAnimLayersButton, 'top', 10, ui_windowAnimExportFileNameTextFieldButtonGrp), (ui_windowAnimPreviewAnimLayersButton, 'top', 10, ui_windowAnimExportFileNameTextFieldButtonGrp), (ui_windowAnimClearAnimLayersButton, 'top', 10, ui_windowAnimExportFileNameTextFieldButtonGrp)])
+    cmds.formLayout(ui_windowAnimFormLayout, edit=True, attachControl=[(ui_windowAnimRecordAnimLayersButton, 'left', 10, ui_windowAnimExportNodesTextScrollList), (ui_windowAnimPreviewAnimLayersButton, 'left', 10, ui_windowAnimRecordAnimLayersButton), (ui_windowAnimClearAnimLayersButton, 'left', 10, ui_windowAnimPreviewAnimLayersButton)])
+    cmds.formLayout(ui_windowAnimFormLayout, edit=True, attachControl=[(ui_windowAnimExportSelectedAnimButton, 'top', 10, ui_windowAnimRecordAnimLayersButton), (ui_windowAnimExportAllAnimationsForSelectedChrButton, 'top', 10, ui_windowAnimExportSelectedAnimButton), (ui_windowAnimExportAllAnimsButton, 'top', 10,ui_windowAnimExportAllAnimationsForSelectedChrButton)])
+    cmds.formLayout(ui_windowAnimFormLayout, edit=True, attachControl=[(ui_windowAnimExportSelectedAnimButton, 'left', 100, ui_windowAnimExportNodesTextScrollList), (ui_windowAnimExportAllAnimationsForSelectedChrButton, 'left', 100, ui_windowAnimExportNodesTextScrollList), (ui_windowAnimExportAllAnimsButton, 'left', 100, ui_windowAnimExportNodesTextScrollList)])
+
+    #set up model form layout
+    cmds.formLayout(ui_windowModelFormLayout, edit= True, attachForm=[(ui_winModOriText, 'top', 5), (ui_winModOriText, 'left', 5), (ui_winModOriTextScrollList, 'left', 5), (ui_winModExpNodesText, 'top', 5), (ui_winModMeshText, 'top', 5), (ui_winModExpChkBoxGrp, 'top', 25), (ui_winModTagAsOriBtn, 'left', 5)])
+    cmds.formLayout(ui_windowModelFormLayout, edit= True, attachControl=[(ui_winModExpNodesText, 'left', 125, ui_winModOriText), (ui_winModMeshText, 'left', 120, ui_winModExpNodesText)])
+    cmds.formLayout(ui_windowModelFormLayout, edit= True, attachControl=[(ui_winModOriTextScrollList, 'top', 5, ui_winModOriText),(ui_winModExpNodesTextScrollList, 'top', 5, ui_winModExpNodesText), (ui_winModGeomTextScrollList, 'top', 5, ui_winModMeshText)])
+    cmds.formLayout(ui_windowModelFormLayout, edit= True, attachControl=[(ui_winModExpNodesTextScrollList, 'left', 5, ui_winModOriTextScrollList), (ui_winModGeomTextScrollList, 'left', 5, ui_winModExpNodesTextScrollList)])
+    cmds.formLayout(ui_windowModelFormLayout, edit= True, attachControl=[(ui_winModNewExpNodeBtn, 'left', 5, ui_winModOriTextScrollList), (ui_winModNewExpNodeBtn, 'top', 5, ui_winModExpNodesTextScrollList)])
+    cmds.formLayout(ui_windowModelFormLayout, edit= True, attachControl=[(ui_winModExpFileNameTextFieldBtnGrp, 'left', 5, ui_winModGeomTextScrollList),(ui_winModTagAsOriBtn, 'top', 5, ui_winModOriTextScrollList)])
+    cmds.formLayout(ui_windowModelFormLayout, edit= True, attachControl=[(ui_winModExpMeshBtn, 'top', 15, ui_winModExpFileNameTextFieldBtnGrp),(ui_winModExpMeshBtn, 'left', 125, ui_winModGeomTextScrollList)])
+    cmds.formLayout(ui_windowModelFormLayout, edit= True, attachControl=[(ui_winModAddRemoveMeshBtn, 'top', 5, ui_winModGeomTextScrollList),(ui_winModAddRemoveMeshBtn, 'left', 5, ui_winModNewExpNodeBtn)])
+    cmds.formLayout(ui_windowModelFormLayout, edit= True, attachControl=[(ui_winModExpAllMeshsBtn, 'top', 5, ui_winModExpMeshBtn),(ui_winModExpAllMeshsBtn, 'left', 125, ui_winModGeomTextScrollList)])
+    cmds.formLayout(ui_windowModelFormLayout, edit= True, attachControl=[(ui_winModExpFileNameTextFieldBtnGrp, 'top', 5, ui_winModExpChkBoxGrp),(ui_winModExpChkBoxGrp, 'left', 125, ui_winModGeomTextScrollList)])
+
+
+    # populate ui
+    FBXExporterUI_PopulateModelRootJointsPanel(ui_winModOriTextScrollList)
+    FBXExporterUI_PopulateAnimationActorPanel(ui_windowAnimActorsTextScrollList)
+
+    # scriptJob to refresh ui
+    cmds.scriptJob(parent=ui_mainWindow, e=["PostSceneRead", "import FBXExporterUI\nFBXExporterUI.FBXExporterUI_PopulateModelRootJointsPanel()"])
+    cmds.scriptJob(parent=ui_mainWindow, e=["PostSceneRead", "import FBXExporterUI\nFBXExporterUI.FBXExporterUI_PopulateAniamtionActorPanel()"])
+
+
+
+
+    cmds.showWindow(ui_mainWindow)
\ No newline at end of file
@@ -0,0 +1,326 @@
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import FBXBatchExport
+
+""" Command line batch exporter for the render farm
+
+    move to maya scripts folder, next to FBXAnimationExporter.py
+
+    Exports the clips of many scene files with a pool of mayapy processes, one scene per
+    process, and writes a results manifest (json) with the time, file and size of every clip
+    and the failures. Runs with any python, Maya is only loaded by the workers.
+
+    python FBXFarmExport.py scenes/*.mb --namespace "hero*" --export-node "*_run*" --processes 64 --manifest results.json
+    python FBXFarmExport.py --scene-list tonight.txt --mayapy /usr/autodesk/maya2020/bin/mayapy
+
+    Big scenes are started first so the long exports don't run alone at the end. The exit code
+    is 1 when a clip failed.
+
+    The scheduling and the manifest run without Maya against fake workers:
+    python FBXFarmExport.py --check
+    """
+
+MANIFEST_VERSION = 1
+
+STATUSES = ["ok", "skipped", "failed", "cancelled"]
+
+
+#############################
+#
+#    Job procs
+#
+#############################
+
+def readSceneList(fileName):
+    """ Return the scene files listed in a text file, one per line, # starts a comment """
+    with open(fileName) as f:
+        lines = [curLine.split("#", 1)[0].strip() for curLine in f]
+    return [curLine for curLine in lines if curLine]
+
+
+def findWorkspace(sceneFile):
+    """ Return the project folder of a scene, the first parent holding a workspace.mel
+
+        Presumption: without a workspace.mel the folder of the scene is used
+    """
+    folder = os.path.dirname(os.path.abspath(sceneFile))
+    current = folder
+
+    while True:
+        if os.path.isfile(os.path.join(current, "workspace.mel")):
+            return current + "/"
+        parent = os.path.dirname(current)
+        if parent == current:
+            return folder + "/"
+        current = parent
+
+
+def buildSceneJobs(sceneFiles, namespaces=None, nodeFilters=None, workspace=None, force=False):
+    """ Return one scene job per file, the biggest files first
+
+        Procedure: the size of the file stands in for the export time, starting the longest
+            jobs first keeps every process busy until the end of the run
+    """
+    sceneFiles = [os.path.abspath(curScene) for curScene in sceneFiles]
+    sceneFiles.sort(key=lambda curScene: os.path.getsize(curScene) if os.path.isfile(curScene) else 0, reverse=True)
+
+    return [FBXBatchExport.createSceneJob(curScene, workspace or findWorkspace(curScene), namespaces, nodeFilters,
+                                          force) for curScene in sceneFiles]
+
+
+#############################
+#
+#    Manifest procs
+#
+#############################
+
+def buildManifest(jobs, results, processes, seconds):
+    """ Return the results manifest
+
+        {"version", "processes", "seconds", "summary": {status: count},
+         "scenes": [{"scene", "clips", "seconds", "failed"}],
+         "clips": [{"scene", "namespace", "exportNode", "status", "time", "file", "size", "error"}]}
+    """
+    clips = []
+    for curResult in results:
+        clip = {"scene": "", "namespace": "", "exportNode": "", "status": "failed", "time": 0.0, "file": "",
+                "size": 0, "error": ""}
+        clip.update(curResult)
+        clips.append(clip)
+
+    summary = dict((curStatus, 0) for curStatus in STATUSES)
+    scenes = dict((curJob["scene"], {"scene": curJob["scene"], "clips": 0, "seconds": 0.0, "failed": 0})
+                  for curJob in jobs)
+
+    for curClip in clips:
+        summary[curClip["status"]] = summary.get(curClip["status"], 0) + 1
+        scene = scenes.setdefault(curClip["scene"], {"scene": curClip["scene"], "clips": 0, "seconds": 0.0,
+                                                     "failed": 0})
+        scene["clips"] += 1
+        scene["seconds"] += curClip["time"]
+        if curClip["status"] == "failed":
+            scene["failed"] += 1
+
+    return {"version": MANIFEST_VERSION,
+            "processes": processes,
+            "seconds": seconds,
+            "summary": summary,
+            "scenes": [scenes[curJob["scene"]] for curJob in jobs],
+            "clips": clips}
+
+
+def writeManifest(fileName, manifest):
+    """ Write the manifest through a temporary file so a reader never sees half of it """
+    folder = os.path.dirname(os.path.abspath(fileName))
+    handle, tempName = tempfile.mkstemp(prefix=".FBXFarmExport", suffix=".json", dir=folder)
+
+    with os.fdopen(handle, "w") as f:
+        json.dump(manifest, f, indent=4, sort_keys=True)
+
+    if os.path.exists(fileName):
+        os.remove(fileName)
+    os.rename(tempName, fileName)
+
+
+#############################
+#
+#    Run procs
+#
+#############################
+
+def runExports(jobs, processes, manifestFile=None, launcher=None, reporter=FBXBatchExport.printReporter):
+    """ Run the scene jobs on a pool of processes, return the manifest and write it if a file is given
+
+        Procedure: on Ctrl+C the queue kills its workers and records the clips left as
+            cancelled, the manifest is written with them and the KeyboardInterrupt raised again
+    """
+    startTime = time.time()
+    exportQueue = FBXBatchExport.ExportQueue(jobs, processes, launcher, reporter)
+
+    try:
+        exportQueue.run()
+    finally:
+        manifest = buildManifest(exportQueue.jobs, exportQueue.results, exportQueue.workers, time.time() - startTime)
+        if manifestFile:
+            writeManifest(manifestFile, manifest)
+    return manifest
+
+
+def parseArguments(argv):
+    parser = argparse.ArgumentParser(description="Export the FBX clips of scene files with a pool of mayapy processes")
+    parser.add_argument("scenes", nargs="*", help="scene files to export")
+    parser.add_argument("--scene-list", help="text file with one scene file per line")
+    parser.add_argument("-n", "--namespace", action="append", default=[],
+                        help="character namespace pattern, can be repeated, all characters by default")
+    parser.add_argument("-e", "--export-node", action="append", default=[],
+                        help="export node name pattern, can be repeated, all export nodes by default")
+    parser.add_argument("-j", "--processes", type=int, default=multiprocessing.cpu_count(),
+                        help="scene processes running at the same time, the CPU count by default")
+    parser.add_argument("-w", "--workspace", help="Maya project of all the scenes, found from each scene by default")
+    parser.add_argument("--mayapy", help="mayapy executable, found from MAYA_LOCATION by default")
+    parser.add_argument("-f", "--force", action="store_true", help="export the clips that are up to date too")
+    parser.add_argument("-o", "--manifest", default="FBXFarmExport.json", help="results manifest file")
+    parser.add_argument("--check", action="store_true", help="check the scheduling and the manifest with fake workers")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    arguments = parseArguments(sys.argv[1:] if argv is None else argv)
+
+    if arguments.check:
+        return 0 if checkWithFakeWorkers() else 1
+
+    sceneFiles = list(arguments.scenes)
+    if arguments.scene_list:
+        sceneFiles += readSceneList(arguments.scene_list)
+    if not sceneFiles:
+        print("No scene files given")
+        return 2
+
+    mayapy = arguments.mayapy or FBXBatchExport.findMayapy()
+
+    def launcher(jobFile):
+        return FBXBatchExport.launchMayapyWorker(jobFile, mayapy)
+
+    jobs = buildSceneJobs(sceneFiles, arguments.namespace, arguments.export_node, arguments.workspace,
+                          arguments.force)
+    try:
+        manifest = runExports(jobs, min(arguments.processes, len(jobs)), arguments.manifest, launcher)
+    except KeyboardInterrupt:
+        print("FBX Farm Export: cancelled, manifest %s" % arguments.manifest)
+        return 130
+
+    print("FBX Farm Export: %s in %s, manifest %s" % (", ".join("%d %s" % (manifest["summary"][curStatus], curStatus)
+                                                                for curStatus in STATUSES),
+                                                      FBXBatchExport.formatSeconds(manifest["seconds"]),
+                                                      arguments.manifest))
+    return 1 if manifest["summary"]["failed"] else 0
+
+
+#############################
+#
+#    Fake worker
+#
+#############################
+
+def runFakeWorker(jobFile):
+    """ Act like a mayapy worker on a scene job without Maya
+
+        Procedure: the scene file holds {"clips": [[namespace, export node, seconds]], "crashAfter": N},
+            the clips matching the job filters are planned, then reported one by one after
+            sleeping their seconds, the process exits with code 3 after crashAfter clips
+    """
+    with open(jobFile) as f:
+        job = json.load(f)
+    with open(job["scene"]) as f:
+        scene = json.load(f)
+
+    clips = [curClip for curClip in scene["clips"] if FBXBatchExport.matchesAny(curClip[0], job["namespaces"]) and
+             FBXBatchExport.matchesAny(curClip[1], job["nodeFilters"])]
+    FBXBatchExport.emitLine({"plan": [[curClip[0], curClip[1]] for curClip in clips]})
+
+    for i, (namespace, exportNode, seconds) in enumerate(clips):
+        if i == scene.get("crashAfter"):
+            sys.exit(3)
+        time.sleep(seconds)
+        FBXBatchExport.emitResult(exportNode, "ok", seconds, namespace=namespace,
+                                  file="export/" + exportNode + ".fbx", size=1024 * (i + 1))
+
+
+def launchFakeWorker(jobFile):
+    return subprocess.Popen([sys.executable, os.path.abspath(__file__), "--fake-worker", jobFile],
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
+
+
+def checkWithFakeWorkers(scenes=12, clips=4, processes=4):
+    """ Run fake scenes through the scheduler and check the manifest, return True if it is right
+
+        Procedure: every scene has characters hero and crowd with clips of a few
+            milliseconds, the filters keep the hero clips, one scene crashes after its first
+            clip and one file is not a scene at all. Checks the count of every status, the
+            failures of the crashed scenes and that the processes ran at the same time
+    """
+    tempDir = tempfile.mkdtemp(prefix="FBXFarmExport")
+    sceneFiles = []
+
+    for i in range(scenes):
+        sceneFile = os.path.join(tempDir, "scene%02d.json" % i)
+        scene = {"clips": [[curNamespace, "%s_clip%d" % (curNamespace, j), 0.05]
+                           for curNamespace in ("hero", "crowd") for j in range(clips)]}
+        if i == 0:
+            scene["crashAfter"] = 1
+        with open(sceneFile, "w") as f:
+            json.dump(scene, f)
+        sceneFiles.append(sceneFile)
+
+    brokenFile = os.path.join(tempDir, "broken.json")
+    with open(brokenFile, "w") as f:
+        f.write("not a scene")
+    sceneFiles.append(brokenFile)
+
+    jobs = buildSceneJobs(sceneFiles, ["hero"], ["*_clip*"], tempDir)
+    manifestFile = os.path.join(tempDir, "results.json")
+    manifest = runExports(jobs, processes, manifestFile, launchFakeWorker, reporter=None)
+
+    with open(manifestFile) as f:
+        written = json.load(f)
+
+    serialSeconds = sum(curClip["time"] for curClip in manifest["clips"])
+    # the crashed scene exports one clip and fails the others, the broken one fails as a whole
+    expected = {"ok": (scenes - 1) * clips + 1, "skipped": 0, "failed": clips, "cancelled": 0}
+    checks = [("status counts %s" % manifest["summary"], manifest["summary"] == expected),
+              ("manifest written", written["summary"] == manifest["summary"]),
+              ("only hero clips", all(curClip["namespace"] in ("hero", "") for curClip in manifest["clips"])),
+              ("crashed scene clips failed", sum(curClip["status"] == "failed" for curClip in manifest["clips"]
+                                                 if curClip["scene"] == sceneFiles[0]) == clips - 1),
+              ("broken scene failed", any(curClip["scene"] == brokenFile and curClip["status"] == "failed"
+                                          for curClip in manifest["clips"])),
+              ("%.2fs for %.2fs of clips on %d processes" % (manifest["seconds"], serialSeconds, processes),
+               manifest["seconds"] < serialSeconds)]
+
+    # Ctrl+C after a few clips, raised from the reporter like it would be from the pool loop
+    interruptFile = os.path.join(tempDir, "interrupted.json")
+    finished = []
+
+    def interruptingReporter(progress, message):
+        finished.append(message)
+        if len(finished) == 3:
+            raise KeyboardInterrupt
+
+    interrupted = False
+    try:
+        runExports(buildSceneJobs(sceneFiles[1:-1], ["hero"], ["*_clip*"], tempDir), processes, interruptFile,
+                   launchFakeWorker, reporter=interruptingReporter)
+    except KeyboardInterrupt:
+        interrupted = True
+
+    with open(interruptFile) as f:
+        cancelledManifest = json.load(f)
+    cancelledSummary = cancelledManifest["summary"]
+    # the scenes that never started have no plan, they get one cancelled entry each
+    checks += [("interrupt raised again", interrupted),
+               ("interrupted run %s" % cancelledSummary,
+                cancelledSummary["ok"] >= 3 and cancelledSummary["cancelled"] > 0 and cancelledSummary["failed"] == 0),
+               ("every scene in the interrupted manifest",
+                set(curClip["scene"] for curClip in cancelledManifest["clips"]) == set(sceneFiles[1:-1]))]
+
+    shutil.rmtree(tempDir, ignore_errors=True)
+
+    for curName, curPassed in checks:
+        print("%s %s" % ("ok    " if curPassed else "FAILED", curName))
+    return all(curPassed for curName, curPassed in checks)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--fake-worker":
+        runFakeWorker(sys.argv[2])
+    else:
+        sys.exit(main())
@@ -0,0 +1,136 @@
+import json
+import os
+import subprocess
+import sys
+import time
+import types
+
+""" Import time benchmark of FBXAnimationExporter, outside of Maya
+
+    move to maya scripts folder, next to FBXAnimationExporter.py
+
+    The maya modules are replaced by stubs that accept any call and record the maya.cmds ones,
+    every import is measured in a new python process:
+
+    headless : import FBXAnimationExporter, what a farm job calling exportFBXAnimation pays
+    eager    : the same plus the window, the option presets and the curve, rig, manifest and
+               animLayer modules, everything the module used to load when imported
+
+    The headless run also checks that no UI command was called and FBXExporterUI was not loaded.
+    With python 3.7 and later the -X importtime lines of the exporter modules are printed too.
+
+    python FBXImportBenchmark.py [runs]
+    """
+
+MODES = {"headless": ["FBXAnimationExporter"],
+         "eager": ["FBXAnimationExporter", "FBXExporterUI", "FBXOptionPresets", "FBXCurveBake",
+                   "FBXExportManifest", "FBXExportRig", "FBXAnimLayerState"]}
+
+UI_COMMANDS = ["window", "showWindow", "deleteUI", "formLayout", "scriptJob"]
+
+
+class StubMaya(object):
+    """ Anything of a maya module: every attribute is a stub, calls are recorded by name """
+
+    def __init__(self, name, calls):
+        self._name = name
+        self._calls = calls
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return StubMaya(self._name + "." + name, self._calls)
+
+    def __call__(self, *args, **kwargs):
+        self._calls.append(self._name)
+        return StubMaya(self._name + "()", self._calls)
+
+
+class StubModule(types.ModuleType):
+
+    def __init__(self, name, calls):
+        types.ModuleType.__init__(self, name)
+        self._calls = calls
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return StubMaya(self.__name__ + "." + name, self._calls)
+
+
+def installStubMaya():
+    """ Put stub maya modules in sys.modules, return the list the calls are recorded in """
+    calls = []
+    maya = StubModule("maya", calls)
+    sys.modules["maya"] = maya
+
+    for curName in ["cmds", "mel", "OpenMaya", "OpenMayaMPx", "OpenMayaAnim", "utils"]:
+        module = StubModule("maya." + curName, calls)
+        sys.modules["maya." + curName] = module
+        setattr(maya, curName, module)
+
+    return calls
+
+
+def runChild(mode):
+    """ Import the modules of the mode with stub maya, print the seconds, UI calls and loaded modules as json """
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    calls = installStubMaya()
+
+    startTime = time.time()
+    for curModule in MODES[mode]:
+        __import__(curModule)
+    seconds = time.time() - startTime
+
+    print(json.dumps({"seconds": seconds,
+                      "uiCalls": [curCall for curCall in calls if curCall.split(".")[-1] in UI_COMMANDS],
+                      "uiLoaded": "FBXExporterUI" in sys.modules,
+                      "numpyLoaded": "numpy" in sys.modules}))
+
+
+def measure(mode, runs):
+    """ Return the median import seconds of the mode over runs new processes and the last result """
+    results = []
+    for i in range(runs):
+        output = subprocess.check_output([sys.executable, os.path.abspath(__file__), "--child", mode])
+        results.append(json.loads(output.decode("utf-8").strip().splitlines()[-1]))
+
+    seconds = sorted(curResult["seconds"] for curResult in results)
+    return seconds[len(seconds) // 2], results[-1]
+
+
+def printImportTime(mode):
+    """ Print the -X importtime lines of the exporter modules and numpy, python 3.7 and later """
+    if sys.version_info < (3, 7):
+        return
+
+    process = subprocess.Popen([sys.executable, "-X", "importtime", os.path.abspath(__file__), "--child", mode],
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    output, errors = process.communicate()
+    for curLine in errors.decode("utf-8").splitlines():
+        name = curLine.rsplit("|", 1)[-1].strip()
+        if name.startswith("FBX") or name == "numpy":
+            print("    " + curLine.split(":", 1)[-1].strip())
+
+
+def benchmark(runs=15):
+    """ Print the median import time of the headless and eager modes, return True if headless loaded no UI """
+    headlessSeconds, headless = measure("headless", runs)
+    eagerSeconds, eager = measure("eager", runs)
+
+    print("headless: %.1fms (numpy loaded: %s)" % (headlessSeconds * 1000.0, headless["numpyLoaded"]))
+    printImportTime("headless")
+    print("eager:    %.1fms (numpy loaded: %s)" % (eagerSeconds * 1000.0, eager["numpyLoaded"]))
+    printImportTime("eager")
+    print("headless import is %.1fx faster" % (eagerSeconds / max(headlessSeconds, 1e-9)))
+
+    clean = not headless["uiCalls"] and not headless["uiLoaded"]
+    print("headless UI calls: %s, FBXExporterUI loaded: %s" % (headless["uiCalls"] or "none", headless["uiLoaded"]))
+    return clean
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        runChild(sys.argv[2])
+    else:
+        benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 15)
@@ -0,0 +1,147 @@
+""" FBX export option presets for FBXAnimationExporter
+
+    move to maya scripts folder, next to FBXAnimationExporter.py
+
+    The presets are the settings of the SetFBXExportOptions_* procs of
+    FBXAnimationExporter_FBXOptions.mel, written as data. The options applied last are
+    remembered, applying a preset only issues the FBXExport* commands whose value changed,
+    so consecutive clips with the same preset issue none.
+
+    The applied state lives for the Maya session, it can't see the options changed by something
+    else (the FBX export dialog, other scripts), so exportFBXAnimation and exportFBXCharacter
+    call resetOptionState when they start and only the clips of one call share the state.
+
+    The mel file is still sourced, on the first preset applied, for scripts calling its procs.
+
+    Nothing is imported from Maya until an option is issued, check the command counts with:
+    python -c "import FBXOptionPresets; FBXOptionPresets.checkIssuedCommands()"
+    """
+
+OPTIONS_MEL = "FBXAnimationExporter_FBXOptions.mel"
+
+# (FBXExport command, value), "{start}" and "{end}" are filled with the frame range
+PRESETS = {
+    "animation": [("FBXExportAnimationOnly", 0),
+                  ("FBXExportBakeComplexAnimation", 1),
+                  ("FBXExportBakeComplexStart", "{start}"),
+                  ("FBXExportBakeComplexEnd", "{end}"),
+                  ("FBXExportBakeResampleAnimation", 1),
+                  ("FBXExportConstraints", 0),
+                  ("FBXExportInputConnections", 0),
+                  ("FBXExportShapes", 1),
+                  ("FBXExportSmoothMesh", 1)],
+
+    # the mel proc sets FBXExportConstraints to 1 and then 0, 0 is what stays
+    "model": [("FBXExportSkins", 1),
+              ("FBXExportShapes", 1),
+              ("FBXExportSmoothingGroups", 1),
+              ("FBXExportSmoothMesh", 1),
+              ("FBXExportAnimationOnly", 0),
+              ("FBXExportBakeComplexAnimation", 0),
+              ("FBXExportBakeComplexStart", 0),
+              ("FBXExportBakeComplexEnd", 1),
+              ("FBXExportBakeResampleAnimation", 1),
+              ("FBXExportConstraints", 0),
+              ("FBXExportInputConnections", 0)]
+}
+
+_optionState = None
+_melSourced = False
+
+
+def presetOptions(presetName, start=0, end=1):
+    """ Return the [(command, value)] of the preset, frames are whole numbers like the mel procs take """
+    frames = {"{start}": int(round(start)), "{end}": int(round(end))}
+    return [(command, frames.get(value, value)) for command, value in PRESETS[presetName]]
+
+
+def _melEval(command):
+    import maya.mel as mel
+    return mel.eval(command)
+
+
+class OptionState(object):
+    """ The FBX options applied so far, issues only the commands whose value changes
+
+        Procedure: evaluator runs one mel command, mel.eval by default.
+            issued and skipped count the commands over all the applies
+    """
+
+    def __init__(self, evaluator=None):
+        self.evaluator = evaluator or _melEval
+        self.applied = {}
+        self.issued = 0
+        self.skipped = 0
+
+    def apply(self, options):
+        """ Issue the options that differ from the applied state, return how many were issued """
+        issued = 0
+        for command, value in options:
+            if self.applied.get(command) == value:
+                self.skipped += 1
+                continue
+            self.evaluator("%s -v %s;" % (command, value))
+            self.applied[command] = value
+            issued += 1
+
+        self.issued += issued
+        return issued
+
+    def reset(self):
+        self.applied = {}
+
+
+def getOptionState():
+    global _optionState
+
+    if _optionState is None:
+        _optionState = OptionState()
+    return _optionState
+
+
+def resetOptionState():
+    """ Forget the applied options, the next preset issues all of its commands """
+    getOptionState().reset()
+
+
+def sourceOptionProcs():
+    """ Source the mel procs once, they are not needed by the exporter anymore """
+    global _melSourced
+
+    if not _melSourced:
+        _melEval('source "' + OPTIONS_MEL + '"')
+        _melSourced = True
+
+
+def applyOptions(options):
+    """ Apply the options of presetOptions, return the number of commands issued """
+    sourceOptionProcs()
+    return getOptionState().apply(options)
+
+
+def applyPreset(presetName, start=0, end=1):
+    return applyOptions(presetOptions(presetName, start, end))
+
+
+def checkIssuedCommands(clips=100):
+    """ Count the commands issued for clips with the same preset and for alternating presets
+
+        Procedure: an OptionState with a counting stub instead of mel.eval,
+            print and return (same preset count, alternating count)
+    """
+    commands = []
+    state = OptionState(commands.append)
+    for i in range(clips):
+        state.apply(presetOptions("animation", 1, 120))
+    samePreset = len(commands)
+
+    del commands[:]
+    state.reset()
+    for i in range(clips):
+        state.apply(presetOptions("animation" if i % 2 else "model", 1, 120))
+    alternating = len(commands)
+
+    full = clips * len(PRESETS["animation"])
+    print("%d clips, same preset: %d commands issued (%d without the state)" % (clips, samePreset, full))
+    print("%d clips, alternating animation / model: %d commands issued" % (clips, alternating))
+    return samePreset, alternating
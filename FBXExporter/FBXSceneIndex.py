@@ -0,0 +1,307 @@
+import time
+
+import maya.cmds as cmds
+import maya.OpenMaya as OpenMaya
+
+""" Scene index for FBXAnimationExporter
+
+    move to maya scripts folder, next to FBXAnimationExporter.py
+
+    The exporter asks the same questions over and over (where is the origin of a namespace,
+    which export nodes hang from it, what is tagged as garbage...). Answering them with cmds
+    means one command per node and per query. The index walks the dependency graph once with
+    MItDependencyNodes and answers every lookup from memory until the scene changes.
+
+    The index is rebuilt lazily: DG callbacks (node added/removed/renamed, connections to the
+    export attributes made or broken, scene opened) only mark it dirty, the next query
+    rebuilds it. Other connections only forget the blendShape meshes found so far.
+    """
+
+# connections to these attributes change the lookup tables, any other only the blendShape meshes
+INDEX_ATTRS = ["exportNode", "exportMeshes"]
+
+
+def _namespaceOf(name):
+    """ Return the namespace of a node name without the trailing colon, "" for the root namespace """
+    return name.rpartition(":")[0]
+
+
+def _nodeName(handle):
+    """ Return the name of the node the way cmds returns it, None if the node is gone """
+    if not handle.isValid():
+        return None
+
+    obj = handle.object()
+    if obj.hasFn(OpenMaya.MFn.kDagNode):
+        return OpenMaya.MFnDagNode(obj).partialPathName()
+    return OpenMaya.MFnDependencyNode(obj).name()
+
+
+def _connectedNodes(plug, asDestination):
+    """ Return the handles of the nodes connected to the given plug """
+    connections = OpenMaya.MPlugArray()
+    plug.connectedTo(connections, asDestination, not asDestination)
+    return [OpenMaya.MObjectHandle(connections[i].node()) for i in range(connections.length())]
+
+
+class SceneIndex(object):
+    """ Lookup tables for the exporter built in a single pass over the dependency graph
+
+        Procedure: iterate every node once, remember the origin joints per namespace,
+            the export nodes connected to each origin, the transforms tagged as garbage,
+            the meshes connected to each export node and the blendShapes per namespace
+
+        Presumption: attribute names match the ones the exporter tags nodes with
+    """
+
+    def __init__(self):
+        self.dirty = True
+        self._callbackIds = []
+
+        self._origins = []
+        self._exportNodes = {}
+        self._exportMeshes = {}
+        self._garbage = []
+        self._blendShapes = {}
+        self._blendShapeMeshes = {}
+
+    #############################
+    #
+    #    Build
+    #
+    #############################
+
+    def invalidate(self, *args):
+        self.dirty = True
+
+    def _connectionChanged(self, sourcePlug, destPlug, made, clientData):
+        for curPlug in (sourcePlug, destPlug):
+            if curPlug.partialName(False, False, False, False, False, True) in INDEX_ATTRS:
+                self.dirty = True
+                return
+        self._blendShapeMeshes = {}
+
+    def rebuild(self):
+        self._origins = []
+        self._exportNodes = {}
+        self._exportMeshes = {}
+        self._garbage = []
+        self._blendShapes = {}
+        self._blendShapeMeshes = {}
+
+        nodeFn = OpenMaya.MFnDependencyNode()
+        nodeIterator = OpenMaya.MItDependencyNodes()
+
+        while not nodeIterator.isDone():
+            obj = nodeIterator.thisNode()
+            nodeFn.setObject(obj)
+
+            if obj.hasFn(OpenMaya.MFn.kTransform):
+                if obj.hasFn(OpenMaya.MFn.kJoint) and nodeFn.hasAttribute("origin"):
+                    if nodeFn.findPlug("origin").asBool():
+                        self._addOrigin(obj, nodeFn)
+
+                if nodeFn.hasAttribute("deleteMe"):
+                    self._garbage.append(OpenMaya.MObjectHandle(obj))
+
+                if nodeFn.hasAttribute("exportMeshes"):
+                    meshes = _connectedNodes(nodeFn.findPlug("exportMeshes"), False)
+                    if meshes:
+                        self._exportMeshes[OpenMaya.MFnDagNode(obj).partialPathName()] = meshes
+
+            elif obj.hasFn(OpenMaya.MFn.kBlendShape):
+                namespace = _namespaceOf(nodeFn.name())
+                self._blendShapes.setdefault(namespace, []).append(OpenMaya.MObjectHandle(obj))
+
+            nodeIterator.next()
+
+        self.dirty = False
+
+    def _addOrigin(self, obj, nodeFn):
+        name = OpenMaya.MFnDagNode(obj).partialPathName()
+        self._origins.append((_namespaceOf(nodeFn.name()), OpenMaya.MObjectHandle(obj)))
+
+        if nodeFn.hasAttribute("exportNode"):
+            self._exportNodes[name] = _connectedNodes(nodeFn.findPlug("exportNode"), False)
+
+    def _update(self):
+        if self.dirty:
+            self.rebuild()
+
+    #############################
+    #
+    #    Callbacks
+    #
+    #############################
+
+    def addCallbacks(self):
+        """ Register the DG callbacks that mark the index dirty """
+        if self._callbackIds:
+            return
+
+        self._callbackIds = [
+            OpenMaya.MDGMessage.addNodeAddedCallback(self.invalidate, "dependNode"),
+            OpenMaya.MDGMessage.addNodeRemovedCallback(self.invalidate, "dependNode"),
+            OpenMaya.MDGMessage.addConnectionCallback(self._connectionChanged),
+            OpenMaya.MNodeMessage.addNameChangedCallback(OpenMaya.MObject(), self.invalidate),
+            OpenMaya.MSceneMessage.addCallback(OpenMaya.MSceneMessage.kAfterOpen, self.invalidate),
+            OpenMaya.MSceneMessage.addCallback(OpenMaya.MSceneMessage.kAfterNew, self.invalidate),
+        ]
+
+    def removeCallbacks(self):
+        for curId in self._callbackIds:
+            OpenMaya.MMessage.removeCallback(curId)
+        self._callbackIds = []
+        self.dirty = True
+
+    #############################
+    #
+    #    Queries
+    #
+    #############################
+
+    def origin(self, namespace):
+        """ Return the origin joint of the namespace, any namespace if it is empty, "Error" if not found """
+        self._update()
+
+        for curNamespace, curHandle in self._origins:
+            if not namespace or curNamespace == namespace:
+                name = _nodeName(curHandle)
+                if name:
+                    return name
+        return "Error"
+
+    def exportNodes(self, origin):
+        """ Return the export nodes connected to the exportNode attribute of the origin """
+        self._update()
+        return [name for name in map(_nodeName, self._exportNodes.get(origin, [])) if name]
+
+    def connectedMeshes(self, exportNode):
+        """ Return the meshes connected to the exportMeshes attribute of the export node, None if there are none """
+        self._update()
+        meshes = [name for name in map(_nodeName, self._exportMeshes.get(exportNode, [])) if name]
+        return meshes or None
+
+    def garbage(self):
+        """ Return the transforms tagged as garbage, leaving out the ones under another garbage transform """
+        self._update()
+
+        paths = []
+        for curHandle in self._garbage:
+            if curHandle.isValid():
+                path = OpenMaya.MDagPath()
+                OpenMaya.MDagPath.getAPathTo(curHandle.object(), path)
+                paths.append(path.fullPathName())
+
+        pathSet = set(paths)
+        roots = []
+        for curPath in paths:
+            parents = curPath.split("|")
+            if not any(["|".join(parents[:i]) in pathSet for i in range(2, len(parents))]):
+                roots.append(curPath)
+        return roots
+
+    def blendShapeMeshes(self, namespace):
+        """ Return the mesh transforms downstream of the blendShapes of the namespace, each once
+
+            Procedure: walk downstream from every blendShape of the namespace, a node already
+                reached from another blendShape is pruned so the shared deformer chain is
+                walked once. Memoized per namespace until a connection changes
+        """
+        self._update()
+
+        if namespace not in self._blendShapeMeshes:
+            meshes = []
+            visited = set()
+            nodeFn = OpenMaya.MFnDependencyNode()
+
+            for curHandle in self._blendShapes.get(namespace, []):
+                if not curHandle.isValid():
+                    continue
+                graphIterator = OpenMaya.MItDependencyGraph(curHandle.object(), OpenMaya.MFn.kInvalid,
+                                                            OpenMaya.MItDependencyGraph.kDownstream,
+                                                            OpenMaya.MItDependencyGraph.kDepthFirst,
+                                                            OpenMaya.MItDependencyGraph.kNodeLevel)
+                while not graphIterator.isDone():
+                    obj = graphIterator.currentItem()
+                    nodeFn.setObject(obj)
+                    # names are unique for DG nodes, shapes use their full path
+                    key = OpenMaya.MFnDagNode(obj).fullPathName() if obj.hasFn(OpenMaya.MFn.kDagNode) else nodeFn.name()
+
+                    if key in visited:
+                        graphIterator.prune()
+                    else:
+                        visited.add(key)
+                        if obj.hasFn(OpenMaya.MFn.kMesh):
+                            meshes.append(OpenMaya.MFnDagNode(OpenMaya.MFnDagNode(obj).parent(0)).partialPathName())
+                    graphIterator.next()
+
+            self._blendShapeMeshes[namespace] = meshes
+
+        return list(self._blendShapeMeshes[namespace])
+
+
+_sceneIndex = None
+
+
+def getSceneIndex():
+    """ Return the shared scene index, creating it and its callbacks on first use """
+    global _sceneIndex
+
+    if _sceneIndex is None:
+        _sceneIndex = SceneIndex()
+        _sceneIndex.addCallbacks()
+    return _sceneIndex
+
+
+def invalidateSceneIndex():
+    """ Mark the shared index dirty, for changes the callbacks do not see (attribute values) """
+    if _sceneIndex is not None:
+        _sceneIndex.invalidate()
+
+
+#############################
+#
+#    Benchmark
+#
+#############################
+
+def _listHistoryMeshes(namespace):
+    """ The cmds lookup findMeshesWithBlendshapes used before the index, for comparison """
+    meshes = []
+    for curBlendShape in cmds.ls(namespace + ":*", type="blendShape") or []:
+        for curNode in cmds.listHistory(curBlendShape, future=True) or []:
+            if cmds.objectType(curNode) == "mesh":
+                meshes.append(cmds.listRelatives(curNode, parent=True)[0])
+    return meshes
+
+
+def benchmarkBlendShapes(blendShapes=20, targets=10, namespace="blendShapeBenchmark"):
+    """ Build a rig of blendShapes stacked on one face mesh and time both lookups
+
+        Procedure: the blendShapes share the deformer chain down to the face, like facial rigs,
+            print the time and the number of meshes found by each lookup. Works in a new scene
+    """
+    if not cmds.namespace(exists=namespace):
+        cmds.namespace(add=namespace)
+    face = cmds.polySphere(name=namespace + ":face")[0]
+    for i in range(blendShapes):
+        shapeTargets = [cmds.duplicate(face, name=namespace + ":target%d_%d" % (i, j))[0] for j in range(targets)]
+        cmds.blendShape(shapeTargets, face, name=namespace + ":blendShape%d" % i)
+
+    startTime = time.time()
+    oldMeshes = _listHistoryMeshes(namespace)
+    oldTime = time.time() - startTime
+
+    index = SceneIndex()
+    startTime = time.time()
+    newMeshes = index.blendShapeMeshes(namespace)
+    newTime = time.time() - startTime
+
+    startTime = time.time()
+    index.blendShapeMeshes(namespace)
+    cachedTime = time.time() - startTime
+
+    print("listHistory: %d meshes in %.4fs" % (len(oldMeshes), oldTime))
+    print("graph walk : %d meshes in %.4fs (index build included), cached %.6fs" % (len(newMeshes), newTime, cachedTime))
+    return oldTime, newTime
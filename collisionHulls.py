@@ -0,0 +1,217 @@
+""" Tight collision shapes for generateCollision
+
+    Oriented bounding box (PCA), bounding sphere (Ritter, refined) and convex hull with a
+    vertex budget, all computed on an (N, 3) point array. Every step is vectorized over the
+    points, the only python loops run over the few hull candidates.
+
+    Only numpy is needed, generateCollision gives it the world points of the meshes.
+
+    import collisionHulls
+    center, axes, halfExtents = collisionHulls.orientedBoundingBox(points)
+    center, radius = collisionHulls.boundingSphere(points)
+    vertices, triangles = collisionHulls.convexHull(points, 32)
+    """
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+EPSILON = 1e-9
+
+# points projected at once on the directions
+CHUNK_SIZE = 65536
+
+# directions whose extreme points the bounding sphere is fitted on
+SPHERE_DIRECTIONS = 64
+
+
+def isAvailable():
+    """ Return True if the shapes can be computed, they need numpy """
+    return numpy is not None
+
+
+def orientedBoundingBox(points):
+    """ Return center (3,), axes (3, 3) one axis per row, half extents (3,) of an oriented box
+
+        Procedure: the axes are the eigenvectors of the point covariance, the extents
+            the min and max of the points projected on them
+
+        Presumption: the axes are right handed so they can be used as a rotation
+    """
+    points = numpy.asarray(points, dtype=numpy.float64)
+    mean = points.mean(axis=0)
+    centered = points - mean
+
+    eigenValues, eigenVectors = numpy.linalg.eigh(numpy.dot(centered.T, centered) / len(points))
+    axes = eigenVectors[:, ::-1].T
+    if numpy.linalg.det(axes) < 0.0:
+        axes[2] *= -1.0
+
+    projected = numpy.dot(centered, axes.T)
+    low = projected.min(axis=0)
+    high = projected.max(axis=0)
+
+    center = mean + numpy.dot((low + high) / 2.0, axes)
+    return center, axes, (high - low) / 2.0
+
+
+def fibonacciDirections(count):
+    """ Return (count, 3) unit directions spread evenly over the sphere """
+    indices = numpy.arange(count) + 0.5
+    height = 1.0 - 2.0 * indices / count
+    ring = numpy.sqrt(1.0 - height * height)
+    angle = numpy.pi * (1.0 + 5.0 ** 0.5) * indices
+    return numpy.stack([ring * numpy.cos(angle), height, ring * numpy.sin(angle)], axis=1)
+
+
+def extremeIndices(points, directions):
+    """ Return the index of the farthest point along each direction
+
+        Procedure: the points are projected a chunk at a time so the (chunk, directions)
+            product stays small, the best of every chunk is kept
+    """
+    bestValues = numpy.full(len(directions), -numpy.inf)
+    bestIndices = numpy.zeros(len(directions), dtype=numpy.int64)
+
+    for start in range(0, len(points), CHUNK_SIZE):
+        # one row per direction, argmax along the rows is much faster than along the columns
+        projected = numpy.dot(directions, points[start:start + CHUNK_SIZE].T)
+        chunkIndices = numpy.argmax(projected, axis=1)
+        chunkValues = projected[numpy.arange(len(directions)), chunkIndices]
+        better = chunkValues > bestValues
+        bestValues[better] = chunkValues[better]
+        bestIndices[better] = chunkIndices[better] + start
+
+    return bestIndices
+
+
+def boundingSphere(points, iterations=32):
+    """ Return center (3,), radius of a sphere holding every point
+
+        Procedure: the sphere only depends on the points of the hull, it is fitted on the
+            extreme points in SPHERE_DIRECTIONS directions: Ritter's sphere from two far
+            apart points, grown to the farthest point outside until none is left, then the
+            center is moved towards the farthest point while that makes the sphere smaller.
+            One last pass over all points sets the radius so every point is inside
+    """
+    points = numpy.asarray(points, dtype=numpy.float64)
+    candidates = points[numpy.unique(extremeIndices(points, fibonacciDirections(SPHERE_DIRECTIONS)))]
+
+    first = candidates[numpy.argmax(numpy.sum((candidates - candidates[0]) ** 2, axis=1))]
+    second = candidates[numpy.argmax(numpy.sum((candidates - first) ** 2, axis=1))]
+    center = (first + second) / 2.0
+    radius = numpy.linalg.norm(second - first) / 2.0
+
+    while True:
+        distances = numpy.linalg.norm(candidates - center, axis=1)
+        farthest = numpy.argmax(distances)
+        if distances[farthest] <= radius * (1.0 + EPSILON):
+            break
+        newRadius = (radius + distances[farthest]) / 2.0
+        center = center + (candidates[farthest] - center) * ((newRadius - radius) / distances[farthest])
+        radius = newRadius
+
+    step = 0.5
+    for i in range(iterations):
+        distances = numpy.linalg.norm(candidates - center, axis=1)
+        candidate = center + (candidates[numpy.argmax(distances)] - center) * step
+        candidateRadius = numpy.linalg.norm(candidates - candidate, axis=1).max()
+        if candidateRadius < radius:
+            center, radius = candidate, candidateRadius
+        else:
+            step /= 2.0
+
+    offsets = points - center
+    return center, numpy.sqrt(numpy.einsum("ij,ij->i", offsets, offsets).max())
+
+
+def supportPoints(points, maxVertices):
+    """ Return at most maxVertices points of the hull, the extreme point in evenly spread directions
+
+        Procedure: this is the simplification, the hull of these points is inside the real
+            hull and touches it in every direction. The extreme points of 2 * maxVertices
+            directions are found in one pass, all of them are used if they fit in the budget,
+            else the ones of every 2nd direction
+    """
+    points = numpy.asarray(points, dtype=numpy.float64)
+    extreme = extremeIndices(points, fibonacciDirections(2 * maxVertices))
+
+    chosen = numpy.unique(extreme)
+    if len(chosen) > maxVertices:
+        chosen = numpy.unique(extreme[::2])
+
+    return points[chosen[:maxVertices]]
+
+
+def quickHull(points):
+    """ Return vertices (M, 3), triangles (F, 3) of the convex hull of a few points, outward facing
+
+        Procedure: start from a tetrahedron of extreme points, add the farthest outside point of
+            a face at a time, the faces it sees are replaced by a fan to their horizon
+
+        Presumption: the points are not all on a plane, returns None if they are
+    """
+    points = numpy.asarray(points, dtype=numpy.float64)
+    scale = max(numpy.ptp(points, axis=0).max(), EPSILON)
+    tolerance = scale * 1e-9
+
+    a = int(numpy.argmin(points[:, 0]))
+    b = int(numpy.argmax(numpy.linalg.norm(points - points[a], axis=1)))
+    lineDistances = numpy.linalg.norm(numpy.cross(points - points[a], points[b] - points[a]), axis=1)
+    c = int(numpy.argmax(lineDistances))
+    normal = numpy.cross(points[b] - points[a], points[c] - points[a])
+    planeDistances = numpy.dot(points - points[a], normal)
+    d = int(numpy.argmax(numpy.abs(planeDistances)))
+    if abs(planeDistances[d]) <= tolerance * numpy.linalg.norm(normal) or lineDistances[c] <= tolerance:
+        return None
+
+    if planeDistances[d] > 0.0:
+        b, c = c, b
+    faces = [(a, b, c), (a, d, b), (b, d, c), (c, d, a)]
+
+    def plane(face):
+        normal = numpy.cross(points[face[1]] - points[face[0]], points[face[2]] - points[face[0]])
+        normal /= numpy.linalg.norm(normal)
+        return normal, numpy.dot(normal, points[face[0]])
+
+    remaining = numpy.setdiff1d(numpy.arange(len(points)), [a, b, c, d])
+
+    while len(remaining):
+        planes = [plane(face) for face in faces]
+        normals = numpy.array([normal for normal, offset in planes])
+        offsets = numpy.array([offset for normal, offset in planes])
+        heights = numpy.dot(points[remaining], normals.T) - offsets
+
+        outside = heights.max(axis=1) > tolerance
+        remaining = remaining[outside]
+        heights = heights[outside]
+        if not len(remaining):
+            break
+
+        eye = int(numpy.argmax(heights.max(axis=1)))
+        visible = set(numpy.nonzero(heights[eye] > tolerance)[0].tolist())
+
+        edges = set()
+        for i in visible:
+            face = faces[i]
+            for edge in ((face[0], face[1]), (face[1], face[2]), (face[2], face[0])):
+                if (edge[1], edge[0]) in edges:
+                    edges.remove((edge[1], edge[0]))
+                else:
+                    edges.add(edge)
+
+        point = int(remaining[eye])
+        faces = [face for i, face in enumerate(faces) if i not in visible] + [(e0, e1, point) for e0, e1 in edges]
+        remaining = numpy.delete(remaining, eye)
+
+    used = numpy.unique(numpy.array(faces).ravel())
+    remap = numpy.zeros(len(points), dtype=numpy.int64)
+    remap[used] = numpy.arange(len(used))
+    return points[used], remap[numpy.array(faces)]
+
+
+def convexHull(points, maxVertices=32):
+    """ Return vertices, triangles of a convex hull with at most maxVertices vertices, see quickHull """
+    return quickHull(supportPoints(points, max(maxVertices, 4)))
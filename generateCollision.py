@@ -1,5 +1,23 @@
 import maya.cmds as cmds
+import maya.OpenMaya as OpenMaya
+import ctypes
 import logging
+import time
+
+import collisionHulls
+
+GROUP_NAME = "collision_COL"
+
+# mode -> poly creator node and its fixed attributes
+CREATORS = {"box": ("polyCube", {}),
+            "sphere": ("polySphere", {"subdivisionsAxis": 10, "subdivisionsHeight": 10}),
+            "cylinder": ("polyCylinder", {"subdivisionsAxis": 12, "subdivisionsHeight": 1, "subdivisionsCaps": 1}),
+            "orientedBox": ("polyCube", {}),
+            "tightSphere": ("polySphere", {"subdivisionsAxis": 10, "subdivisionsHeight": 10}),
+            "hull": (None, {})}
+
+# modes fitted on the mesh points with collisionHulls, they need numpy
+POINT_MODES = ["orientedBox", "tightSphere", "hull"]
 
 def generateCollisionUI():
     window_name = "collisionUI"
@@ -14,17 +32,32 @@ def generateCollisionUI():
     cmds.button(label="Sphere", c=generateSphere)
     cmds.button(label="Box", c=generateBox)
     cmds.button(label="Cylinder", c=generateCylinder)
+    cmds.separator()
+    cmds.button(label="Oriented Box", c=lambda *args: generateCollisionBatch("orientedBox"))
+    cmds.button(label="Tight Sphere", c=lambda *args: generateCollisionBatch("tightSphere"))
+    cmds.button(label="Convex Hull", c=lambda *args: generateCollisionBatch("hull", cmds.intField("collisionHullBudget", q=True, value=True)))
+    cmds.rowLayout(numberOfColumns=2)
+    cmds.text(label="Hull vertices")
+    cmds.intField("collisionHullBudget", value=32, minValue=4)
+    cmds.setParent("..")
+    cmds.checkBox("collisionBatchBox", label="Whole selection", value=True)
     
     cmds.showWindow(my_window)
     
 def generateBox(unused=None):
-    generateCollision("box")
+    generateFromUI("box")
     
 def generateSphere(unused=None):
-    generateCollision("sphere")
+    generateFromUI("sphere")
     
 def generateCylinder(unused=None):
-    generateCollision("cylinder")
+    generateFromUI("cylinder")
+
+def generateFromUI(mode):
+    if cmds.checkBox("collisionBatchBox", q=True, value=True):
+        generateCollisionBatch(mode)
+    else:
+        generateCollision(mode)
 
 def generateCollision(mode="sphere"):
     
@@ -59,4 +92,240 @@ def generateCollision(mode="sphere"):
     
     cmds.xform(mesh, ws=True, t=[xPos,yPos,zPos])
 
-generateCollisionUI() 
\ No newline at end of file
+#############################
+#
+#    Batch
+#
+#############################
+
+def selectedMeshes():
+    """ Return [(name without namespace, [mesh shape dag paths])] of the selected objects with meshes """
+    selection = OpenMaya.MSelectionList()
+    OpenMaya.MGlobal.getActiveSelectionList(selection)
+    
+    meshes = []
+    selIter = OpenMaya.MItSelectionList(selection, OpenMaya.MFn.kDagNode)
+    
+    while not selIter.isDone():
+        dagPath = OpenMaya.MDagPath()
+        selIter.getDagPath(dagPath)
+        
+        shapes = []
+        if dagPath.hasFn(OpenMaya.MFn.kMesh) and not dagPath.hasFn(OpenMaya.MFn.kTransform):
+            shapes.append(dagPath)
+            dagPath = OpenMaya.MDagPath(dagPath)
+            dagPath.pop()
+        else:
+            dagFn = OpenMaya.MFnDagNode(dagPath)
+            for i in range(dagFn.childCount()):
+                child = dagFn.child(i)
+                if child.hasFn(OpenMaya.MFn.kMesh) and not OpenMaya.MFnDagNode(child).isIntermediateObject():
+                    shapePath = OpenMaya.MDagPath(dagPath)
+                    shapePath.push(child)
+                    shapes.append(shapePath)
+        
+        if shapes:
+            meshes.append((OpenMaya.MFnDependencyNode(dagPath.node()).name().rpartition(":")[2], shapes))
+        selIter.next()
+    
+    return meshes
+
+def worldBoundingBox(shapes):
+    """ Return the world axis aligned MBoundingBox of the mesh shapes """
+    bbox = OpenMaya.MBoundingBox()
+    for shapePath in shapes:
+        shapeBox = OpenMaya.MBoundingBox(OpenMaya.MFnDagNode(shapePath).boundingBox())
+        shapeBox.transformUsing(shapePath.inclusiveMatrix())
+        bbox.expand(shapeBox)
+    return bbox
+
+def primitiveFromBox(mode, bbox):
+    """ Return the primitive fitting an axis aligned box, as generateCollision """
+    width, height, depth = bbox.width(), bbox.height(), bbox.depth()
+    
+    if mode == "box":
+        attributes = {"width": width, "height": height, "depth": depth}
+    elif mode == "sphere":
+        attributes = {"radius": max([width, height, depth])/2}
+    else:
+        attributes = {"radius": max([width, depth])/2, "height": height}
+    
+    center = bbox.center()
+    return {"creator": mode, "attributes": attributes, "translate": (center.x, center.y, center.z)}
+
+def worldPoints(shapes):
+    """ Return the (N, 3) numpy array of the world space vertices of the mesh shapes
+    
+        Procedure: the raw float buffer of each mesh is read as an array through ctypes, no
+            python float per vertex, and moved to world space with the inclusive matrix in one product
+    """
+    numpy = collisionHulls.numpy
+    arrays = []
+    for shapePath in shapes:
+        meshFn = OpenMaya.MFnMesh(shapePath)
+        rawPoints = ctypes.cast(int(meshFn.getRawPoints()), ctypes.POINTER(ctypes.c_float))
+        points = numpy.ctypeslib.as_array(rawPoints, shape=(meshFn.numVertices(), 3)).astype(numpy.float64)
+        
+        # maya matrices multiply row vectors, the translation is the last row
+        matrix = shapePath.inclusiveMatrix()
+        matrix = numpy.array([[matrix(row, column) for column in range(4)] for row in range(4)])
+        arrays.append(numpy.dot(points, matrix[:3, :3]) + matrix[3, :3])
+    return numpy.concatenate(arrays)
+
+def primitiveFromPoints(mode, points, hullVertices=32):
+    """ Return the primitive of a point mode fitted on the points, see collisionHulls """
+    if mode == "orientedBox":
+        center, axes, halfExtents = collisionHulls.orientedBoundingBox(points)
+        width, height, depth = (2.0 * halfExtents).tolist()
+        # the axes are the rows of the rotation matrix
+        values = []
+        for curAxis in axes.tolist():
+            values.extend(curAxis + [0.0])
+        values.extend([0.0, 0.0, 0.0, 1.0])
+        matrix = OpenMaya.MMatrix()
+        OpenMaya.MScriptUtil.createMatrixFromList(values, matrix)
+        rotation = OpenMaya.MTransformationMatrix(matrix).eulerRotation()
+        return {"creator": "orientedBox", "attributes": {"width": width, "height": height, "depth": depth},
+                "translate": tuple(center.tolist()), "rotate": (rotation.x, rotation.y, rotation.z)}
+    
+    if mode == "tightSphere":
+        center, radius = collisionHulls.boundingSphere(points)
+        return {"creator": "tightSphere", "attributes": {"radius": float(radius)}, "translate": tuple(center.tolist())}
+    
+    hull = collisionHulls.convexHull(points, hullVertices)
+    if hull is None:
+        # flat mesh, no volume to wrap, it gets the oriented box and its creator
+        return primitiveFromPoints("orientedBox", points)
+    return {"hull": hull, "translate": (0.0, 0.0, 0.0)}
+
+def getCollisionGroup(modifier):
+    """ Return the collision group MObject, created with the modifier if it is not in the scene """
+    if cmds.objExists(GROUP_NAME):
+        selection = OpenMaya.MSelectionList()
+        selection.add(GROUP_NAME)
+        group = OpenMaya.MObject()
+        selection.getDependNode(0, group)
+        return group
+    
+    group = modifier.createNode("transform")
+    modifier.renameNode(group, GROUP_NAME)
+    return group
+
+def createPrimitives(primitives):
+    """ Create the collision meshes under the collision group with one MDagModifier
+    
+        Procedure: first doIt creates the group, transforms, shapes and creator nodes,
+            second doIt sets the creator attributes and transforms and connects the creators
+            to the shapes, hulls are meshes created afterwards. One sets command puts all the meshes in the default shading group
+    
+        Presumption: primitives are (name, primitive), a primitive has its "creator" (a CREATORS
+            mode, a flat mesh in hull mode gets the orientedBox one), the creator "attributes",
+            "translate" and optional "rotate" (radians), or a "hull" (vertices, triangles)
+            in world space
+    """
+    modifier = OpenMaya.MDagModifier()
+    group = getCollisionGroup(modifier)
+    
+    created = []
+    for name, primitive in primitives:
+        transform = modifier.createNode("transform", group)
+        modifier.renameNode(transform, name + "_COL")
+        if "hull" in primitive:
+            # hulls are meshes of their own, created with MFnMesh once the transform exists
+            created.append((transform, None, None))
+            continue
+        shape = modifier.createNode("mesh", transform)
+        creatorType = CREATORS[primitive["creator"]][0]
+        creator = OpenMaya.MDGModifier.createNode(modifier, creatorType) # dependency node, no parent
+        modifier.renameNode(shape, name + "_COLShape")
+        created.append((transform, shape, creator))
+    modifier.doIt()
+    
+    for (name, primitive), (transform, shape, creator) in zip(primitives, created):
+        transformFn = OpenMaya.MFnDependencyNode(transform)
+        for curAttr, curValue in zip(["translateX", "translateY", "translateZ"], primitive["translate"]):
+            modifier.newPlugValueDouble(transformFn.findPlug(curAttr), curValue)
+        for curAttr, curValue in zip(["rotateX", "rotateY", "rotateZ"], primitive.get("rotate", [])):
+            modifier.newPlugValueDouble(transformFn.findPlug(curAttr), curValue)
+        
+        if creator is None:
+            continue
+        creatorFn = OpenMaya.MFnDependencyNode(creator)
+        for curAttr, curValue in CREATORS[primitive["creator"]][1].items():
+            modifier.newPlugValueInt(creatorFn.findPlug(curAttr), curValue)
+        for curAttr, curValue in primitive["attributes"].items():
+            modifier.newPlugValueDouble(creatorFn.findPlug(curAttr), curValue)
+        
+        modifier.connect(creatorFn.findPlug("output"), OpenMaya.MFnDependencyNode(shape).findPlug("inMesh"))
+    modifier.doIt()
+    
+    meshes = []
+    for (name, primitive), (transform, shape, creator) in zip(primitives, created):
+        if shape is None:
+            shape = createHullMesh(primitive["hull"], transform)
+            OpenMaya.MFnDependencyNode(shape).setName(name + "_COLShape")
+        meshes.append(OpenMaya.MFnDagNode(shape).fullPathName())
+    
+    if meshes:
+        cmds.sets(meshes, e=True, forceElement="initialShadingGroup")
+    return meshes
+
+def createHullMesh(hull, transform):
+    """ Create the mesh of (vertices, triangles) under the transform, return the shape """
+    vertices, triangles = hull
+    
+    points = OpenMaya.MFloatPointArray()
+    for curVertex in vertices.tolist():
+        points.append(OpenMaya.MFloatPoint(*curVertex))
+    counts = OpenMaya.MIntArray()
+    connects = OpenMaya.MIntArray()
+    for curTriangle in triangles.tolist():
+        counts.append(3)
+        for curIndex in curTriangle:
+            connects.append(curIndex)
+    
+    meshFn = OpenMaya.MFnMesh()
+    meshFn.create(points.length(), counts.length(), points, counts, connects, transform)
+    return meshFn.object()
+
+def generateCollisionBatch(mode="sphere", hullVertices=32):
+    """ Generate the collision of every selected mesh, return the collision mesh shapes
+    
+        Presumption: hullVertices is the vertex budget of the hull mode
+    """
+    if mode in POINT_MODES and not collisionHulls.isAvailable():
+        logging.error("numpy is needed for the " + mode + " collision")
+        return []
+    
+    startTime = time.time()
+    meshes = selectedMeshes()
+    
+    if not meshes:
+        logging.error("Please Select Something")
+        return []
+    
+    primitives = []
+    objectTimes = []
+    for name, shapes in meshes:
+        objectStart = time.time()
+        if mode in POINT_MODES:
+            primitive = primitiveFromPoints(mode, worldPoints(shapes), hullVertices)
+        else:
+            primitive = primitiveFromBox(mode, worldBoundingBox(shapes))
+        primitives.append((name, primitive))
+        objectTimes.append(time.time() - objectStart)
+    
+    createStart = time.time()
+    collisions = createPrimitives(primitives)
+    createTime = time.time() - createStart
+    totalTime = time.time() - startTime
+    
+    # printed after the loop, the script editor output would slow the fit down
+    for (name, primitive), objectTime in zip(primitives, objectTimes):
+        print "%s %s collision fit in %.5fs" % (name, mode, objectTime)
+    print "%d %s collisions in %.3fs (%.1f objects/s), fit %.5fs per object (max %.5fs), create %.3fs" % (
+        len(collisions), mode, totalTime, len(collisions) / max(totalTime, 1e-9),
+        sum(objectTimes) / len(objectTimes), max(objectTimes), createTime)
+    return collisions
+
+generateCollisionUI()
@@ -0,0 +1,389 @@
+import hashlib
+import mmap
+import struct
+import sys
+import time
+
+""" Output formats for the printHierarchy plugin
+
+    move to the maya plug-ins folder, next to printHierarchy.py
+
+    Every writer gets the nodes one by one in depth first order and writes them straight to
+    a buffered file, so memory does not grow with the scene. Nothing here needs Maya.
+
+    text   : the old printHierarchy lines, "----->" per depth level
+    jsonl  : one json object per node {"depth", "name", "type", "path"}
+    csv    : depth,name,type,path with a header line
+    binary : MAGIC, then per node a (depth, type index, name length, path length) header, the
+             name and the full path, a type is defined once by a record with depth TYPE_RECORD
+             before its first use. The path is written, not rebuilt from the depths, because
+             a -type filter leaves the ancestors out
+
+    snapshot : the hierarchy for change detection, see SnapshotWriter and diffSnapshots
+
+    run the benchmark and the binary round trip check on a generated hierarchy:
+    python hierarchyFormats.py
+    """
+
+FORMATS = ["text", "jsonl", "csv", "binary"]
+
+MAGIC = b"PHB2"
+RECORD = struct.Struct("<HHHI")
+TYPE_RECORD = 0xFFFF
+
+BUFFER_SIZE = 1 << 20
+
+
+class TextWriter(object):
+
+    binary = False
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def writeNode(self, depth, name, typeName, path):
+        self.stream.write("----->" * depth + "name: " + name + ", Type: " + typeName + ", Path: " + path + "\n")
+
+    def close(self):
+        self.stream.close()
+
+
+class JsonLinesWriter(TextWriter):
+
+    def writeNode(self, depth, name, typeName, path):
+        # maya names and paths never hold quotes or backslashes, no escaping needed
+        self.stream.write('{"depth": %d, "name": "%s", "type": "%s", "path": "%s"}\n' % (depth, name, typeName, path))
+
+
+class CsvWriter(TextWriter):
+
+    def __init__(self, stream):
+        TextWriter.__init__(self, stream)
+        self.stream.write("depth,name,type,path\n")
+
+    def writeNode(self, depth, name, typeName, path):
+        # maya names can't hold commas or quotes, no quoting needed
+        self.stream.write("%d,%s,%s,%s\n" % (depth, name, typeName, path))
+
+
+class BinaryWriter(object):
+
+    binary = True
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.types = {}
+        self.stream.write(MAGIC)
+
+    def writeNode(self, depth, name, typeName, path):
+        typeIndex = self.types.get(typeName)
+        if typeIndex is None:
+            typeIndex = self.types[typeName] = len(self.types)
+            encoded = typeName.encode("utf-8")
+            self.stream.write(RECORD.pack(TYPE_RECORD, typeIndex, len(encoded), 0) + encoded)
+
+        encodedName = name.encode("utf-8")
+        encodedPath = path.encode("utf-8")
+        self.stream.write(RECORD.pack(depth, typeIndex, len(encodedName), len(encodedPath)) + encodedName + encodedPath)
+
+    def close(self):
+        self.stream.close()
+
+
+WRITERS = {"text": TextWriter, "jsonl": JsonLinesWriter, "csv": CsvWriter, "binary": BinaryWriter}
+
+
+def openWriter(fileName, outputFormat):
+    """ Return the writer of the format on a buffered file """
+    writerClass = WRITERS[outputFormat]
+
+    if writerClass.binary or sys.version_info[0] < 3:
+        mode = "wb" if writerClass.binary else "w"
+        return writerClass(open(fileName, mode, BUFFER_SIZE))
+    return writerClass(open(fileName, "w", BUFFER_SIZE, encoding="utf-8", newline="\n"))
+
+
+def readBinary(fileName):
+    """ Yield (depth, name, type, path) of every node of a binary dump """
+    with open(fileName, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError("Not a printHierarchy binary file: " + fileName)
+
+        types = {}
+
+        while True:
+            header = f.read(RECORD.size)
+            if len(header) < RECORD.size:
+                break
+            depth, typeIndex, nameLength, pathLength = RECORD.unpack(header)
+            text = f.read(nameLength).decode("utf-8")
+
+            if depth == TYPE_RECORD:
+                types[typeIndex] = text
+                continue
+
+            yield depth, text, types[typeIndex], f.read(pathLength).decode("utf-8")
+
+
+#############################
+#
+#    Snapshots
+#
+#############################
+
+SNAPSHOT_MAGIC = b"PHS1"
+# magic, node count, offset of the type names, offset of the node records
+SNAPSHOT_HEADER = struct.Struct("<4sIQQ")
+# key, parent key, name hash, digest, type index, path offset, path length, sorted by key
+SNAPSHOT_RECORD = struct.Struct("<QQQQIII")
+
+CHANGES = ["added", "removed", "reparented", "modified"]
+
+
+_unpackHash = struct.Struct("<Q").unpack_from
+
+if hasattr(hashlib, "blake2b"):
+    def _digest(data):
+        return hashlib.blake2b(data, digest_size=8).digest()
+else:
+    def _digest(data):
+        return hashlib.md5(data).digest()
+
+
+def hash64(text):
+    """ Return a 64 bit hash of the text, stable between sessions, blake2b where there is one else md5 """
+    if not isinstance(text, bytes):
+        text = text.encode("utf-8")
+    return _unpackHash(_digest(text))[0]
+
+
+class SnapshotWriter(object):
+    """ Write a hashed hierarchy snapshot
+
+        Procedure: nodes are keyed by hash64 of an identity that survives renames and
+            reparenting (the node uuid and instance number in Maya), the caller keeps the
+            keys of the parents. Every record holds the key of its parent, the hash of its
+            name and of a digest text (transform, attributes), the paths are only kept to
+            report changes.
+            The paths are streamed to the file as they come, the fixed size records are
+            sorted by key and written at close so a reader can walk them straight from a mmap
+
+        File: header, path blob, type names joined by newlines, records
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.types = {}
+        self.records = []
+        self.pathOffset = 0
+        self.stream.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, 0, 0, 0))
+
+    def writeNode(self, key, parentKey, name, typeName, path, digest=""):
+        typeIndex = self.types.get(typeName)
+        if typeIndex is None:
+            typeIndex = self.types[typeName] = len(self.types)
+
+        encoded = path.encode("utf-8")
+        self.stream.write(encoded)
+        self.records.append((key, parentKey, hash64(name),
+                             hash64(digest) if digest else 0, typeIndex, self.pathOffset, len(encoded)))
+        self.pathOffset += len(encoded)
+
+    def close(self):
+        typesOffset = SNAPSHOT_HEADER.size + self.pathOffset
+        typeNames = sorted(self.types, key=self.types.get)
+        typesText = "\n".join(typeNames).encode("utf-8")
+        self.stream.write(typesText)
+
+        self.records.sort()
+        for curRecord in self.records:
+            self.stream.write(SNAPSHOT_RECORD.pack(*curRecord))
+
+        self.stream.seek(0)
+        self.stream.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, len(self.records), typesOffset,
+                                               typesOffset + len(typesText)))
+        self.stream.close()
+        self.records = []
+
+
+def openSnapshotWriter(fileName):
+    return SnapshotWriter(open(fileName, "wb", BUFFER_SIZE))
+
+
+class Snapshot(object):
+    """ A snapshot file mapped in memory, records are unpacked only when asked for
+
+        with Snapshot(fileName) as snapshot:
+            key, parentKey, nameHash, digest, typeIndex, pathOffset, pathLength = snapshot.record(i)
+    """
+
+    def __init__(self, fileName):
+        self.file = open(fileName, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.count, typesOffset, self.recordsOffset = SNAPSHOT_HEADER.unpack_from(self.map, 0)
+        if magic != SNAPSHOT_MAGIC:
+            self.close()
+            raise ValueError("Not a printHierarchy snapshot: " + fileName)
+
+        typesText = self.map[typesOffset:self.recordsOffset].decode("utf-8")
+        self.typeNames = typesText.split("\n") if typesText else []
+
+    def record(self, index):
+        return SNAPSHOT_RECORD.unpack_from(self.map, self.recordsOffset + index * SNAPSHOT_RECORD.size)
+
+    def path(self, record):
+        start = SNAPSHOT_HEADER.size + record[5]
+        return self.map[start:start + record[6]].decode("utf-8")
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def diffSnapshots(oldFileName, newFileName):
+    """ Yield (change, old path, new path) of the nodes that differ between two snapshots
+
+        Procedure: both record tables are sorted by key, one merge walk pairs the keys, O(N)
+            and only two records are unpacked at a time whatever the size of the scenes.
+            A node is reparented when its parent key changed (its children are not, they
+            only moved along), modified when its name, type or digest changed
+
+        Presumption: both snapshots were written with the same digest options
+    """
+    with Snapshot(oldFileName) as old:
+        with Snapshot(newFileName) as new:
+            oldIndex = newIndex = 0
+
+            while oldIndex < old.count or newIndex < new.count:
+                oldRecord = old.record(oldIndex) if oldIndex < old.count else None
+                newRecord = new.record(newIndex) if newIndex < new.count else None
+
+                if newRecord is None or (oldRecord is not None and oldRecord[0] < newRecord[0]):
+                    yield "removed", old.path(oldRecord), None
+                    oldIndex += 1
+                    continue
+                if oldRecord is None or newRecord[0] < oldRecord[0]:
+                    yield "added", None, new.path(newRecord)
+                    newIndex += 1
+                    continue
+
+                if oldRecord[1] != newRecord[1]:
+                    yield "reparented", old.path(oldRecord), new.path(newRecord)
+                if (oldRecord[2] != newRecord[2] or oldRecord[3] != newRecord[3] or
+                        old.typeNames[oldRecord[4]] != new.typeNames[newRecord[4]]):
+                    yield "modified", old.path(oldRecord), new.path(newRecord)
+                oldIndex += 1
+                newIndex += 1
+
+
+#############################
+#
+#    Benchmark
+#
+#############################
+
+def generateHierarchy(depth, width):
+    """ Yield (depth, name, type, path) of a synthetic tree, width children per node down to depth
+
+        Procedure: depth first like MItDag, generated on the fly so memory stays flat
+    """
+    yield 0, "world", "kWorld", ""
+    stack = [(1, "", i) for i in range(width - 1, -1, -1)]
+
+    while stack:
+        curDepth, parentPath, i = stack.pop()
+        name = "node_%d_%d" % (curDepth, i)
+        path = parentPath + "|" + name
+        yield curDepth, name, "kTransform" if curDepth < depth else "kMesh", path
+        if curDepth < depth:
+            stack.extend((curDepth + 1, path, j) for j in range(width - 1, -1, -1))
+
+
+def benchmark(fileName, depth=6, width=8):
+    """ Write a generated depth x width hierarchy in every format and print nodes per second """
+    for curFormat in FORMATS:
+        startTime = time.time()
+        writer = openWriter(fileName + "." + curFormat, curFormat)
+        count = 0
+        for curNode in generateHierarchy(depth, width):
+            writer.writeNode(*curNode)
+            count += 1
+        writer.close()
+
+        seconds = time.time() - startTime
+        print("%-6s %d nodes in %.3fs (%d nodes/s)" % (curFormat, count, seconds, count / max(seconds, 1e-9)))
+
+
+def checkBinaryRoundTrip(fileName, depth=4, width=4, typeName="kMesh"):
+    """ Write a generated hierarchy filtered on a type like -type does, read it back, return True if it is the same
+
+        Procedure: only the nodes of typeName are written, so none of their ancestors are
+            in the file, every (depth, name, type, path) must come back as it was written
+    """
+    nodes = [curNode for curNode in generateHierarchy(depth, width) if curNode[2] == typeName]
+    writer = openWriter(fileName, "binary")
+    for curNode in nodes:
+        writer.writeNode(*curNode)
+    writer.close()
+
+    same = list(readBinary(fileName)) == nodes
+    print("binary round trip of %d %s nodes without their ancestors: %s" % (len(nodes), typeName,
+                                                                             "ok" if same else "FAILED"))
+    return same
+
+
+def writeGeneratedSnapshot(fileName, depth, width, skip=0, touch=0):
+    """ Write a snapshot of generateHierarchy, every skip-th node left out and every touch-th node's digest changed """
+    writer = openSnapshotWriter(fileName)
+    parentKeys = [0]
+
+    for i, (curDepth, name, typeName, path) in enumerate(generateHierarchy(depth, width)):
+        key = hash64(path or "world")
+        del parentKeys[curDepth + 1:]
+        parentKeys.append(key)
+        if skip and i % skip == skip - 1:
+            continue
+        digest = "touched" if touch and i % touch == touch - 1 else "digest"
+        writer.writeNode(key, parentKeys[-2], name, typeName, path, digest)
+
+    writer.close()
+
+
+def benchmarkSnapshots(fileName, depth=6, width=8):
+    """ Diff a generated hierarchy against itself with nodes removed and modified, print the timings """
+    startTime = time.time()
+    writeGeneratedSnapshot(fileName + ".old.phs", depth, width)
+    writeGeneratedSnapshot(fileName + ".new.phs", depth, width, skip=1000, touch=500)
+    writeSeconds = time.time() - startTime
+
+    startTime = time.time()
+    counts = dict((curChange, 0) for curChange in CHANGES)
+    for curChange, oldPath, newPath in diffSnapshots(fileName + ".old.phs", fileName + ".new.phs"):
+        counts[curChange] += 1
+    diffSeconds = time.time() - startTime
+
+    print("snapshot: 2 snapshots written in %.3fs, diffed in %.3fs: %s" %
+          (writeSeconds, diffSeconds, ", ".join("%d %s" % (counts[curChange], curChange) for curChange in CHANGES)))
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+
+    tempFolder = tempfile.mkdtemp()
+    if not checkBinaryRoundTrip(os.path.join(tempFolder, "roundTrip.binary")):
+        sys.exit(1)
+    print("wide: depth 3, 60 children per node")
+    benchmark(os.path.join(tempFolder, "wide"), 3, 60)
+    benchmarkSnapshots(os.path.join(tempFolder, "wide"), 3, 60)
+    print("deep: depth 12, 3 children per node")
+    benchmark(os.path.join(tempFolder, "deep"), 12, 3)
+    benchmarkSnapshots(os.path.join(tempFolder, "deep"), 12, 3)
+    print("files in " + tempFolder)
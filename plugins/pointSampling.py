@@ -0,0 +1,264 @@
+""" Point sampling for the vertexParticle plugin
+
+    move to the maya plug-ins folder, next to vertexParticle.py
+
+    Keeping every Nth vertex by index leaves dense regions dense and thin regions empty.
+    These samplers work on positions instead, all of them on a spatial hash (a dict of grid
+    cells) so each point only looks at its own and the neighbouring cells, O(N) overall.
+
+    Points are (x, y, z) sequences, nothing here needs Maya, so it can be run and tested
+    from any python:
+
+    import pointSampling
+    indices = pointSampling.voxelDecimate(points, 0.5)
+    indices = pointSampling.poissonDisk(points, 0.5)
+    samples = pointSampling.areaSample(points, triangles, 1000, seed=1)
+
+    With numpy installed, (N, 3) arrays of points (and (T, 3) arrays of triangles) go through
+    array versions of voxelDecimate, triangleAreas and areaSample that give the same result.
+    poissonDisk visits the points one after the other, it stays in python.
+    Compare both paths and time them with:
+    python pointSampling.py [points]
+    """
+
+import bisect
+import math
+import random
+import sys
+import time
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def isAvailable():
+    """ Return True if the numpy versions can be used """
+    return numpy is not None
+
+
+def _isArray(values):
+    return numpy is not None and isinstance(values, numpy.ndarray)
+
+
+def _cell(point, cellSize):
+    return (int(math.floor(point[0] / cellSize)),
+            int(math.floor(point[1] / cellSize)),
+            int(math.floor(point[2] / cellSize)))
+
+
+def voxelDecimate(points, cellSize):
+    """ Return the indices of the points kept by a voxel grid decimation
+
+        Procedure: hash every point into a grid of cellSize, keep the point closest
+            to the centre of each occupied cell
+
+        Presumption: cellSize > 0
+    """
+    if cellSize <= 0:
+        raise ValueError("cellSize must be greater than 0")
+    if _isArray(points):
+        return _voxelDecimateArray(points, cellSize)
+
+    best = {}
+    for i, curPoint in enumerate(points):
+        cell = _cell(curPoint, cellSize)
+        distance = sum((curPoint[axis] - (cell[axis] + 0.5) * cellSize) ** 2 for axis in range(3))
+        if cell not in best or distance < best[cell][0]:
+            best[cell] = (distance, i)
+
+    return sorted(index for distance, index in best.values())
+
+
+def _voxelDecimateArray(points, cellSize):
+    """ voxelDecimate of an (N, 3) array
+
+        Procedure: sort the points by cell, then distance to the centre, then index, the
+            first point of every cell is the one the dict version keeps
+    """
+    if not len(points):
+        return []
+
+    cells = numpy.floor(points / cellSize)
+    distances = ((points - (cells + 0.5) * cellSize) ** 2).sum(axis=1)
+    order = numpy.lexsort((numpy.arange(len(points)), distances, cells[:, 2], cells[:, 1], cells[:, 0]))
+
+    sortedCells = cells[order]
+    first = numpy.ones(len(order), dtype=bool)
+    first[1:] = (sortedCells[1:] != sortedCells[:-1]).any(axis=1)
+    return numpy.sort(order[first]).tolist()
+
+
+def poissonDisk(points, minDistance, seed=None):
+    """ Return the indices of a subset of points where no two are closer than minDistance
+
+        Procedure: visit the points in order (shuffled if a seed is given) and keep a point
+            when no kept point is within minDistance. Kept points are hashed in cells of
+            minDistance, so only the 27 cells around a point have to be checked
+
+        Presumption: minDistance > 0
+    """
+    if minDistance <= 0:
+        raise ValueError("minDistance must be greater than 0")
+
+    if _isArray(points):
+        points = points.tolist()
+
+    order = list(range(len(points)))
+    if seed is not None:
+        random.Random(seed).shuffle(order)
+
+    squaredDistance = minDistance * minDistance
+    grid = {}
+    kept = []
+
+    for i in order:
+        curPoint = points[i]
+        cx, cy, cz = _cell(curPoint, minDistance)
+        free = True
+
+        for x in (cx - 1, cx, cx + 1):
+            for y in (cy - 1, cy, cy + 1):
+                for z in (cz - 1, cz, cz + 1):
+                    for other in grid.get((x, y, z), ()):
+                        if ((curPoint[0] - other[0]) ** 2 + (curPoint[1] - other[1]) ** 2 +
+                                (curPoint[2] - other[2]) ** 2) < squaredDistance:
+                            free = False
+                            break
+                    if not free:
+                        break
+                if not free:
+                    break
+
+        if free:
+            grid.setdefault((cx, cy, cz), []).append(curPoint)
+            kept.append(i)
+
+    return sorted(kept)
+
+
+def triangleAreas(points, triangles):
+    """ Return the area of each (i, j, k) triangle of point indices """
+    if _isArray(points):
+        a, b, c = (points[numpy.asarray(triangles)[:, corner]] for corner in range(3))
+        return 0.5 * numpy.sqrt((numpy.cross(b - a, c - a) ** 2).sum(axis=1))
+
+    areas = []
+    for i, j, k in triangles:
+        a, b, c = points[i], points[j], points[k]
+        u = (b[0] - a[0], b[1] - a[1], b[2] - a[2])
+        v = (c[0] - a[0], c[1] - a[1], c[2] - a[2])
+        cross = (u[1] * v[2] - u[2] * v[1], u[2] * v[0] - u[0] * v[2], u[0] * v[1] - u[1] * v[0])
+        areas.append(0.5 * math.sqrt(cross[0] ** 2 + cross[1] ** 2 + cross[2] ** 2))
+    return areas
+
+
+def areaSample(points, triangles, count, seed=None):
+    """ Return count points spread uniformly over the surface of the triangles
+
+        Procedure: pick a triangle with a probability proportional to its area (binary search
+            in the cumulative areas, O(log T) per sample), then a uniform point inside it
+            from two random barycentric coordinates
+
+        Presumption: triangles are (i, j, k) indices in points
+    """
+    if _isArray(points):
+        return _areaSampleArray(points, triangles, count, seed)
+
+    cumulative = []
+    total = 0.0
+    for curArea in triangleAreas(points, triangles):
+        total += curArea
+        cumulative.append(total)
+
+    if not count or not total:
+        return []
+
+    generator = random.Random(seed)
+    samples = []
+
+    for n in range(count):
+        index = min(bisect.bisect_right(cumulative, generator.random() * total), len(cumulative) - 1)
+        a, b, c = [points[i] for i in triangles[index]]
+
+        r1 = math.sqrt(generator.random())
+        r2 = generator.random()
+        wa, wb, wc = 1.0 - r1, r1 * (1.0 - r2), r1 * r2
+        samples.append(tuple(wa * a[axis] + wb * b[axis] + wc * c[axis] for axis in range(3)))
+
+    return samples
+
+
+def _areaSampleArray(points, triangles, count, seed=None):
+    """ areaSample of an (N, 3) array, return a (count, 3) array
+
+        Procedure: the random numbers are drawn from the same generator in the same order as
+            the python version, the triangle search and the barycentric points are done for
+            all the samples at once
+    """
+    triangles = numpy.asarray(triangles, dtype=numpy.int64).reshape(-1, 3)
+    cumulative = numpy.cumsum(triangleAreas(points, triangles))
+    total = cumulative[-1] if len(cumulative) else 0.0
+
+    if not count or not total:
+        return numpy.zeros((0, 3))
+
+    generator = random.Random(seed)
+    randoms = numpy.array([generator.random() for n in range(3 * count)]).reshape(count, 3)
+
+    indices = numpy.minimum(numpy.searchsorted(cumulative, randoms[:, 0] * total, side="right"),
+                            len(cumulative) - 1)
+    a, b, c = (points[triangles[indices, corner]] for corner in range(3))
+
+    r1 = numpy.sqrt(randoms[:, 1])[:, None]
+    r2 = randoms[:, 2][:, None]
+    return (1.0 - r1) * a + r1 * (1.0 - r2) * b + r1 * r2 * c
+
+
+def gridMesh(side, seed=0):
+    """ Return (points, triangles) of a side x side grid with jittered heights, for the checks """
+    generator = random.Random(seed)
+    points = [(x * 0.1, generator.random() * 0.05, z * 0.1) for z in range(side) for x in range(side)]
+    triangles = []
+    for z in range(side - 1):
+        for x in range(side - 1):
+            i = z * side + x
+            triangles.append((i, i + 1, i + side))
+            triangles.append((i + 1, i + side + 1, i + side))
+    return points, triangles
+
+
+def checkArrayPaths(pointCount=40000):
+    """ Run the python and the numpy versions on a grid mesh, print the times, return True if they agree """
+    if numpy is None:
+        print("numpy is not installed, only the python versions are used")
+        return True
+
+    side = max(int(math.sqrt(pointCount)), 2)
+    points, triangles = gridMesh(side)
+    pointArray, triangleArray = numpy.array(points), numpy.array(triangles)
+    checks = []
+
+    cases = [("voxelDecimate", voxelDecimate, (points, 0.35), (pointArray, 0.35)),
+             ("triangleAreas", triangleAreas, (points, triangles), (pointArray, triangleArray)),
+             ("areaSample", areaSample, (points, triangles, pointCount, 7), (pointArray, triangleArray, pointCount, 7))]
+
+    for curName, function, pythonArguments, arrayArguments in cases:
+        startTime = time.time()
+        expected = function(*pythonArguments)
+        pythonSeconds = time.time() - startTime
+        startTime = time.time()
+        result = function(*arrayArguments)
+        arraySeconds = time.time() - startTime
+
+        same = numpy.allclose(numpy.asarray(expected, dtype=float), numpy.asarray(result, dtype=float))
+        print("%s %s: python %.4fs, numpy %.4fs, %.1fx" % ("ok    " if same else "FAILED", curName, pythonSeconds,
+                                                           arraySeconds, pythonSeconds / max(arraySeconds, 1e-9)))
+        checks.append(same)
+
+    return all(checks)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if checkArrayPaths(int(sys.argv[1]) if len(sys.argv) > 1 else 40000) else 1)
@@ -1,48 +1,257 @@
 import maya.OpenMaya as OpenMaya
 import maya.OpenMayaMPx as OpenMayaMPx
+import os
 import sys
+import time
+
+# hierarchyFormats sits next to the plugin
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import hierarchyFormats
 
 
 commandName = "printHierarchy"
 
+kHelpFlag = "-h"
+kHelpLongFlag = "-help"
+kFileFlag = "-f"
+kFileLongFlag = "-file"
+kFormatFlag = "-fmt"
+kFormatLongFlag = "-format"
+kTypeFlag = "-t"
+kTypeLongFlag = "-type"
+kDepthFlag = "-d"
+kDepthLongFlag = "-depth"
+kSnapshotFlag = "-s"
+kSnapshotLongFlag = "-snapshot"
+kDigestFlag = "-dg"
+kDigestLongFlag = "-digest"
+kAttributeFlag = "-at"
+kAttributeLongFlag = "-attribute"
+kDiffFlag = "-df"
+kDiffLongFlag = "-diff"
+helpMessage = "This command prints every DAG node with its type and path. -file F writes it to a file instead of the Script Editor, -format text|jsonl|csv|binary, -type kJoint only outputs nodes of that MFn type, -depth N stops below depth N. The result is the node count per type. -snapshot F writes a hashed snapshot instead, -digest adds the local matrix of the nodes, -attribute A (multi use) the value of A. -diff OLD NEW compares two snapshots, the result is one 'change path' per added, removed, reparented or modified node"
+
 
 class pluginCommand(OpenMayaMPx.MPxCommand):
 
     def __init__(self):
         OpenMayaMPx.MPxCommand.__init__(self)
+        self.fileName = None
+        self.outputFormat = "text"
+        self.filterType = OpenMaya.MFn.kInvalid
+        self.maxDepth = None
+        self.snapshotFile = None
+        self.digest = False
+        self.attributes = []
+        self.diffFiles = None
+
+    def argumentParser(self, argList):
+        try:
+            parsedArguments = OpenMaya.MArgDatabase(self.syntax(), argList)
+        except:
+            print "Incorrect Argument"
+            return "unknown"
+
+        if parsedArguments.isFlagSet(kHelpFlag):
+            self.setResult(helpMessage)
+            return "help"
+        if parsedArguments.isFlagSet(kFileFlag):
+            self.fileName = parsedArguments.flagArgumentString(kFileFlag, 0)
+        if parsedArguments.isFlagSet(kFormatFlag):
+            self.outputFormat = parsedArguments.flagArgumentString(kFormatFlag, 0)
+            if self.outputFormat not in hierarchyFormats.FORMATS:
+                print "Unknown format " + self.outputFormat + ", use one of " + ", ".join(hierarchyFormats.FORMATS)
+                return "unknown"
+        if parsedArguments.isFlagSet(kTypeFlag):
+            typeName = parsedArguments.flagArgumentString(kTypeFlag, 0)
+            if not hasattr(OpenMaya.MFn, typeName):
+                print "Unknown MFn type " + typeName
+                return "unknown"
+            self.filterType = getattr(OpenMaya.MFn, typeName)
+        if parsedArguments.isFlagSet(kDepthFlag):
+            self.maxDepth = parsedArguments.flagArgumentInt(kDepthFlag, 0)
+        if parsedArguments.isFlagSet(kSnapshotFlag):
+            self.snapshotFile = parsedArguments.flagArgumentString(kSnapshotFlag, 0)
+        if parsedArguments.isFlagSet(kDigestFlag):
+            self.digest = True
+        for i in range(parsedArguments.numberOfFlagUses(kAttributeFlag)):
+            flagArguments = OpenMaya.MArgList()
+            parsedArguments.getFlagArgumentList(kAttributeFlag, i, flagArguments)
+            self.attributes.append(flagArguments.asString(0))
+        if parsedArguments.isFlagSet(kDiffFlag):
+            self.diffFiles = (parsedArguments.flagArgumentString(kDiffFlag, 0),
+                              parsedArguments.flagArgumentString(kDiffFlag, 1))
+            return None
+
+        if self.outputFormat == "binary" and not self.fileName:
+            print "The binary format needs a -file"
+            return "unknown"
+        return None
+
+    def nodeDigest(self, dagNodeFn):
+        """ Return the text hashed as the digest of the node, its local matrix and the asked attributes """
+        values = []
+        if self.digest:
+            matrix = dagNodeFn.transformationMatrix()
+            values.extend("%.6g" % matrix(row, column) for row in range(4) for column in range(4))
+
+        for curAttribute in self.attributes:
+            if dagNodeFn.hasAttribute(curAttribute):
+                values.append(curAttribute + "=" + plugText(dagNodeFn.findPlug(curAttribute, False)))
+
+        return " ".join(values)
+
+    def writeSnapshot(self):
+        """ Write the hashed snapshot, nodes are keyed by uuid and instance number """
+        writer = hierarchyFormats.openSnapshotWriter(self.snapshotFile)
+        dagIterator = OpenMaya.MItDag(OpenMaya.MItDag.kDepthFirst, OpenMaya.MFn.kInvalid)
+        dagNodeFn = OpenMaya.MFnDagNode()
+        dagPath = OpenMaya.MDagPath()
+        parentKeys = [0]
+        typeCounts = {}
+
+        try:
+            while (not dagIterator.isDone()):
+                dagIterator.getPath(dagPath)
+                dagNodeFn.setObject(dagPath)
+                depth = dagIterator.depth()
+
+                key = hierarchyFormats.hash64(nodeIdentity(dagNodeFn) + ":" + str(dagPath.instanceNumber()))
+                del parentKeys[depth + 1:]
+                parentKeys.append(key)
+
+                currentObj = dagIterator.currentItem()
+                if self.filterType == OpenMaya.MFn.kInvalid or currentObj.hasFn(self.filterType):
+                    type = currentObj.apiTypeStr()
+                    digest = self.nodeDigest(dagNodeFn) if self.digest or self.attributes else ""
+                    writer.writeNode(key, parentKeys[-2], dagNodeFn.name(), type, dagPath.fullPathName(), digest)
+                    typeCounts[type] = typeCounts.get(type, 0) + 1
+
+                if self.maxDepth is not None and depth >= self.maxDepth:
+                    dagIterator.prune()
+                dagIterator.next()
+        finally:
+            writer.close()
+
+        return typeCounts
+
+    def diffSnapshots(self):
+        result = OpenMaya.MStringArray()
+        counts = dict((curChange, 0) for curChange in hierarchyFormats.CHANGES)
+
+        for change, oldPath, newPath in hierarchyFormats.diffSnapshots(*self.diffFiles):
+            counts[change] += 1
+            if change == "added":
+                result.append(change + " " + newPath)
+            elif change == "reparented" or oldPath != newPath:
+                result.append(change + " " + oldPath + " -> " + newPath)
+            else:
+                result.append(change + " " + oldPath)
+
+        self.setResult(result)
+        print ", ".join("%d %s" % (counts[curChange], curChange) for curChange in hierarchyFormats.CHANGES)
 
     def doIt(self, argList):
-        print "Scene Hierarchy" # delete prints in production
+        if self.argumentParser(argList):
+            return
+
+        if self.diffFiles:
+            self.diffSnapshots()
+            return
+
+        startTime = time.time()
+
+        if self.snapshotFile:
+            typeCounts = self.writeSnapshot()
+            result = OpenMaya.MStringArray()
+            for type in sorted(typeCounts):
+                result.append(type + " " + str(typeCounts[type]))
+            self.setResult(result)
+            print "%d nodes snapshot to %s in %.3fs" % (sum(typeCounts.values()), self.snapshotFile, time.time() - startTime)
+            return
+
+        if self.fileName:
+            writer = hierarchyFormats.openWriter(self.fileName, self.outputFormat)
+        else:
+            print "Scene Hierarchy" # delete prints in production
+            writer = hierarchyFormats.WRITERS[self.outputFormat](sys.stdout)
+
+        # one pass over the whole DAG, the depth limit prunes, the type only filters the output
         dagIterator = OpenMaya.MItDag(OpenMaya.MItDag.kDepthFirst, OpenMaya.MFn.kInvalid)
         dagNodeFn = OpenMaya.MFnDagNode()
+        typeCounts = {}
 
-        while (not dagIterator.isDone()):
-            currentObj = dagIterator.currentItem()
-            depth = dagIterator.depth()
-            dagNodeFn.setObject(currentObj)
+        try:
+            while (not dagIterator.isDone()):
+                currentObj = dagIterator.currentItem()
+                depth = dagIterator.depth()
 
-            name = dagNodeFn.name()
-            type = currentObj.apiTypeStr()
-            path = dagNodeFn.fullPathName()
+                if self.filterType == OpenMaya.MFn.kInvalid or currentObj.hasFn(self.filterType):
+                    dagNodeFn.setObject(currentObj)
+                    type = currentObj.apiTypeStr()
+                    writer.writeNode(depth, dagNodeFn.name(), type, dagNodeFn.fullPathName())
+                    typeCounts[type] = typeCounts.get(type, 0) + 1
 
-            printOut = ""
-            for i in range(0, depth):
-                printOut += "----->"
+                if self.maxDepth is not None and depth >= self.maxDepth:
+                    dagIterator.prune()
+                dagIterator.next()
+        finally:
+            if self.fileName:
+                writer.close()
 
-            printOut += "name: " + name + ", Type: " + type + ", Path: " + path
-            print printOut
+        result = OpenMaya.MStringArray()
+        for type in sorted(typeCounts):
+            result.append(type + " " + str(typeCounts[type]))
+        self.setResult(result)
 
-            dagIterator.next()
+        if self.fileName:
+            print "%d nodes written to %s in %.3fs" % (sum(typeCounts.values()), self.fileName, time.time() - startTime)
+
+
+def nodeIdentity(dagNodeFn):
+    """ Return the uuid of the node, it survives renames and reparenting, the path before Maya 2016 """
+    try:
+        return dagNodeFn.uuid().asString()
+    except (AttributeError, RuntimeError):
+        return dagNodeFn.fullPathName()
+
+
+def plugText(plug):
+    """ Return the value of a plug as text, compound plugs as their children """
+    if plug.isCompound():
+        return ",".join(plugText(plug.child(i)) for i in range(plug.numChildren()))
+    try:
+        return "%.6g" % plug.asDouble()
+    except RuntimeError:
+        try:
+            return plug.asString()
+        except RuntimeError:
+            return ""
 
 
 def cmdCreator():
     return OpenMayaMPx.asMPxPtr(pluginCommand())
 
 
+def syntaxCreator():
+    syntax = OpenMaya.MSyntax()
+    syntax.addFlag(kHelpFlag, kHelpLongFlag)
+    syntax.addFlag(kFileFlag, kFileLongFlag, OpenMaya.MSyntax.kString)
+    syntax.addFlag(kFormatFlag, kFormatLongFlag, OpenMaya.MSyntax.kString)
+    syntax.addFlag(kTypeFlag, kTypeLongFlag, OpenMaya.MSyntax.kString)
+    syntax.addFlag(kDepthFlag, kDepthLongFlag, OpenMaya.MSyntax.kLong)
+    syntax.addFlag(kSnapshotFlag, kSnapshotLongFlag, OpenMaya.MSyntax.kString)
+    syntax.addFlag(kDigestFlag, kDigestLongFlag)
+    syntax.addFlag(kAttributeFlag, kAttributeLongFlag, OpenMaya.MSyntax.kString)
+    syntax.makeFlagMultiUse(kAttributeFlag)
+    syntax.addFlag(kDiffFlag, kDiffLongFlag, OpenMaya.MSyntax.kString, OpenMaya.MSyntax.kString)
+    return syntax
+
+
 def initializePlugin(mObj):
     plugin = OpenMayaMPx.MFnPlugin(mObj)
     try:
-        plugin.registerCommand(commandName,cmdCreator)
+        plugin.registerCommand(commandName, cmdCreator, syntaxCreator)
     except:
         sys.stderr.write("Failed to register command: " + commandName)
 
@@ -52,4 +261,4 @@ def uninitializePlugin(mObj):
     try:
         plugin.deregisterCommand(commandName)
     except:
-        sys.stderr.write("Failed to de-register command: " + commandName)
\ No newline at end of file
+        sys.stderr.write("Failed to de-register command: " + commandName)
@@ -1,7 +1,20 @@
 import maya.OpenMaya as OpenMaya
 import maya.OpenMayaMPx as OpenMayaMPx
 import maya.OpenMayaFX as OpenMayaFX
+import ctypes
+import math
+import os
 import sys
+import time
+
+# pointSampling sits next to the plugin
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import pointSampling
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 commandName = "vertexParticle"
@@ -10,16 +23,78 @@ kHelpFlag = "-h"
 kHelpLongFlag = "-help"
 kSparseFlag = "-s"
 kSparseLongFlag = "-sparse"
-helpMessage = "This command is used to attach a particle on each vertex of a poly mesh"
+kTimingFlag = "-t"
+kTimingLongFlag = "-timing"
+kLegacyFlag = "-l"
+kLegacyLongFlag = "-legacy"
+kPerMeshFlag = "-pm"
+kPerMeshLongFlag = "-perMesh"
+kVoxelFlag = "-vs"
+kVoxelLongFlag = "-voxelSize"
+kMinDistanceFlag = "-md"
+kMinDistanceLongFlag = "-minDistance"
+kAreaCountFlag = "-ac"
+kAreaCountLongFlag = "-areaCount"
+kSeedFlag = "-sd"
+kSeedLongFlag = "-seed"
+BENCHMARK_SIZES = [10000, 100000, 1000000, 10000000]
+
+helpMessage = "This command is used to attach a particle on each vertex of the selected poly meshes. -sparse N keeps every Nth vertex, -voxelSize S keeps one vertex per voxel of size S, -minDistance D keeps vertices at least D apart (poisson disk), -areaCount N scatters N points over the surface by area, -seed N for the random modes, -perMesh makes one particle system per mesh instead of one for all, -timing prints how long it took, -legacy emits the points one by one (for comparison)"
+
+
+def worldPoints(mDagPath):
+    """ Return the (N, 3) numpy array of the world space points of a mesh path
+
+        Procedure: the raw float buffer of the mesh is read as an array through ctypes, no
+            python float per vertex, and moved to world space with the inclusive matrix of
+            the path in one product, so instances land where they are
+    """
+    mFnMesh = OpenMaya.MFnMesh(mDagPath)
+    rawPoints = ctypes.cast(int(mFnMesh.getRawPoints()), ctypes.POINTER(ctypes.c_float))
+    points = numpy.ctypeslib.as_array(rawPoints, shape=(mFnMesh.numVertices(), 3)).astype(numpy.float64)
+
+    # maya matrices multiply row vectors, the translation is the last row
+    mMatrix = mDagPath.inclusiveMatrix()
+    matrix = numpy.array([[mMatrix(row, column) for column in range(4)] for row in range(4)])
+    return numpy.dot(points, matrix[:3, :3]) + matrix[3, :3]
+
+
+def keepSparse(points, sparse):
+    """ Return the rows of points whose index i has i % sparse == 0, like the -legacy loop """
+    if sparse == int(sparse):
+        return points[::int(sparse)]
+    return points[numpy.mod(numpy.arange(len(points)), sparse) == 0]
+
+
+def pointArray(points):
+    """ Return an MPointArray of an (N, 3) numpy array, built in one call from a double4 buffer """
+    if not len(points):
+        return OpenMaya.MPointArray()
+
+    homogeneous = numpy.ones((len(points), 4))
+    homogeneous[:, :3] = points
+
+    mScriptUtil = OpenMaya.MScriptUtil()
+    mScriptUtil.createFromList(homogeneous.ravel().tolist(), homogeneous.size)
+    return OpenMaya.MPointArray(mScriptUtil.asDouble4Ptr(), len(points))
 
 
 class PluginCommand(OpenMayaMPx.MPxCommand):
 
-    mObj_particle = OpenMaya.MObject()
     sparse = None
+    timing = False
+    legacy = False
+    perMesh = False
+    voxelSize = None
+    minDistance = None
+    areaCount = None
+    seed = None
 
     def __init__(self):
         OpenMayaMPx.MPxCommand.__init__(self)
+        self.meshPaths = []
+        self.particleObjs = []
+        self.indexCache = {}
 
 
     def argumentParser(self, argList):
@@ -31,6 +106,23 @@ class PluginCommand(OpenMayaMPx.MPxCommand):
             print "Incorrect Argument"
             return "unknown"
 
+        self.timing = parsedArguments.isFlagSet(kTimingFlag) or parsedArguments.isFlagSet(kTimingLongFlag)
+        self.legacy = parsedArguments.isFlagSet(kLegacyFlag) or parsedArguments.isFlagSet(kLegacyLongFlag)
+        self.perMesh = parsedArguments.isFlagSet(kPerMeshFlag) or parsedArguments.isFlagSet(kPerMeshLongFlag)
+
+        # spatial sampling modes, they replace -sparse
+        if parsedArguments.isFlagSet(kVoxelFlag):
+            self.voxelSize = parsedArguments.flagArgumentDouble(kVoxelFlag, 0)
+        if parsedArguments.isFlagSet(kMinDistanceFlag):
+            self.minDistance = parsedArguments.flagArgumentDouble(kMinDistanceFlag, 0)
+        if parsedArguments.isFlagSet(kAreaCountFlag):
+            self.areaCount = parsedArguments.flagArgumentInt(kAreaCountFlag, 0)
+        if parsedArguments.isFlagSet(kSeedFlag):
+            self.seed = parsedArguments.flagArgumentInt(kSeedFlag, 0)
+        if self.sampleMode():
+            self.sparse = 1.0
+            return None
+
         if parsedArguments.isFlagSet(kSparseFlag):
             self.sparse = parsedArguments.flagArgumentDouble(kSparseFlag, 0)
             return None
@@ -50,61 +142,293 @@ class PluginCommand(OpenMayaMPx.MPxCommand):
 
 
     def undoIt(self):
-        mFnDagNode = OpenMaya.MFnDagNode(self.mObj_particle)
+        # delete every particle system of the batch with one modifier
         mDagMod = OpenMaya.MDagModifier()
-        if self.mObj_particle.apiTypeStr() != "kInvalid":
-            mDagMod.deleteNode(mFnDagNode.parent(0))
-            mDagMod.doIt()
-            self.mObj_particle = OpenMaya.MObject()
+        for mObj_particle in self.particleObjs:
+            if mObj_particle.apiTypeStr() != "kInvalid":
+                mDagMod.deleteNode(OpenMaya.MFnDagNode(mObj_particle).parent(0))
+        mDagMod.doIt()
+        self.particleObjs = []
         return None
 
 
-    def redoIt(self):
-        mSel = OpenMaya.MSelectionList()
-        mDagPath = OpenMaya.MDagPath()
-        mFnMesh = OpenMaya.MFnMesh()
+    def gatherMeshPaths(self):
+        """ Return the dag paths of every mesh in the active selection
 
+            Selected transforms give their mesh shapes, selected instances keep their own
+            path so each instance is placed where it is. A path selected twice is used once
+        """
+        mSel = OpenMaya.MSelectionList()
         OpenMaya.MGlobal.getActiveSelectionList(mSel)
-        if mSel.length() >= 1:
-            try:
-                mSel.getDagPath(0,mDagPath)
-                mFnMesh.setObject(mDagPath)
-            except:
-                print "Select a poly mesh, please"
-                return "unknown"
+
+        meshPaths = []
+        seen = set()
+        mIter = OpenMaya.MItSelectionList(mSel, OpenMaya.MFn.kDagNode)
+
+        while not mIter.isDone():
+            mDagPath = OpenMaya.MDagPath()
+            mIter.getDagPath(mDagPath)
+
+            if mDagPath.hasFn(OpenMaya.MFn.kMesh) and not mDagPath.hasFn(OpenMaya.MFn.kTransform):
+                shapePaths = [mDagPath]
+            else:
+                shapePaths = []
+                mFnDagNode = OpenMaya.MFnDagNode(mDagPath)
+                for i in xrange(mFnDagNode.childCount()):
+                    child = mFnDagNode.child(i)
+                    if child.hasFn(OpenMaya.MFn.kMesh) and not OpenMaya.MFnDagNode(child).isIntermediateObject():
+                        shapePath = OpenMaya.MDagPath(mDagPath)
+                        shapePath.push(child)
+                        shapePaths.append(shapePath)
+
+            for shapePath in shapePaths:
+                if shapePath.fullPathName() not in seen:
+                    seen.add(shapePath.fullPathName())
+                    meshPaths.append(shapePath)
+
+            mIter.next()
+
+        return meshPaths
+
+
+    def gatherPoints(self, mDagPath):
+        """ Return the world space points of a mesh path
+
+            Every path, instanced or not, is read by Maya in world space with one call,
+            the path gives the matrix of the instance
+        """
+        mPointArray = OpenMaya.MPointArray()
+        OpenMaya.MFnMesh(mDagPath).getPoints(mPointArray, OpenMaya.MSpace.kWorld)
+        return mPointArray
+
+
+    def sparseIndices(self, length):
+        """ Return the kept vertex indices for a point count, cached since instances share it """
+        if length not in self.indexCache:
+            if self.sparse == int(self.sparse):
+                self.indexCache[length] = xrange(0, length, int(self.sparse))
+            else:
+                self.indexCache[length] = [i for i in xrange(length) if i % self.sparse == 0]
+        return self.indexCache[length]
+
+
+    def numpyBulk(self):
+        """ Return True if the sparse points are kept with numpy, sparse 1 needs no filtering """
+        return numpy is not None and not self.legacy and not self.sampleMode() and self.sparse != 1
+
+
+    def sampleMode(self):
+        """ Return the spatial sampling mode asked for, None for the sparse vertex modulo """
+        if self.voxelSize is not None:
+            return "voxel"
+        if self.minDistance is not None:
+            return "poisson"
+        if self.areaCount is not None:
+            return "area"
+        return None
+
+
+    def samplePoints(self, mDagPath, points):
+        """ Return the points of the spatial sampling mode as a new MPointArray
+
+            points is the numpy array of worldPoints when numpy is there, pointSampling then
+            runs its array versions and the result is turned into an MPointArray in one call
+        """
+        isArray = numpy is not None and isinstance(points, numpy.ndarray)
+        if not isArray:
+            points = [(points[i].x, points[i].y, points[i].z) for i in xrange(points.length())]
+        mode = self.sampleMode()
+
+        if mode == "area":
+            triangleCounts = OpenMaya.MIntArray()
+            triangleVertices = OpenMaya.MIntArray()
+            OpenMaya.MFnMesh(mDagPath).getTriangles(triangleCounts, triangleVertices)
+            if isArray:
+                triangles = numpy.array(triangleVertices, dtype=numpy.int64).reshape(-1, 3)
+            else:
+                triangles = [(triangleVertices[i], triangleVertices[i + 1], triangleVertices[i + 2])
+                             for i in xrange(0, triangleVertices.length(), 3)]
+            samples = pointSampling.areaSample(points, triangles, self.areaCount, self.seed)
         else:
-            print "Select a poly mesh, please"
+            if mode == "voxel":
+                indices = pointSampling.voxelDecimate(points, self.voxelSize)
+            else:
+                indices = pointSampling.poissonDisk(points, self.minDistance, self.seed)
+            samples = points[indices] if isArray else [points[i] for i in indices]
+
+        if isArray:
+            return pointArray(samples)
+
+        sampledPoints = OpenMaya.MPointArray(len(samples))
+        for counter, curPoint in enumerate(samples):
+            sampledPoints.set(counter, curPoint[0], curPoint[1], curPoint[2])
+        return sampledPoints
+
+
+    def redoIt(self):
+        if self.sparse <= 0:
+            print "Sparse must be greater than 0"
+            return "unknown"
+        if self.voxelSize is not None and self.voxelSize <= 0 or self.minDistance is not None and self.minDistance <= 0:
+            print "Voxel size and min distance must be greater than 0"
             return "unknown"
 
-        mPointArray = OpenMaya.MPointArray()
-        mFnMesh.getPoints(mPointArray, OpenMaya.MSpace.kWorld)
+        startTime = time.time()
+        gatherTime = 0.0
+        emitTime = 0.0
+        counter = 0
+        totalPoints = 0
+
+        self.particleObjs = []
+        mFnParticle = None
+
+        for mDagPath in self.meshPaths:
+            # world space points of this instance
+            gatherStart = time.time()
+            if self.numpyBulk() or numpy is not None and self.sampleMode():
+                points = worldPoints(mDagPath)
+                totalPoints += len(points)
+            else:
+                mPointArray = self.gatherPoints(mDagPath)
+                totalPoints += mPointArray.length()
+            gatherTime += time.time() - gatherStart
+
+            #Create a particle system, one per mesh or one for all
+            if mFnParticle is None or self.perMesh:
+                mFnParticle = OpenMayaFX.MFnParticleSystem()
+                self.particleObjs.append(mFnParticle.create())
+
+                #To fix Maya bug
+                mFnParticle = OpenMayaFX.MFnParticleSystem(self.particleObjs[-1])
+
+            emitStart = time.time()
+            if self.sampleMode():
+                sampledPoints = self.samplePoints(mDagPath, points if numpy is not None else mPointArray)
+                mFnParticle.emit(sampledPoints)
+                counter += sampledPoints.length()
+            elif self.legacy:
+                counter += self.emitPerPoint(mFnParticle, mPointArray)
+            elif self.numpyBulk():
+                counter += self.emitArray(mFnParticle, points)
+            else:
+                counter += self.emitBulk(mFnParticle, mPointArray)
+            emitTime += time.time() - emitStart
+
+            if self.perMesh:
+                mFnParticle.saveInitialState()
+
+        if mFnParticle is not None and not self.perMesh:
+            mFnParticle.saveInitialState()
+
+        print "Created " + str(len(self.particleObjs)) + " particle systems from " + str(len(self.meshPaths)) + " meshes"
+        print "Total Points: " + str(counter)
+
+        if self.timing:
+            print "vertexParticle %s: %d of %d points, gather %.4fs, emit %.4fs, total %.4fs" % (
+                self.sampleMode() or ("legacy" if self.legacy else "numpy" if self.numpyBulk() else "bulk"),
+                counter, totalPoints, gatherTime, emitTime, time.time() - startTime)
+        return None
 
-        #Create a particle system
-        mFnParticle = OpenMayaFX.MFnParticleSystem()
-        self.mObj_particle = mFnParticle.create()
-        print "Created"
 
-        #To fix Maya bug
-        mFnParticle = OpenMayaFX.MFnParticleSystem(self.mObj_particle)
+    def emitPerPoint(self, mFnParticle, mPointArray):
+        """ Old path: test every vertex index and emit the kept points one by one """
         counter = 0
         for i in xrange(mPointArray.length()):
             if i%self.sparse==0:
                 mFnParticle.emit(mPointArray[i])
                 counter += 1
-        print "Total Points: " + str(counter)
-        mFnParticle.saveInitialState()
-        return None
+        return counter
+
+
+    def emitBulk(self, mFnParticle, mPointArray):
+        """ Keep the same points as emitPerPoint and emit them with a single call
+
+            With sparse 1 the array is emitted as it is, with a whole sparse value
+            only every Nth point is visited instead of testing all of them.
+            Used without numpy, emitArray does the same without the python loop
+        """
+        length = mPointArray.length()
+
+        if self.sparse == 1:
+            mFnParticle.emit(mPointArray)
+            return length
+
+        indices = self.sparseIndices(length)
+
+        sparsePoints = OpenMaya.MPointArray(len(indices))
+        for counter, i in enumerate(indices):
+            sparsePoints.set(mPointArray[i], counter)
+
+        mFnParticle.emit(sparsePoints)
+        return sparsePoints.length()
+
+
+    def emitArray(self, mFnParticle, points):
+        """ Keep the same points as emitPerPoint from a numpy array, emit them with a single call
+
+            Procedure: the rows are strided (or masked for a fractional sparse) by numpy and
+                the MPointArray is built from one buffer, no python loop over the points
+        """
+        keptPoints = keepSparse(points, self.sparse)
+        mFnParticle.emit(pointArray(keptPoints))
+        return len(keptPoints)
 
 
     def doIt(self, argList):
-        print "creating Particles"
         self.argumentParser(argList)
-        print self.sparse
         if self.sparse != None:
+            # keep the meshes so redo works on the same batch whatever is selected then
+            self.meshPaths = self.gatherMeshPaths()
+            if not self.meshPaths:
+                print "Select a poly mesh, please"
+                return "unknown"
             self.redoIt()
         return None
 
 
+def benchmark(sizes=BENCHMARK_SIZES, sparse=2.0, legacyLimit=1000000):
+    """ Time the -legacy loop against the bulk path on plane meshes, print and return the rows
+
+        Procedure: a plane of about size vertices is made for every size, the command is run
+            on it with and without -legacy and undone. The legacy loop takes minutes on the
+            biggest meshes, it is skipped above legacyLimit points
+
+        Presumption: the plugin is loaded, then from the script editor
+            import vertexParticle; vertexParticle.benchmark()
+    """
+    import maya.cmds as cmds
+
+    rows = []
+    for size in sizes:
+        side = max(int(round(math.sqrt(size))) - 1, 1)
+        plane = cmds.polyPlane(width=100, height=100, subdivisionsX=side, subdivisionsY=side,
+                               constructionHistory=False)[0]
+        vertices = cmds.polyEvaluate(plane, vertex=True)
+        row = [vertices]
+
+        for legacy in (True, False):
+            if legacy and vertices > legacyLimit:
+                row.append(None)
+                continue
+
+            flags = {"sparse": sparse}
+            if legacy:
+                flags["legacy"] = True
+            cmds.select(plane)
+            startTime = time.time()
+            cmds.vertexParticle(**flags)
+            row.append(time.time() - startTime)
+            cmds.undo()
+
+        cmds.delete(plane)
+        rows.append(row)
+        print "vertexParticle benchmark %d points, sparse %s: legacy %s, %s %.4fs" % (
+            vertices, sparse, "skipped" if row[1] is None else "%.4fs" % row[1],
+            "numpy" if numpy is not None else "bulk", row[2])
+
+    return rows
+
+
 # Creator
 def cmdCreator():
     return OpenMayaMPx.asMPxPtr(PluginCommand())
@@ -117,6 +441,13 @@ def syntaxCreator():
     # collect/add the flags
     syntax.addFlag(kHelpFlag, kHelpLongFlag)
     syntax.addFlag(kSparseFlag, kSparseLongFlag, OpenMaya.MSyntax.kDouble)
+    syntax.addFlag(kTimingFlag, kTimingLongFlag)
+    syntax.addFlag(kLegacyFlag, kLegacyLongFlag)
+    syntax.addFlag(kPerMeshFlag, kPerMeshLongFlag)
+    syntax.addFlag(kVoxelFlag, kVoxelLongFlag, OpenMaya.MSyntax.kDouble)
+    syntax.addFlag(kMinDistanceFlag, kMinDistanceLongFlag, OpenMaya.MSyntax.kDouble)
+    syntax.addFlag(kAreaCountFlag, kAreaCountLongFlag, OpenMaya.MSyntax.kLong)
+    syntax.addFlag(kSeedFlag, kSeedLongFlag, OpenMaya.MSyntax.kLong)
 
     # return MSyntax
     return syntax
@@ -1,22 +1,184 @@
-from xml.dom.minidom import parse
- 
-dom = parse("C:/Temp/test.xml")
- 
- # visit every object node 
-for node in dom.getElementsByTagName('object'): 
-     
-    # method 1: using keys
-    attrs = node.attributes.keys()
-    for a in attrs:
-        pair = node.attributes[a]
-        print (str(pair.name) + " = " + str(pair.value))
-    print
-     
-    #method 2: by attribute name
-"""        
-    print str(node.getAttribute("name"))
-    print str(node.getAttribute("translateX"))
-    print str(node.getAttribute("translateY"))
-    print str(node.getAttribute("translateZ"))
-    print
-"""
\ No newline at end of file
+try:
+    import xml.etree.cElementTree as ElementTree
+except ImportError:
+    import xml.etree.ElementTree as ElementTree
+ 
+""" Read a scene xml written by writeXML and put the objects back where they were
+ 
+    The file is streamed with iterparse and every element is cleared once read, memory
+    does not grow with the xml tree, only one entry per found object is kept to apply the
+    parents first. The translations are applied with one MDGModifier so the whole file is
+    one doIt (and one undoIt).
+ 
+    import readXML
+    modifier, missing = readXML.readSceneXML("C:/Temp/test.xml")
+    modifier, missing = readXML.readSceneBinary("C:/Temp/test.strf")
+ 
+    outside of Maya, check memory stays flat:
+    python -c "import readXML; readXML.benchmark()"
+    """
+ 
+DEFAULT_PATH = "C:/Temp/test.xml"
+ 
+ 
+def iterObjects(fileName):
+    """ Yield (name, (translateX, translateY, translateZ)) of every object of the file """
+    context = ElementTree.iterparse(fileName, events=("start", "end"))
+    root = None
+ 
+    for event, element in context:
+        if root is None:
+            root = element
+        if event == "end" and element.tag == "object":
+            yield element.get("name"), (float(element.get("translateX")),
+                                        float(element.get("translateY")),
+                                        float(element.get("translateZ")))
+            # the root keeps a reference to every child, clear it too
+            root.clear()
+ 
+ 
+def applyTranslations(objects):
+    """ Move every object so its world rotate pivot sits on the stored translation
+ 
+        Procedure: the objects are found first and applied parents first. Moving a parent
+            moves its children, so the world offsets queued for the ancestors of a node are
+            added to its current pivot before its own offset is computed. The world offset
+            is brought into the parent space and queued as new translate values on one
+            MDGModifier, applied with a single doIt
+ 
+        Return: the modifier (undoIt reverts it all) and the names missing from the scene,
+            locked translates are reported as missing too
+    """
+    import maya.OpenMaya as OpenMaya
+ 
+    modifier = OpenMaya.MDGModifier()
+    missing = []
+    transformFn = OpenMaya.MFnTransform()
+    found = []
+ 
+    for name, translation in objects:
+        selection = OpenMaya.MSelectionList()
+        dagPath = OpenMaya.MDagPath()
+        try:
+            selection.add(name)
+            selection.getDagPath(0, dagPath)
+        except RuntimeError:
+            missing.append(name)
+            continue
+        found.append((dagPath.length(), dagPath.fullPathName(), dagPath, name, translation))
+ 
+    # parents first, a node is never applied before one of its ancestors
+    found.sort(key=lambda entry: entry[0])
+    moved = {}
+ 
+    for depth, fullPath, dagPath, name, translation in found:
+        transformFn.setObject(dagPath)
+        plugs = [transformFn.findPlug(curAttr) for curAttr in ("translateX", "translateY", "translateZ")]
+        if [curPlug for curPlug in plugs if curPlug.isLocked() or curPlug.isDestination()]:
+            missing.append(name)
+            continue
+ 
+        pivot = transformFn.rotatePivot(OpenMaya.MSpace.kWorld)
+        parentPath = fullPath.rpartition("|")[0]
+        while parentPath:
+            if parentPath in moved:
+                pivot += moved[parentPath]
+            parentPath = parentPath.rpartition("|")[0]
+ 
+        # a vector, only the rotation and scale of the parent apply
+        worldOffset = OpenMaya.MPoint(*translation) - pivot
+        moved[fullPath] = worldOffset
+        offset = worldOffset * dagPath.exclusiveMatrixInverse()
+ 
+        for curPlug, curOffset in zip(plugs, (offset.x, offset.y, offset.z)):
+            modifier.newPlugValueDouble(curPlug, curPlug.asDouble() + curOffset)
+ 
+    modifier.doIt()
+    return modifier, missing
+ 
+ 
+def readSceneXML(fileName=DEFAULT_PATH):
+    """ Apply the file to the scene, return the modifier and the names that are not in the scene """
+    modifier, missing = applyTranslations(iterObjects(fileName))
+ 
+    for name in missing:
+        print("Not in the scene (or translate locked): " + name)
+    print("%s read, %d objects missing" % (fileName, len(missing)))
+    return modifier, missing
+ 
+ 
+def readSceneBinary(fileName):
+    """ Same as readSceneXML for a file written by writeXML.writeSceneBinary """
+    import sceneTransforms
+ 
+    with sceneTransforms.TransformFile(fileName) as transforms:
+        modifier, missing = applyTranslations(transforms.iterObjects())
+ 
+    for name in missing:
+        print("Not in the scene (or translate locked): " + name)
+    print("%s read, %d objects missing" % (fileName, len(missing)))
+    return modifier, missing
+ 
+ 
+#############################
+#
+#    Benchmark
+#
+#############################
+ 
+def _writeTestFile(fileName, count):
+    from xml.sax.saxutils import XMLGenerator
+ 
+    with open(fileName, "w") as xml_file:
+        writer = XMLGenerator(xml_file, "utf-8")
+        writer.startDocument()
+        writer.startElement("scene", {})
+        for i in range(count):
+            writer.startElement("object", {"name": "object%d" % i, "translateX": str(i * 0.1),
+                                           "translateY": "1.0", "translateZ": str(-i * 0.1)})
+            writer.endElement("object")
+        writer.endElement("scene")
+        writer.endDocument()
+ 
+ 
+def _peakMemory(fileName):
+    """ Return the peak python memory, in bytes, of reading the whole file """
+    import tracemalloc
+ 
+    tracemalloc.start()
+    for curObject in iterObjects(fileName):
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+ 
+ 
+def benchmark(count=1000000):
+    """ Read files of count / 10 and count objects, the peak memory must not follow the size
+ 
+        Presumption: python 3 (tracemalloc)
+    """
+    import os
+    import tempfile
+    import time
+ 
+    tempFolder = tempfile.mkdtemp()
+    peaks = []
+ 
+    for curCount in (count // 10, count):
+        fileName = os.path.join(tempFolder, "scene%d.xml" % curCount)
+        _writeTestFile(fileName, curCount)
+ 
+        startTime = time.time()
+        peaks.append(_peakMemory(fileName))
+        print("%d objects (%d MB file): %.2fs, peak memory %.2f MB" % (curCount, os.path.getsize(fileName) >> 20,
+                                                                         time.time() - startTime, peaks[-1] / 1048576.0))
+        os.remove(fileName)
+ 
+    if peaks[1] > 2 * peaks[0]:
+        raise AssertionError("memory grows with the file size")
+    return peaks
+ 
+ 
+if __name__ == "__main__":
+    readSceneXML()
@@ -1,58 +1,326 @@
+import re
+import time
 import maya.cmds as cmds
+import maya.OpenMaya as OpenMaya
+
+# maya node names, without the namespace
+VALID_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+CASES = {"keep": lambda name: name,
+         "lower": lambda name: name.lower(),
+         "upper": lambda name: name.upper(),
+         "capitalize": lambda name: name[:1].upper() + name[1:]}
+
+PREVIEW_SIZE = 200
+
+
+def split_namespace(name):
+    """ Return ("ns:", "name") of a node name, the namespace part is "" without one """
+    namespace, _, short_name = name.rpartition(":")
+    return (namespace + ":" if namespace else ""), short_name
+
+
+def build_name_func(find="", replace="", regex=False, template="", case="keep"):
+    """ Return name_func(short name, index) for RenamePlan
+
+        Procedure: replace find (a regular expression with regex, capture groups as \\1 in
+            replace), then fill the template where {name} is the replaced name and {index}
+            the position in the selection ("{name}_{index:03d}"), then change the case
+    """
+    if regex and find:
+        pattern = re.compile(find)
+        replace_func = lambda name: pattern.sub(replace, name)
+    elif find:
+        replace_func = lambda name: name.replace(find, replace)
+    else:
+        replace_func = lambda name: name
+
+    case_func = CASES[case]
+
+    def name_func(name, index):
+        name = replace_func(name)
+        if template:
+            name = template.format(name=name, index=index)
+        return case_func(name)
+
+    return name_func
+
+
+class NameIndex(object):
+    """ Names of every transform of the scene, kept up to date by callbacks
+
+        Procedure: one MItDependencyNodes pass builds it, node added, removed and name changed
+            callbacks keep it current, so a search never queries the scene.
+            remove_callbacks has to be called when it is not used anymore
+    """
+
+    def __init__(self):
+        self.names = {}
+        self.callbacks = []
+
+        node_iterator = OpenMaya.MItDependencyNodes(OpenMaya.MFn.kTransform)
+        while not node_iterator.isDone():
+            self._add(node_iterator.thisNode())
+            node_iterator.next()
+
+    def _add(self, obj):
+        handle = OpenMaya.MObjectHandle(obj)
+        self.names.setdefault(handle.hashCode(), []).append((handle, OpenMaya.MFnDependencyNode(obj).name()))
+
+    def _remove(self, obj):
+        key = OpenMaya.MObjectHandle(obj).hashCode()
+        entries = [entry for entry in self.names.get(key, []) if not entry[0].object() == obj]
+        if entries:
+            self.names[key] = entries
+        else:
+            self.names.pop(key, None)
+
+    def add_callbacks(self):
+        self.callbacks.append(OpenMaya.MDGMessage.addNodeAddedCallback(lambda obj, data: self._add(obj), "transform"))
+        self.callbacks.append(OpenMaya.MDGMessage.addNodeRemovedCallback(lambda obj, data: self._remove(obj), "transform"))
+        self.callbacks.append(OpenMaya.MNodeMessage.addNameChangedCallback(OpenMaya.MObject(), self._name_changed))
+
+    def remove_callbacks(self):
+        for callback in self.callbacks:
+            OpenMaya.MMessage.removeCallback(callback)
+        self.callbacks = []
+
+    def _name_changed(self, obj, previous_name, data):
+        if obj.hasFn(OpenMaya.MFn.kTransform):
+            self._remove(obj)
+            self._add(obj)
+
+    def search(self, find, regex=False):
+        """ Return [(handle, name)] of the transforms whose name contains find, or matches the regex """
+        if regex:
+            pattern = re.compile(find)
+            match = lambda name: pattern.search(name)
+        else:
+            match = lambda name: find in name
+
+        return [(handle, name) for entries in self.names.values() for handle, name in entries
+                if handle.isValid() and match(name)]
+
+
+class RenamePlan(object):
+    """ Every rename of a batch, computed before anything is renamed
+
+        Procedure: name_func(short name, index) gives the new name of each node, the namespace
+            is kept. A new name that is not valid, already used by a sibling (a DG node for
+            non DAG nodes) or planned twice under the same parent is a collision and is left out.
+            apply renames the rest deepest first in one undo chunk, Ctrl+Z reverts it all
+    """
+
+    def __init__(self, nodes, name_func):
+        self.renames = []
+        self.collisions = []
+        self.build_time = 0.0
+        self.apply_time = 0.0
+
+        start_time = time.time()
+        self._build(nodes, name_func)
+        self.build_time = time.time() - start_time
+
+    def _build(self, nodes, name_func):
+        sibling_names = {}
+        planned = set()
+
+        for index, node in enumerate(nodes):
+            selection = OpenMaya.MSelectionList()
+            selection.add(node)
+            obj = OpenMaya.MObject()
+            selection.getDependNode(0, obj)
+
+            old_name = OpenMaya.MFnDependencyNode(obj).name()
+            namespace, short_name = split_namespace(old_name)
+            new_short_name = name_func(short_name, index)
+            new_name = namespace + new_short_name
+            if new_name == old_name:
+                continue
+
+            if obj.hasFn(OpenMaya.MFn.kDagNode):
+                dag_path = OpenMaya.MDagPath()
+                selection.getDagPath(0, dag_path)
+                old_path = dag_path.fullPathName()
+                depth = dag_path.length()
+
+                parent_path = OpenMaya.MDagPath(dag_path)
+                parent_path.pop()
+                parent = parent_path.fullPathName()
+                if parent not in sibling_names:
+                    sibling_names[parent] = self._child_names(parent_path)
+                exists = new_name in sibling_names[parent]
+            else:
+                old_path = old_name
+                depth = 0
+                parent = None
+                exists = cmds.objExists(new_name)
+
+            if not VALID_NAME.match(new_short_name):
+                self.collisions.append((old_path, new_name, "invalid name"))
+            elif exists:
+                self.collisions.append((old_path, new_name, "name exists"))
+            elif (parent, new_name) in planned:
+                self.collisions.append((old_path, new_name, "renamed twice to the same name"))
+            else:
+                planned.add((parent, new_name))
+                self.renames.append((depth, old_path, new_name, OpenMaya.MObjectHandle(obj)))
+
+        # deepest first, the parent paths of the next renames stay valid
+        self.renames.sort(key=lambda rename: -rename[0])
+
+    def _child_names(self, parent_path):
+        if parent_path.length() == 0:
+            return set(cmds.ls(assemblies=True))
+
+        parent_fn = OpenMaya.MFnDagNode(parent_path)
+        return set(OpenMaya.MFnDependencyNode(parent_fn.child(i)).name() for i in range(parent_fn.childCount()))
+
+    def apply(self, verbose=False):
+        """ Rename every node of the plan as one undo step, return the number of renames
+
+            Procedure: cmds.rename goes on the undo queue, a modifier would not. The shapes
+                are left alone (ignoreShape), the plan only checked the names of its nodes
+        """
+        start_time = time.time()
+        cmds.undoInfo(openChunk=True)
+        try:
+            for depth, old_path, new_name, handle in self.renames:
+                if verbose:
+                    print "Renaming", old_path, ">", new_name
+                obj = handle.object()
+                if obj.hasFn(OpenMaya.MFn.kDagNode):
+                    current_name = OpenMaya.MFnDagNode(obj).fullPathName()
+                else:
+                    current_name = OpenMaya.MFnDependencyNode(obj).name()
+                cmds.rename(current_name, new_name, ignoreShape=True)
+        finally:
+            cmds.undoInfo(closeChunk=True)
+        self.apply_time = time.time() - start_time
+
+        for old_path, new_name, reason in self.collisions:
+            print "Not renamed", old_path, ">", new_name + ":", reason
+        return len(self.renames)
+
+    def summary(self):
+        return "%d renamed, %d collisions (plan %.3fs, rename %.3fs)" % (len(self.renames), len(self.collisions),
+                                                                         self.build_time, self.apply_time)
+
 
 class Renamer():
     def __init__(self):
         window_name = "renamerWindow"
         window_title = "Renamer"
-        
+        self.last_plan = None
+        self.name_index = NameIndex()
+        self.name_index.add_callbacks()
+
         if cmds.window(window_name, q=True, exists=True):
-        	cmds.deleteUI(window_name)
-        	
+            cmds.deleteUI(window_name)
+
         my_window = cmds.window(window_name, title=window_title)
-        
+
         main_layout = cmds.columnLayout(adj=True)
-        
+
         self.find_box = cmds.textFieldButtonGrp(label="Find", text="", adj=2, buttonLabel="Select", cw=[1,50], bc=self.find_matches)
         self.replace_box = cmds.textFieldButtonGrp(label="Replace", text="", adj=2, buttonLabel="Replace", cw=[1,50], bc=self.replace)
         self.prefix_box = cmds.textFieldButtonGrp(label="Prefix", text="", adj=2, buttonLabel="Add", cw=[1,50], bc=self.add_prefix)
         self.suffix_box = cmds.textFieldButtonGrp(label="Suffix", text="", adj=2, buttonLabel="Add", cw=[1,50], bc=self.add_suffix)
-        
+        self.template_box = cmds.textFieldGrp(label="Template", text="", adj=2, cw=[1,50], tcc=self.update_preview)
+        self.regex_box = cmds.checkBox(label="Regular expression", value=False, cc=self.update_preview)
+        self.case_menu = cmds.optionMenu(label="Case", cc=self.update_preview)
+        for case in ["keep", "lower", "upper", "capitalize"]:
+            cmds.menuItem(label=case)
+        self.preview_list = cmds.textScrollList(height=150)
+        self.log_box = cmds.checkBox(label="Log every rename", value=False)
+
+        cmds.textFieldButtonGrp(self.find_box, e=True, tcc=self.update_preview)
+        cmds.textFieldButtonGrp(self.replace_box, e=True, tcc=self.update_preview)
+
+        # the callbacks go with the window
+        cmds.scriptJob(uiDeleted=[my_window, self.name_index.remove_callbacks])
+        # without a find string the preview shows the selection
+        cmds.scriptJob(event=["SelectionChanged", self.update_preview], parent=my_window)
         cmds.showWindow(my_window)
-        
-    def find_matches(self):
+
+    def name_func(self):
+        return build_name_func(cmds.textFieldButtonGrp(self.find_box, q=True, text=True),
+                               cmds.textFieldButtonGrp(self.replace_box, q=True, text=True),
+                               cmds.checkBox(self.regex_box, q=True, value=True),
+                               cmds.textFieldGrp(self.template_box, q=True, text=True),
+                               cmds.optionMenu(self.case_menu, q=True, value=True))
+
+    def matches(self):
         find_string = cmds.textFieldButtonGrp(self.find_box, q=True, text=True)
-        matches = cmds.ls("*" + find_string + "*", type="transform")
-        if matches:
-            cmds.select(matches, r=True)
-        else:
-            cmds.select(cl=True)
-        
+        return self.name_index.search(find_string, cmds.checkBox(self.regex_box, q=True, value=True))
+
+    def sorted_matches(self):
+        """ Return the [(handle, name)] Replace renames with a find string, by name, {index} is the position """
+        return sorted(self.matches(), key=lambda match: match[1])
+
+    def replace_targets(self):
+        """ Return the full paths Replace renames in order, the find box matches or the selection without one """
+        if cmds.textFieldButtonGrp(self.find_box, q=True, text=True):
+            return [OpenMaya.MFnDagNode(handle.object()).fullPathName() for handle, name in self.sorted_matches()]
+        return cmds.ls(sl=True, long=True) or []
+
+    def update_preview(self, *args):
+        """ Show the new names Replace gives, in its order, the find box matches come from the name index """
+        cmds.textScrollList(self.preview_list, e=True, removeAll=True)
+        try:
+            if cmds.textFieldButtonGrp(self.find_box, q=True, text=True):
+                names = [name for handle, name in self.sorted_matches()]
+            else:
+                names = [path.rpartition("|")[2] for path in cmds.ls(sl=True, long=True) or []]
+            name_func = self.name_func()
+            lines = []
+            for index, name in enumerate(names[:PREVIEW_SIZE]):
+                namespace, short_name = split_namespace(name)
+                lines.append(name + " > " + namespace + name_func(short_name, index))
+            if len(names) > PREVIEW_SIZE:
+                lines.append("... %d more" % (len(names) - PREVIEW_SIZE))
+        except (re.error, KeyError, IndexError, ValueError) as error:
+            lines = ["Error: " + str(error)]
+
+        if lines:
+            cmds.textScrollList(self.preview_list, e=True, append=lines)
+
+    def find_matches(self):
+        try:
+            matches = self.matches()
+        except re.error as error:
+            print "Invalid regular expression:", error
+            return
+
+        selection = OpenMaya.MSelectionList()
+        for handle, name in matches:
+            selection.add(handle.object())
+        OpenMaya.MGlobal.setActiveSelectionList(selection)
+
+    def rename_selection(self, name_func, nodes=None):
+        """ Plan and apply the renames of nodes, the selection by default, name_func(short name, index) gives the new name """
+        if nodes is None:
+            nodes = cmds.ls(sl=True, long=True) or []
+        self.last_plan = RenamePlan(nodes, name_func)
+        self.last_plan.apply(verbose=cmds.checkBox(self.log_box, q=True, value=True))
+        print self.last_plan.summary()
+
     def add_prefix(self):
         prefix = cmds.textFieldButtonGrp(self.prefix_box, q=True, text=True)
-        selection = cmds.ls(sl=True)
-        for sel in selection:
-            new_name = prefix + sel
-            print "Renaming", sel, ">", new_name
-            cmds.rename(sel, new_name)
+        self.rename_selection(lambda name, index: prefix + name)
 
     def add_suffix(self):
         suffix = cmds.textFieldButtonGrp(self.suffix_box, q=True, text=True)
-        selection = cmds.ls(sl=True)
-        for sel in selection:
-            new_name = sel + suffix
-            print "Renaming", sel, ">", new_name
-            cmds.rename(sel, new_name)
-            
+        self.rename_selection(lambda name, index: name + suffix)
+
     def replace(self):
-        find_string = cmds.textFieldButtonGrp(self.find_box, q=True, text=True)
-        replace_string = cmds.textFieldButtonGrp(self.replace_box, q=True, text=True)
-        matches = cmds.ls("*" + find_string + "*", type="transform")
-        
-        selection = cmds.ls(sl=True)
-        for sel in selection:
-            new_name = sel.replace(find_string, replace_string)
-            print "Replacing", sel, ">", new_name
-            cmds.rename(sel, new_name)
-        
-
-Renamer()
\ No newline at end of file
+        """ Rename what the preview shows: the find box matches by name, the selection without a find string """
+        try:
+            self.rename_selection(self.name_func(), self.replace_targets())
+        except (re.error, KeyError, IndexError, ValueError) as error:
+            print "Not renamed:", error
+            return
+        self.update_preview()
+
+
+Renamer()
@@ -0,0 +1,209 @@
+import array
+import mmap
+import struct
+import sys
+ 
+""" Compact binary scene transform file, the binary sibling of writeXML / readXML
+ 
+    header : MAGIC, version, flags, object count                 (HEADER)
+    names  : count + 1 uint32 offsets into the name blob, then the utf-8 name blob,
+             names are sorted so a lookup is a binary search
+    values : per object the world rotate pivot (3 floats), followed by the world matrix
+             (16 floats) with FLAG_MATRIX, float64 with FLAG_DOUBLE else float32
+ 
+    TransformFile memory-maps the file, nothing is parsed until a name is looked up.
+    Nothing here needs Maya.
+ 
+    import sceneTransforms
+    sceneTransforms.writeTransforms("C:/Temp/test.strf", [("pCube1", (0.0, 0.5, 0.0))])
+    with sceneTransforms.TransformFile("C:/Temp/test.strf") as transforms:
+        print(transforms.translation("pCube1"))
+ 
+    compare size and speed with the xml and check both give the same values:
+    python -c "import sceneTransforms; sceneTransforms.compareWithXML()"
+    """
+ 
+MAGIC = b"STRF"
+VERSION = 1
+HEADER = struct.Struct("<4sHHI")
+ 
+FLAG_DOUBLE = 1
+FLAG_MATRIX = 2
+ 
+ 
+def writeTransforms(fileName, objects, double=False):
+    """ Write (name, translation) or (name, translation, matrix) objects to fileName
+ 
+        Presumption: names are unique, all objects have a matrix or none has
+    """
+    objects = sorted((curObject[0].encode("utf-8"),) + tuple(curObject[1:]) for curObject in objects)
+    withMatrix = bool(objects) and len(objects[0]) == 3
+ 
+    flags = (FLAG_DOUBLE if double else 0) | (FLAG_MATRIX if withMatrix else 0)
+    offsets = array.array("I", [0])
+    values = array.array("d" if double else "f")
+ 
+    for curObject in objects:
+        offsets.append(offsets[-1] + len(curObject[0]))
+        values.extend(curObject[1])
+        if withMatrix:
+            values.extend(curObject[2])
+ 
+    if sys.byteorder != "little":
+        offsets.byteswap()
+        values.byteswap()
+ 
+    with open(fileName, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, flags, len(objects)))
+        f.write(offsets.tobytes() if hasattr(offsets, "tobytes") else offsets.tostring())
+        f.write(b"".join(curObject[0] for curObject in objects))
+        f.write(values.tobytes() if hasattr(values, "tobytes") else values.tostring())
+ 
+ 
+class TransformFile(object):
+    """ Memory-mapped transform file, looked up by name without reading the whole file """
+ 
+    def __init__(self, fileName):
+        self._file = open(fileName, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+ 
+        magic, version, self.flags, self.count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a scene transform file: " + fileName)
+        if version > VERSION:
+            raise ValueError("Scene transform file version %d is newer than %d" % (version, VERSION))
+ 
+        self.double = bool(self.flags & FLAG_DOUBLE)
+        self.withMatrix = bool(self.flags & FLAG_MATRIX)
+        self._valueFormat = "<%d" + ("d" if self.double else "f")
+        self._valueSize = 8 if self.double else 4
+        self._stride = 19 if self.withMatrix else 3
+ 
+        self._offsetsStart = HEADER.size
+        self._namesStart = self._offsetsStart + 4 * (self.count + 1)
+        self._valuesStart = self._namesStart + self._offset(self.count)
+ 
+    def __enter__(self):
+        return self
+ 
+    def __exit__(self, *args):
+        self.close()
+ 
+    def __len__(self):
+        return self.count
+ 
+    def __contains__(self, name):
+        return self.index(name) is not None
+ 
+    def close(self):
+        self._map.close()
+        self._file.close()
+ 
+    def _offset(self, i):
+        return struct.unpack_from("<I", self._map, self._offsetsStart + 4 * i)[0]
+ 
+    def _name(self, i):
+        return self._map[self._namesStart + self._offset(i):self._namesStart + self._offset(i + 1)]
+ 
+    def _values(self, i, start, length):
+        position = self._valuesStart + (i * self._stride + start) * self._valueSize
+        return struct.unpack_from(self._valueFormat % length, self._map, position)
+ 
+    def index(self, name):
+        """ Return the position of the name in the file, None if it is not there """
+        encoded = name.encode("utf-8")
+        low, high = 0, self.count
+ 
+        while low < high:
+            middle = (low + high) // 2
+            if self._name(middle) < encoded:
+                low = middle + 1
+            else:
+                high = middle
+ 
+        if low < self.count and self._name(low) == encoded:
+            return low
+        return None
+ 
+    def translation(self, name):
+        i = self.index(name)
+        return None if i is None else self._values(i, 0, 3)
+ 
+    def matrix(self, name):
+        i = self.index(name)
+        return None if i is None or not self.withMatrix else self._values(i, 3, 16)
+ 
+    def iterObjects(self):
+        """ Yield (name, translation) of every object, like readXML.iterObjects """
+        for i in range(self.count):
+            yield self._name(i).decode("utf-8"), self._values(i, 0, 3)
+ 
+ 
+#############################
+#
+#    Comparison with the xml
+#
+#############################
+ 
+def compareWithXML(count=100000, double=True):
+    """ Write the same generated objects as xml and binary, read both back and check they match
+ 
+        Procedure: print the file sizes and the write, full read and single lookup times.
+            float32 files are compared with a relative tolerance
+    """
+    import os
+    import tempfile
+    import time
+    from xml.sax.saxutils import XMLGenerator
+ 
+    import readXML
+ 
+    objects = [("group%d|object%d" % (i % 97, i), (i * 0.1, 1.0 / (i + 1), -i * 0.37)) for i in range(count)]
+    tempFolder = tempfile.mkdtemp()
+    xmlFile = os.path.join(tempFolder, "scene.xml")
+    binaryFile = os.path.join(tempFolder, "scene.strf")
+ 
+    startTime = time.time()
+    with open(xmlFile, "w") as xml_file:
+        writer = XMLGenerator(xml_file, "utf-8")
+        writer.startDocument()
+        writer.startElement("scene", {})
+        for name, translation in objects:
+            writer.startElement("object", {"name": name, "translateX": repr(translation[0]),
+                                           "translateY": repr(translation[1]), "translateZ": repr(translation[2])})
+            writer.endElement("object")
+        writer.endElement("scene")
+        writer.endDocument()
+    xmlWrite = time.time() - startTime
+ 
+    startTime = time.time()
+    writeTransforms(binaryFile, objects, double)
+    binaryWrite = time.time() - startTime
+ 
+    startTime = time.time()
+    fromXML = dict(readXML.iterObjects(xmlFile))
+    xmlRead = time.time() - startTime
+ 
+    startTime = time.time()
+    with TransformFile(binaryFile) as transforms:
+        fromBinary = dict(transforms.iterObjects())
+    binaryRead = time.time() - startTime
+ 
+    tolerance = 0.0 if double else 1e-6
+    for name, translation in objects:
+        for expected, curXML, curBinary in zip(translation, fromXML[name], fromBinary[name]):
+            if curXML != expected or abs(curBinary - expected) > tolerance * max(1.0, abs(expected)):
+                raise AssertionError("%s does not round trip: %s %s %s" % (name, translation, fromXML[name],
+                                                                           fromBinary[name]))
+ 
+    startTime = time.time()
+    with TransformFile(binaryFile) as transforms:
+        translation = transforms.translation(objects[count // 2][0])
+    lookup = time.time() - startTime
+ 
+    print("%d objects" % count)
+    print("xml    : %8.2f MB, write %.2fs, read %.2fs" % (os.path.getsize(xmlFile) / 1048576.0, xmlWrite, xmlRead))
+    print("binary : %8.2f MB, write %.2fs, read %.2fs, one lookup %.5fs" % (os.path.getsize(binaryFile) / 1048576.0,
+                                                                            binaryWrite, binaryRead, lookup))
+    os.remove(xmlFile)
+    os.remove(binaryFile)
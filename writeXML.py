@@ -1,38 +1,301 @@
-from xml.dom.minidom import Document
-import maya.cmds as cmds
- 
-doc = Document()
- 
-root_node = doc.createElement("scene")
-doc.appendChild(root_node)
- 
-# Selection: 
-# grab all selected objects
-#selection = cmds.ls(sl=True)
- 
-# grab all visible objects, which type is transform
-selection = cmds.ls(type="transform", v=True )
- 
-for object in selection:
-     
-    # create object element
-    object_node = doc.createElement("object")
-    root_node.appendChild(object_node)
-     
-    # BEWARE: after freeze transformations the translate is a bit tricky
-    #object_translation = cmds.getAttr(object + ".translate")[0]
-    object_translation = cmds.xform(object, query = True, worldSpace = True, rotatePivot = True) 
-     
-    # set attributes
-    object_node.setAttribute("name", str(object))
-    object_node.setAttribute("translateX", str(object_translation[0]))
-    object_node.setAttribute("translateY", str(object_translation[1]))
-    object_node.setAttribute("translateZ", str(object_translation[2]))
-     
- 
-xml_file = open("C:/Temp/test.xml", "w")
-xml_file.write(doc.toprettyxml())
-xml_file.close()
- 
-print
-print doc.toprettyxml()
\ No newline at end of file
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+from xml.sax.saxutils import XMLGenerator, quoteattr
+import bz2
+import gzip
+import threading
+import maya.OpenMaya as OpenMaya
+ 
+import sceneTransforms
+ 
+""" Write the visible transforms of the scene into a xml file
+ 
+    <scene>
+      <object name="pCube1" translateX="0.0" translateY="0.5" translateZ="0.0"/>
+    </scene>
+ 
+    The translation is the world space rotate pivot. The elements are written one by one
+    while the DAG is walked, the file never sits in memory as a whole.
+ 
+    import writeXML
+    writeXML.writeSceneXML("C:/Temp/test.xml")
+ 
+    or the same in the compact binary format of sceneTransforms, optionally with world matrices:
+    writeXML.writeSceneBinary("C:/Temp/test.strf", matrix=True)
+ 
+    or with more attributes, the parent path and filters, gzip / bz2 from the extension.
+    Maya is only busy while the values are read, the xml is formatted and compressed
+    by threads while Maya goes on:
+    job = writeXML.writeSceneXMLAsync("C:/Temp/test.xml.gz", ["rotate", "scale", "myAttr"], namespace="hero")
+    job.wait()
+    """
+ 
+DEFAULT_PATH = "C:/Temp/test.xml"
+ 
+DEFAULT_ATTRIBUTES = ["rotate", "scale"]
+ 
+# name and translate* are the name and world pivot readXML applies
+RESERVED_NAMES = ["name", "parent", "translateX", "translateY", "translateZ"]
+ 
+CHUNK_SIZE = 5000
+ 
+COMPRESSIONS = {".gz": gzip.GzipFile, ".bz2": bz2.BZ2File}
+ 
+ 
+def iterVisiblePaths():
+    """ Yield the dag path of every visible transform, in one DAG pass
+ 
+        Procedure: like cmds.ls(type="transform", v=True), joints and other transform types
+            included, an instanced transform only once. The same MDagPath is yielded every time
+    """
+    dagIterator = OpenMaya.MItDag(OpenMaya.MItDag.kDepthFirst, OpenMaya.MFn.kTransform)
+    dagPath = OpenMaya.MDagPath()
+ 
+    while not dagIterator.isDone():
+        dagIterator.getPath(dagPath)
+ 
+        if dagPath.instanceNumber() == 0 and dagPath.isVisible():
+            yield dagPath
+ 
+        dagIterator.next()
+ 
+ 
+def iterVisibleTransforms(matrix=False):
+    """ Yield (name, world rotate pivot MPoint) of every visible transform, in one DAG pass,
+        with matrix (name, pivot, world matrix as 16 floats)
+ 
+        Presumption: names are the shortest unique ones
+    """
+    transformFn = OpenMaya.MFnTransform()
+ 
+    for dagPath in iterVisiblePaths():
+        transformFn.setObject(dagPath)
+        if matrix:
+            worldMatrix = dagPath.inclusiveMatrix()
+            yield (dagPath.partialPathName(), transformFn.rotatePivot(OpenMaya.MSpace.kWorld),
+                   [worldMatrix(row, column) for row in range(4) for column in range(4)])
+        else:
+            yield dagPath.partialPathName(), transformFn.rotatePivot(OpenMaya.MSpace.kWorld)
+ 
+ 
+def writeSceneXML(fileName=DEFAULT_PATH):
+    """ Write the scene xml to fileName and return the number of objects written """
+    count = 0
+ 
+    with open(fileName, "w") as xml_file:
+        writer = XMLGenerator(xml_file, "utf-8")
+        writer.startDocument()
+        writer.startElement("scene", {})
+ 
+        for name, object_translation in iterVisibleTransforms():
+            # BEWARE: after freeze transformations the translate is a bit tricky, so use the pivot
+            attributes = OrderedDict()
+            attributes["name"] = name
+            attributes["translateX"] = str(object_translation.x)
+            attributes["translateY"] = str(object_translation.y)
+            attributes["translateZ"] = str(object_translation.z)
+ 
+            writer.characters("\n  ")
+            writer.startElement("object", attributes)
+            writer.endElement("object")
+            count += 1
+ 
+        writer.characters("\n")
+        writer.endElement("scene")
+        writer.endDocument()
+ 
+    print "%d objects written to %s" % (count, fileName)
+    return count
+ 
+ 
+def writeSceneBinary(fileName, matrix=False, double=False):
+    """ Write the same objects as writeSceneXML in the sceneTransforms format, return the count """
+    objects = []
+    for curObject in iterVisibleTransforms(matrix):
+        pivot = curObject[1]
+        objects.append((curObject[0], (pivot.x, pivot.y, pivot.z)) + tuple(curObject[2:]))
+ 
+    sceneTransforms.writeTransforms(fileName, objects, double)
+ 
+    print "%d objects written to %s" % (len(objects), fileName)
+    return len(objects)
+ 
+ 
+#############################
+#
+#    Attribute-rich export
+#
+#############################
+ 
+def plugValues(plug):
+    """ Return [(name, value string)] of a plug, compounds give their children
+ 
+        Procedure: numbers, angles and distances in ui units like getAttr, strings and enums,
+            other types (arrays, matrices, messages) are left out
+    """
+    if plug.isCompound():
+        values = []
+        for i in range(plug.numChildren()):
+            values.extend(plugValues(plug.child(i)))
+        return values
+ 
+    attribute = plug.attribute()
+    name = plug.partialName(False, False, False, False, False, True)
+ 
+    if attribute.hasFn(OpenMaya.MFn.kNumericAttribute):
+        numericType = OpenMaya.MFnNumericAttribute(attribute).unitType()
+        if numericType == OpenMaya.MFnNumericData.kBoolean:
+            return [(name, str(plug.asBool()))]
+        if numericType in (OpenMaya.MFnNumericData.kShort, OpenMaya.MFnNumericData.kInt,
+                           OpenMaya.MFnNumericData.kLong, OpenMaya.MFnNumericData.kByte):
+            return [(name, str(plug.asInt()))]
+        return [(name, str(plug.asDouble()))]
+ 
+    if attribute.hasFn(OpenMaya.MFn.kUnitAttribute):
+        unitType = OpenMaya.MFnUnitAttribute(attribute).unitType()
+        if unitType == OpenMaya.MFnUnitAttribute.kAngle:
+            return [(name, str(plug.asMAngle().asUnits(OpenMaya.MAngle.uiUnit())))]
+        if unitType == OpenMaya.MFnUnitAttribute.kDistance:
+            return [(name, str(plug.asMDistance().asUnits(OpenMaya.MDistance.uiUnit())))]
+        return [(name, str(plug.asDouble()))]
+ 
+    if attribute.hasFn(OpenMaya.MFn.kEnumAttribute):
+        return [(name, str(plug.asShort()))]
+ 
+    if attribute.hasFn(OpenMaya.MFn.kTypedAttribute):
+        if OpenMaya.MFnTypedAttribute(attribute).attrType() == OpenMaya.MFnData.kString:
+            return [(name, plug.asString())]
+ 
+    return []
+ 
+ 
+def gatherObjects(attributes=DEFAULT_ATTRIBUTES, nodeType=None, namespace=None, userAttributes=False):
+    """ Return [(name, value string)] lists of the visible transforms, read in one DAG pass
+ 
+        Procedure: every object has its name, parent path and world rotate pivot (translate*,
+            as writeSceneXML), then the listed attributes and with userAttributes every
+            attribute added to the node. Attributes a node does not have are skipped
+ 
+        Presumption: nodeType is a node type name ("joint"), namespace without the ":"
+    """
+    for curAttr in attributes:
+        if curAttr in RESERVED_NAMES:
+            raise ValueError(curAttr + " is reserved in the scene xml")
+ 
+    objects = []
+    nodeFn = OpenMaya.MFnDependencyNode()
+    transformFn = OpenMaya.MFnTransform()
+ 
+    for dagPath in iterVisiblePaths():
+        nodeFn.setObject(dagPath.node())
+        if nodeType and nodeFn.typeName() != nodeType:
+            continue
+        if namespace is not None and nodeFn.name().rpartition(":")[0] != namespace:
+            continue
+ 
+        transformFn.setObject(dagPath)
+        pivot = transformFn.rotatePivot(OpenMaya.MSpace.kWorld)
+        parentPath = OpenMaya.MDagPath(dagPath)
+        parentPath.pop()
+ 
+        values = [("name", dagPath.partialPathName()), ("parent", parentPath.fullPathName()),
+                  ("translateX", str(pivot.x)), ("translateY", str(pivot.y)), ("translateZ", str(pivot.z))]
+ 
+        for curAttr in attributes:
+            if nodeFn.hasAttribute(curAttr):
+                values.extend(plugValues(nodeFn.findPlug(curAttr)))
+ 
+        if userAttributes:
+            for i in range(nodeFn.attributeCount()):
+                plug = OpenMaya.MPlug(dagPath.node(), nodeFn.attribute(i))
+                # children come with their compound
+                if plug.isDynamic() and not plug.isChild():
+                    values.extend(plugValues(plug))
+ 
+        objects.append(values)
+ 
+    return objects
+ 
+ 
+def toText(value):
+    """ Return value as unicode, the API gives python 2 str in utf-8 (non ascii names and strings) """
+    if isinstance(value, bytes):
+        return value.decode("utf-8")
+    return value
+ 
+ 
+def formatObjects(objects):
+    """ Return the xml lines of the objects as one unicode string """
+    lines = []
+    for values in objects:
+        lines.append(u"  <object " + u" ".join(toText(name) + u"=" + quoteattr(toText(value)) for name, value in values) +
+                     u"/>\n")
+    return u"".join(lines)
+ 
+ 
+def openOutput(fileName):
+    """ Return the binary file to write, compressed after its extension """
+    for curExtension, curClass in COMPRESSIONS.items():
+        if fileName.endswith(curExtension):
+            return curClass(fileName, "wb")
+    return open(fileName, "wb")
+ 
+ 
+def writeObjects(fileName, objects, workers=4):
+    """ Format the objects in chunks on a thread pool and write them in order, return the count """
+    pool = ThreadPool(workers)
+    chunks = [objects[i:i + CHUNK_SIZE] for i in range(0, len(objects), CHUNK_SIZE)]
+ 
+    try:
+        with openOutput(fileName) as xml_file:
+            xml_file.write(b'<?xml version="1.0" encoding="utf-8"?>\n<scene>\n')
+            for text in pool.imap(formatObjects, chunks):
+                xml_file.write(text.encode("utf-8"))
+            xml_file.write(b"</scene>\n")
+    finally:
+        pool.close()
+ 
+    return len(objects)
+ 
+ 
+class ExportJob(object):
+    """ Background formatting and writing of gathered objects
+ 
+        Procedure: the thread formats and compresses (zlib and bz2 release the GIL),
+            wait blocks until it is done and raises what the thread raised.
+            Threads and not processes, a process pool would start new Maya sessions
+    """
+ 
+    def __init__(self, fileName, objects, workers=4):
+        self.fileName = fileName
+        self.count = None
+        self.error = None
+        self.thread = threading.Thread(target=self._run, args=(objects, workers))
+        self.thread.start()
+ 
+    def _run(self, objects, workers):
+        try:
+            self.count = writeObjects(self.fileName, objects, workers)
+        except Exception as error:
+            self.error = error
+ 
+    def done(self):
+        return not self.thread.is_alive()
+ 
+    def wait(self):
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+        print "%d objects written to %s" % (self.count, self.fileName)
+        return self.count
+ 
+ 
+def writeSceneXMLAsync(fileName=DEFAULT_PATH, attributes=DEFAULT_ATTRIBUTES, nodeType=None, namespace=None,
+                       userAttributes=False, workers=4):
+    """ Read the objects in Maya and return the ExportJob writing them, see gatherObjects """
+    objects = gatherObjects(attributes, nodeType, namespace, userAttributes)
+    return ExportJob(fileName, objects, workers)
+ 
+ 
+if __name__ == "__main__":
+    writeSceneXML()